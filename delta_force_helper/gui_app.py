@@ -2,6 +2,11 @@
 三角洲行动 - 物品识别助手 GUI
 """
 
+import time
+
+# 启动计时（测量从启动到窗口第一次绘制的耗时）
+_START_TIME = time.perf_counter()
+
 import sys
 import json
 from pathlib import Path
@@ -13,14 +18,29 @@ from PyQt5.QtWidgets import (
     QTableWidget, QTableWidgetItem, QProgressBar, QGroupBox,
     QListWidget, QMessageBox, QLineEdit, QComboBox, QSplitter
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QPixmap, QIcon
 
-# 导入后端模块
-import tools.screenshot_analyzer as analyzer
-import tools.price_tracker as tracker
-import tools.smart_importer as importer
-import tools.view_data as viewer
+# 后端模块（easyocr、torch、cv2）很重，第一次用到时才导入，窗口可以立即显示
+from recognition.unknown_items import UnknownItemTracker
+
+
+class WarmupThread(QThread):
+    """后台加载并预热OCR模型"""
+    status = pyqtSignal(str)
+    
+    def run(self):
+        self.status.emit("⏳ OCR模型加载中...")
+        start = time.perf_counter()
+        
+        try:
+            from recognition.ocr_engine import get_ocr_engine
+            get_ocr_engine().warm_up()
+        except Exception as e:
+            self.status.emit(f"⚠️ OCR模型加载失败：{e}")
+            return
+        
+        self.status.emit(f"✅ OCR模型已就绪（{time.perf_counter() - start:.1f} 秒）")
 
 
 class WorkerThread(QThread):
@@ -32,6 +52,12 @@ class WorkerThread(QThread):
         super().__init__()
         self.task_type = task_type
         self.params = params or {}
+        self.stream = None
+    
+    def cancel(self):
+        """取消当前任务（当前截图处理完后停止）"""
+        if self.stream is not None:
+            self.stream.cancel()
     
     def run(self):
         try:
@@ -48,16 +74,40 @@ class WorkerThread(QThread):
         """运行物品识别"""
         self.progress.emit("📸 开始分析截图...")
         
-        # 这里调用后端识别逻辑
         folder = self.params.get('folder', 'D:/游戏截图/物品识别/')
         
-        # 模拟进度（实际会调用真实方法）
-        import time
-        for i in range(1, 11):
-            time.sleep(0.5)
-            self.progress.emit(f"正在处理... {i*10}%")
+        from tools.screenshot_analyzer import ScreenshotAnalyzer
+        backend = ScreenshotAnalyzer()
         
-        self.finished.emit({'status': 'success', 'count': 35})
+        # 流式分析：每识别完一张就更新界面
+        self.stream = backend.analyze_iter(folder)
+        total = self.stream.total
+        item_count = 0
+        total_value = 0
+        
+        for path, result in self.stream:
+            done = total - self.stream.remaining
+            
+            if result:
+                item_count += result['item_count']
+                total_value += result['total_value']
+                names = '、'.join(item['name'] for item in result['items'])
+                self.progress.emit(f"[{done}/{total}] {Path(path).name}：{names}")
+            else:
+                self.progress.emit(f"[{done}/{total}] {Path(path).name}：未识别到物品")
+        
+        if backend.unknown_items:
+            backend.save_unknown_items()
+        
+        if self.stream.cancelled:
+            self.progress.emit(f"⏹️ 已取消，剩余 {self.stream.remaining} 张未分析")
+        
+        self.finished.emit({
+            'status': 'success',
+            'count': item_count,
+            'screenshots': total - self.stream.remaining,
+            'total_value': total_value
+        })
     
     def run_price_tracking(self):
         """运行价格采集"""
@@ -90,6 +140,10 @@ class MainWindow(QMainWindow):
         
         # 加载数据
         self.load_data()
+        
+        # 窗口第一次绘制后再开始加载OCR模型（见 paintEvent）
+        self.startup_time = None
+        self.warmup_thread = None
     
     def init_ui(self):
         """初始化界面"""
@@ -126,6 +180,9 @@ class MainWindow(QMainWindow):
         
         # 状态栏
         self.statusBar().showMessage("就绪")
+        
+        self.ocr_status = QLabel("OCR模型：未加载")
+        self.statusBar().addPermanentWidget(self.ocr_status)
     
     def create_analyze_tab(self):
         """创建物品识别选项卡"""
@@ -166,6 +223,10 @@ class MainWindow(QMainWindow):
         analyze_btn.clicked.connect(self.start_analysis)
         btn_layout.addWidget(analyze_btn)
         
+        stop_btn = QPushButton("⏹️ 停止")
+        stop_btn.clicked.connect(self.stop_analysis)
+        btn_layout.addWidget(stop_btn)
+        
         clear_btn = QPushButton("🗑️ 清空结果")
         clear_btn.clicked.connect(self.clear_results)
         btn_layout.addWidget(clear_btn)
@@ -261,10 +322,46 @@ class MainWindow(QMainWindow):
             "物品名称", "当前价格", "最低价", "最高价", "平均价", "趋势", "采样次数"
         ])
         self.price_table.setAlternatingRowColors(True)
+        self.price_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.price_table.itemSelectionChanged.connect(self.show_price_history)
         price_layout.addWidget(self.price_table)
         
         layout.addWidget(price_group)
         
+        # 价格走势（选中物品后显示）
+        history_group = QGroupBox("价格走势")
+        history_layout = QVBoxLayout()
+        history_group.setLayout(history_layout)
+        
+        range_layout = QHBoxLayout()
+        range_layout.addWidget(QLabel("时间范围："))
+        self.history_range = QComboBox()
+        # (显示文字, 天数, 汇总时间段)
+        self.history_ranges = [
+            ("最近24小时（每小时）", 1, '1h'),
+            ("最近7天（每4小时）", 7, '4h'),
+            ("最近30天（每天）", 30, '1d'),
+            ("全部（每天）", None, '1d'),
+        ]
+        self.history_range.addItems([label for label, _, _ in self.history_ranges])
+        self.history_range.currentIndexChanged.connect(self.show_price_history)
+        range_layout.addWidget(self.history_range)
+        range_layout.addStretch()
+        history_layout.addLayout(range_layout)
+        
+        self.history_table = QTableWidget()
+        self.history_table.setColumnCount(7)
+        self.history_table.setHorizontalHeaderLabels([
+            "时间", "开盘", "最高", "最低", "收盘", "均价", "采样次数"
+        ])
+        self.history_table.setAlternatingRowColors(True)
+        history_layout.addWidget(self.history_table)
+        
+        layout.addWidget(history_group)
+        
+        # 价格查询（第一次选中物品时才打开时间序列）
+        self.price_query = None
+        
         return widget
     
     def create_data_tab(self):
@@ -410,6 +507,25 @@ class MainWindow(QMainWindow):
         
         return widget
     
+    # ============ 启动 ============
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        
+        if self.startup_time is None:
+            self.startup_time = time.perf_counter() - _START_TIME
+            # 不在绘制过程中做其他事情
+            QTimer.singleShot(0, self.on_first_paint)
+    
+    def on_first_paint(self):
+        """窗口显示后：输出启动耗时，后台预热OCR模型"""
+        print(f"🚀 窗口已显示（启动耗时 {self.startup_time:.2f} 秒）")
+        self.statusBar().showMessage(f"就绪（启动耗时 {self.startup_time:.2f} 秒）")
+        
+        self.warmup_thread = WarmupThread()
+        self.warmup_thread.status.connect(self.ocr_status.setText)
+        self.warmup_thread.start()
+    
     # ============ 功能方法 ============
     
     def browse_folder(self):
@@ -442,6 +558,13 @@ class MainWindow(QMainWindow):
         
         self.statusBar().showMessage("正在识别...")
     
+    def stop_analysis(self):
+        """停止物品识别"""
+        worker = getattr(self, 'worker', None)
+        if worker is not None and worker.isRunning():
+            worker.cancel()
+            self.statusBar().showMessage("正在停止...")
+    
     def update_progress(self, message):
         """更新进度"""
         self.result_text.append(message)
@@ -460,6 +583,9 @@ class MainWindow(QMainWindow):
             
             # 更新统计信息
             self.stats_items.setText(f"识别物品：{result['count']}")
+            if 'screenshots' in result:
+                self.stats_screenshots.setText(f"截图数：{result['screenshots']}")
+                self.stats_value.setText(f"总价值：{result['total_value']:,} 币")
             
             # 刷新数据
             self.load_data()
@@ -501,6 +627,10 @@ class MainWindow(QMainWindow):
         with open(price_file, 'r', encoding='utf-8') as f:
             prices = json.load(f)
         
+        # 采集之后时间序列可能已经合并成新的一代
+        if self.price_query is not None:
+            self.price_query.reload()
+        
         self.price_table.setRowCount(0)
         
         trend_symbols = {
@@ -524,6 +654,42 @@ class MainWindow(QMainWindow):
         
         self.price_table.resizeColumnsToContents()
     
+    def show_price_history(self):
+        """显示选中物品的价格走势"""
+        rows = self.price_table.selectionModel().selectedRows()
+        if not rows:
+            return
+        name = self.price_table.item(rows[0].row(), 0).text()
+        
+        timeseries_folder = self.data_folder / "timeseries"
+        if not timeseries_folder.exists():
+            return
+        
+        if self.price_query is None:
+            from storage.price_query import PriceQuery
+            self.price_query = PriceQuery(root=timeseries_folder)
+        
+        _, days, bucket = self.history_ranges[self.history_range.currentIndex()]
+        t0 = time.time() - days * 86400 if days else None
+        bars = self.price_query.ohlc(name, bucket, t0)
+        
+        self.history_table.setRowCount(0)
+        time_format = '%m-%d' if bucket == '1d' else '%m-%d %H:%M'
+        
+        # 最近的在上面
+        for i in reversed(range(len(bars['ts']))):
+            row = self.history_table.rowCount()
+            self.history_table.insertRow(row)
+            
+            when = datetime.fromtimestamp(int(bars['ts'][i])).strftime(time_format)
+            values = [when] + [f"{int(bars[column][i]):,}"
+                               for column in ('open', 'high', 'low', 'close', 'avg')]
+            values.append(str(int(bars['count'][i])))
+            for column, value in enumerate(values):
+                self.history_table.setItem(row, column, QTableWidgetItem(value))
+        
+        self.history_table.resizeColumnsToContents()
+    
     def filter_prices(self, text):
         """过滤价格表"""
         for row in range(self.price_table.rowCount()):
@@ -611,16 +777,17 @@ class MainWindow(QMainWindow):
                 self.stats_db_count.setText(f"数据库物品：{len(items)}")
         
         # 加载未知物品
-        unknown_file = self.data_folder / "unknown_items.json"
-        if unknown_file.exists():
-            with open(unknown_file, 'r', encoding='utf-8') as f:
-                unknown_items = json.load(f)
-                
-                self.unknown_list.clear()
-                for item in unknown_items:
-                    self.unknown_list.addItem(f"{item['name']} (置信度: {item['confidence']:.0%})")
-                
-                self.stats_unknown_count.setText(f"未知物品：{len(unknown_items)}")
+        unknown_tracker = UnknownItemTracker(
+            str(self.data_folder / "unknown_items.json"),
+            str(self.data_folder / "unknown_items.log.jsonl")
+        )
+        unknown_items = unknown_tracker.items()
+        
+        self.unknown_list.clear()
+        for item in unknown_items:
+            self.unknown_list.addItem(f"{item['name']} (置信度: {item['confidence']:.0%})")
+        
+        self.stats_unknown_count.setText(f"未知物品：{len(unknown_items)}")
         
         # 加载价格数据
         self.refresh_prices()
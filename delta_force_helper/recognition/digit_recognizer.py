@@ -0,0 +1,337 @@
+"""
+价格数字识别（不用 easyocr）
+- 交易行的价格列只用一种固定字体，只有 0-9 和千位分隔符
+- 二值化后按连通域切出每个字符，矮小且贴底的字符视为逗号/小数点，直接丢弃
+- 每个字符缩放成固定大小的向量，与模板库做一次矩阵乘法（归一化相关系数），取最相似的模板
+- 模板库从截图中学习：easyocr 读对的价格格子，按字符切开后存成模板
+
+模板文件：recognition/models/digits/<数字>_<序号>.png
+
+用法：python recognition/digit_recognizer.py [--font 字体文件] [--count 2000]
+用字体渲染模板和随机价格，测试识别准确率和每格耗时
+"""
+
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+DIGITS_DIR = "recognition/models/digits"
+DIGITS = '0123456789'
+
+
+def read_image(path, flags=cv2.IMREAD_GRAYSCALE):
+    """读取图片（支持中文路径）"""
+    try:
+        return cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), flags)
+    except Exception:
+        return None
+
+
+class DigitRecognizer:
+    """
+    数字识别器
+
+    glyph_size: 字符统一缩放到的大小 (宽, 高)
+    min_score: 每个字符的最低相关系数，低于它整格视为识别失败
+    max_templates: 每个数字最多保留多少个模板
+    """
+
+    def __init__(self, templates_dir=DIGITS_DIR, glyph_size=(12, 18),
+                 min_score=0.85, max_templates=20):
+        self.templates_dir = templates_dir
+        self.glyph_size = glyph_size
+        self.min_score = min_score
+        self.max_templates = max_templates
+
+        self.labels = []
+        self.bank = np.zeros((0, glyph_size[0] * glyph_size[1]), dtype=np.float32)
+        self._new_templates = []
+
+        self.load_templates()
+
+    @property
+    def is_ready(self):
+        """0-9 每个数字都至少有一个模板"""
+        return set(DIGITS) <= set(self.labels)
+
+    # ============ 模板库 ============
+
+    def _normalize(self, patches):
+        """展平成零均值、单位长度的向量（点积即相关系数）"""
+        vectors = patches.reshape(len(patches), -1).astype(np.float32)
+        vectors -= vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def load_templates(self):
+        """加载模板目录中的所有数字模板"""
+        labels = []
+        patches = []
+
+        templates_dir = Path(self.templates_dir)
+        if templates_dir.exists():
+            for path in sorted(templates_dir.glob("*.png")):
+                label = path.stem.split('_')[0]
+                if label not in DIGITS:
+                    continue
+                img = read_image(path)
+                if img is None or img.shape[::-1] != self.glyph_size:
+                    continue
+                labels.append(label)
+                patches.append(img)
+
+        self.labels = labels
+        if patches:
+            self.bank = self._normalize(np.stack(patches))
+
+        return len(labels)
+
+    def add_template(self, label, patch):
+        """添加一个字符模板（patch 为 glyph_size 大小的二值图）"""
+        if self.labels.count(label) >= self.max_templates:
+            return False
+
+        vector = self._normalize(patch[None])
+
+        # 已有几乎一样的模板就不再添加
+        if self.labels:
+            same = [i for i, l in enumerate(self.labels) if l == label]
+            if same and float((self.bank[same] @ vector[0]).max()) > 0.98:
+                return False
+
+        self.labels.append(label)
+        self.bank = np.vstack([self.bank, vector])
+        self._new_templates.append((label, patch))
+        return True
+
+    def save(self):
+        """把新学到的模板保存到模板目录，返回保存的数量"""
+        if not self._new_templates:
+            return 0
+
+        templates_dir = Path(self.templates_dir)
+        templates_dir.mkdir(parents=True, exist_ok=True)
+
+        counters = {}
+        for label, patch in self._new_templates:
+            index = counters.get(label, len(list(templates_dir.glob(f"{label}_*.png"))))
+            cv2.imencode('.png', patch)[1].tofile(str(templates_dir / f"{label}_{index:03d}.png"))
+            counters[label] = index + 1
+
+        count = len(self._new_templates)
+        self._new_templates = []
+        return count
+
+    # ============ 切分 ============
+
+    @staticmethod
+    def binarize(img):
+        """Otsu 二值化，保证文字为白色（255）、背景为黑色"""
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        # 边框像素大多是背景，边框偏白说明文字是深色的
+        border = np.concatenate([binary[0], binary[-1], binary[:, 0], binary[:, -1]])
+        if border.mean() > 127:
+            binary = 255 - binary
+        return binary
+
+    def segment(self, binary):
+        """
+        按连通域切出字符（逗号紧贴前一个数字时列投影分不开）
+
+        返回 [(x, y, w, h), ...]，从左到右（已去掉逗号、小数点等分隔符）
+        """
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+
+        # 去掉背景和噪点
+        components = sorted(
+            (tuple(int(v) for v in stats[i, :4]) for i in range(1, count)
+             if stats[i, cv2.CC_STAT_AREA] >= 2),
+            key=lambda box: box[0]
+        )
+        if not components:
+            return []
+
+        # 横向大部分重叠的连通域属于同一个字符（笔画断开时）
+        glyphs = [components[0]]
+        for x, y, w, h in components[1:]:
+            gx, gy, gw, gh = glyphs[-1]
+            overlap = min(gx + gw, x + w) - max(gx, x)
+            if overlap > min(gw, w) * 0.6:
+                x0, y0 = min(gx, x), min(gy, y)
+                x1, y1 = max(gx + gw, x + w), max(gy + gh, y + h)
+                glyphs[-1] = (x0, y0, x1 - x0, y1 - y0)
+            else:
+                glyphs.append((x, y, w, h))
+
+        line_top = min(y for _, y, _, _ in glyphs)
+        line_bottom = max(y + h for _, y, _, h in glyphs)
+        line_height = line_bottom - line_top
+
+        # 逗号/小数点：高度不到一半，且位于行的下半部分
+        return [
+            (x, y, w, h) for x, y, w, h in glyphs
+            if not (h < line_height * 0.5 and y > line_top + line_height * 0.4)
+        ]
+
+    def _glyph_patch(self, binary, box):
+        """切出一个字符，补成接近方形（保留"1"这类窄字符的宽高比）后缩放"""
+        x, y, w, h = box
+        glyph = binary[y:y + h, x:x + w]
+
+        target_w = max(w, int(round(h * self.glyph_size[0] / self.glyph_size[1])))
+        pad = target_w - w
+        glyph = cv2.copyMakeBorder(glyph, 0, 0, pad // 2, pad - pad // 2,
+                                   cv2.BORDER_CONSTANT, value=0)
+        return cv2.resize(glyph, self.glyph_size, interpolation=cv2.INTER_AREA)
+
+    def split_lines(self, binary, min_height=6):
+        """把一整列切成行，返回每行的 (y, h)"""
+        rows = binary.any(axis=1)
+        lines = []
+        start = None
+        for y, filled in enumerate(np.append(rows, False)):
+            if filled and start is None:
+                start = y
+            elif not filled and start is not None:
+                if y - start >= min_height:
+                    lines.append((start, y - start))
+                start = None
+        return lines
+
+    # ============ 识别 ============
+
+    def read(self, cell):
+        """
+        识别一个价格格子
+
+        返回 (数字字符串, 置信度)，识别失败时数字字符串为 None
+        """
+        if not self.labels:
+            return None, 0.0
+
+        binary = self.binarize(cell)
+        boxes = self.segment(binary)
+        if not boxes:
+            return None, 0.0
+
+        vectors = self._normalize(np.stack([self._glyph_patch(binary, box) for box in boxes]))
+        scores = vectors @ self.bank.T
+
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(boxes)), best]
+
+        confidence = float(best_scores.min())
+        if confidence < self.min_score:
+            return None, confidence
+
+        return ''.join(self.labels[i] for i in best), confidence
+
+    def read_column(self, column):
+        """
+        识别一整列价格（每行一个价格）
+
+        返回 [(bbox, 文字, 置信度, (x, y, w, h)), ...]，坐标相对于这一列；
+        识别失败的行文字为 None（调用方可以交给 easyocr）
+        """
+        binary = self.binarize(column)
+        width = column.shape[1]
+
+        results = []
+        for y, h in self.split_lines(binary):
+            # 上下各留一点边距，二值化更稳定
+            y0 = max(0, y - 2)
+            y1 = min(column.shape[0], y + h + 2)
+            cell = column[y0:y1]
+
+            text, confidence = self.read(cell)
+            bbox = [[0, y0], [width, y0], [width, y1], [0, y1]]
+            results.append((bbox, text, confidence, (0, y0, width, y1 - y0)))
+
+        return results
+
+    def learn(self, cell, text):
+        """
+        从一个已知内容的价格格子学习模板（如 easyocr 高置信度读出的价格）
+
+        字符数量对不上时放弃，返回新增的模板数
+        """
+        digits = [c for c in text if c.isdigit()]
+        if not digits:
+            return 0
+
+        binary = self.binarize(cell)
+        boxes = self.segment(binary)
+        if len(boxes) != len(digits):
+            return 0
+
+        added = 0
+        for label, box in zip(digits, boxes):
+            if self.add_template(label, self._glyph_patch(binary, box)):
+                added += 1
+        return added
+
+
+# ============ 测试 ============
+
+def render_price(text, font=None, size=28, color=(240, 210, 120), background=(30, 30, 30)):
+    """用 PIL 渲染一个价格格子（BGR）"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    if font is None:
+        try:
+            font = ImageFont.load_default(size)
+        except TypeError:
+            font = ImageFont.load_default()
+
+    probe = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    left, top, right, bottom = probe.textbbox((0, 0), text, font=font)
+
+    img = Image.new('RGB', (right - left + 16, bottom - top + 12), background)
+    ImageDraw.Draw(img).text((8 - left, 6 - top), text, font=font, fill=color)
+    return cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+
+
+def benchmark(font_path=None, count=2000, seed=0):
+    """用字体渲染模板，再识别随机价格"""
+    import random
+    import tempfile
+    from PIL import ImageFont
+
+    font = ImageFont.truetype(font_path, 28) if font_path else None
+
+    with tempfile.TemporaryDirectory() as templates_dir:
+        recognizer = DigitRecognizer(templates_dir=templates_dir)
+        recognizer.learn(render_price(DIGITS, font), DIGITS)
+        print(f"🔤 从字体学到 {len(recognizer.labels)} 个模板")
+
+        rng = random.Random(seed)
+        prices = [rng.randint(100, 999999) for _ in range(count)]
+        cells = [render_price(f"{price:,}", font) for price in prices]
+
+        correct = 0
+        start = time.perf_counter()
+        for price, cell in zip(prices, cells):
+            text, _ = recognizer.read(cell)
+            if text is not None and int(text) == price:
+                correct += 1
+        elapsed = time.perf_counter() - start
+
+    print(f"✅ 准确率 {correct / count:.2%}（{correct}/{count}）")
+    print(f"⏱️  平均 {elapsed / count * 1000:.3f} ms/格")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="价格数字识别测试")
+    parser.add_argument('--font', help="字体文件（默认PIL内置字体）")
+    parser.add_argument('--count', type=int, default=2000, help="测试价格数量")
+    args = parser.parse_args()
+
+    benchmark(args.font, args.count)
@@ -0,0 +1,202 @@
+"""
+已处理文件清单（增量处理截图文件夹）
+- 记录每个文件的路径、大小、修改时间和处理结果
+- 再次运行时只处理新增或修改过的截图
+- 追加写入 JSONL，每处理一张记录一行，中途崩溃后从断点继续
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+
+class ProcessedManifest:
+    """
+    已处理文件清单
+
+    文件格式（每行一条JSON）：
+    {"type": "file", "path": ..., "size": ..., "mtime": ..., "outcome": ..., "processed_at": ...}
+    {"type": "batch_start", "total": ..., "started_at": ...}
+    {"type": "batch_end", "done": ..., "finished_at": ...}
+    """
+
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file
+
+        self.entries = {}
+        self.line_count = 0
+
+        # 断点信息：上次批处理未正常结束时记录的进度
+        self.interrupted_batch = None
+        self._batch = None
+
+        self.load()
+
+    @staticmethod
+    def make_key(path):
+        """清单中的文件键（绝对路径）"""
+        return str(Path(path).resolve())
+
+    def load(self):
+        """加载清单（后写入的记录覆盖先写入的）"""
+        self.entries = {}
+        self.line_count = 0
+        batch = None
+
+        if not Path(self.manifest_file).exists():
+            return
+
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+
+                self.line_count += 1
+                record_type = record.get('type')
+
+                if record_type == 'file':
+                    self.entries[record['path']] = record
+                    if batch is not None:
+                        batch['done'] += 1
+                elif record_type == 'batch_start':
+                    batch = {'total': record['total'], 'done': 0,
+                             'started_at': record['started_at']}
+                elif record_type == 'batch_end':
+                    batch = None
+
+        self.interrupted_batch = batch
+
+        # 重复记录太多时压缩
+        if self.line_count > 2 * len(self.entries) + 100:
+            self.compact()
+
+    def is_processed(self, path, stat=None):
+        """文件是否已处理过且之后没有被修改"""
+        entry = self.entries.get(self.make_key(path))
+        if entry is None:
+            return False
+
+        stat = stat or os.stat(path)
+        return entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+
+    def select(self, paths, since=None, incremental=True):
+        """
+        挑选需要处理的文件
+
+        since: 只处理修改时间不早于该时间戳的文件
+        incremental: False 时忽略清单，全部重新处理
+        """
+        selected = []
+
+        for path in paths:
+            stat = os.stat(path)
+
+            if since is not None and stat.st_mtime < since:
+                continue
+
+            if incremental and self.is_processed(path, stat):
+                continue
+
+            selected.append(path)
+
+        return selected
+
+    def begin_batch(self, total):
+        """开始一批处理"""
+        if self.interrupted_batch:
+            batch = self.interrupted_batch
+            print(f"   ⏯️  上次处理在 {batch['done']}/{batch['total']} 张处中断，"
+                  f"从断点继续")
+
+        self._batch = {'total': total, 'done': 0}
+        self._append({
+            'type': 'batch_start',
+            'total': total,
+            'started_at': datetime.now().isoformat()
+        })
+
+    def record(self, path, outcome, **extra):
+        """记录一个文件的处理结果（立即写入磁盘）"""
+        stat = os.stat(path)
+
+        entry = {
+            'type': 'file',
+            'path': self.make_key(path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'outcome': outcome,
+            'processed_at': datetime.now().isoformat(),
+            **extra
+        }
+
+        self.entries[entry['path']] = entry
+        self._append(entry)
+
+        if self._batch is not None:
+            self._batch['done'] += 1
+
+    def end_batch(self):
+        """结束一批处理"""
+        done = self._batch['done'] if self._batch else 0
+
+        self._append({
+            'type': 'batch_end',
+            'done': done,
+            'finished_at': datetime.now().isoformat()
+        })
+
+        self._batch = None
+        self.interrupted_batch = None
+
+    def _append(self, record):
+        """追加一行记录"""
+        Path(self.manifest_file).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.manifest_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+        self.line_count += 1
+
+    def compact(self):
+        """压缩清单：每个文件只保留最新记录"""
+        tmp_file = f"{self.manifest_file}.tmp"
+
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        os.replace(tmp_file, self.manifest_file)
+        self.line_count = len(self.entries)
+
+        # 压缩后断点信息已丢失，中断的批次里已处理的文件仍在清单中，照样会跳过
+        self.interrupted_batch = None
+
+
+def parse_since(value):
+    """
+    解析 --since 参数
+
+    支持：2025-11-20、2025-11-20T18:00:00、或 Unix 时间戳
+    """
+    if value is None:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def list_screenshots(folder):
+    """列出文件夹中的截图（按文件名排序，保证断点续传顺序稳定）"""
+    folder = Path(folder)
+    return sorted(list(folder.glob("*.png")) + list(folder.glob("*.jpg")))
@@ -0,0 +1,142 @@
+"""
+近似重复截图去重（感知哈希）
+- AutoCapture 每3秒截一张，停在同一个菜单时连续多张几乎一样
+- 用 dHash / pHash 计算64位指纹，汉明距离小于阈值视为重复
+- 重复帧不再OCR，直接沿用代表帧的识别结果
+"""
+
+import cv2
+import numpy as np
+
+
+def _load_gray(image):
+    """读取灰度图（路径用1/4分辨率解码，速度快很多）"""
+    if isinstance(image, np.ndarray):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    try:
+        data = np.fromfile(str(image), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    except Exception:
+        return None
+
+
+def dhash(gray, hash_size=8):
+    """差值哈希：比较相邻像素亮度"""
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return _bits_to_int(bits)
+
+
+def phash(gray, hash_size=8, highfreq_factor=4):
+    """感知哈希：DCT低频分量与中位数比较"""
+    size = hash_size * highfreq_factor
+    small = cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:hash_size, :hash_size]
+    bits = (low > np.median(low)).flatten()
+    return _bits_to_int(bits)
+
+
+def _bits_to_int(bits):
+    """布尔数组转成整数指纹"""
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a, b):
+    """两个哈希的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+HASH_FUNCTIONS = {
+    'dhash': dhash,
+    'phash': phash,
+}
+
+
+class FrameDeduplicator:
+    """
+    连续帧去重
+
+    每一帧与当前代表帧比较，距离 <= threshold 视为重复；
+    否则它成为新的代表帧
+    """
+
+    def __init__(self, method='dhash', threshold=5):
+        if method not in HASH_FUNCTIONS:
+            raise ValueError(f"未知的哈希方法：{method}")
+
+        self.method = method
+        self.threshold = threshold
+        self._hash = HASH_FUNCTIONS[method]
+
+        self._current_key = None
+        self._current_hash = None
+
+        # 统计
+        self.frame_count = 0
+        self.skipped_count = 0
+
+    def reset(self):
+        """重新开始（不再与之前的代表帧比较）"""
+        self._current_key = None
+        self._current_hash = None
+
+    def compute_hash(self, image):
+        """计算哈希（image 为路径或图片数组），读取失败返回 None"""
+        gray = _load_gray(image)
+        if gray is None:
+            return None
+        return self._hash(gray)
+
+    def check(self, key, image=None):
+        """
+        判断一帧是否与当前代表帧重复
+
+        key: 帧的标识（通常是路径）；image 不传时按路径读取
+        返回代表帧的 key（重复）或 None（新的代表帧）
+        """
+        self.frame_count += 1
+        frame_hash = self.compute_hash(key if image is None else image)
+
+        # 读不出来的帧交给后面的流程处理
+        if frame_hash is None:
+            return None
+
+        if self._current_hash is not None and \
+                hamming_distance(frame_hash, self._current_hash) <= self.threshold:
+            self.skipped_count += 1
+            return self._current_key
+
+        self._current_key = key
+        self._current_hash = frame_hash
+        return None
+
+    def group(self, paths):
+        """
+        把一组连续帧分组
+
+        返回 (代表帧列表, {重复帧: 代表帧})
+        """
+        self.reset()
+
+        representatives = []
+        duplicates = {}
+
+        for path in paths:
+            representative = self.check(path)
+            if representative is None:
+                representatives.append(path)
+            else:
+                duplicates[path] = representative
+
+        return representatives, duplicates
+
+    def get_stats(self):
+        """去重统计"""
+        return {
+            'method': self.method,
+            'threshold': self.threshold,
+            'frames': self.frame_count,
+            'skipped': self.skipped_count,
+            'unique': self.frame_count - self.skipped_count
+        }
@@ -0,0 +1,261 @@
+"""
+物品名称模糊匹配（容忍OCR识别错一两个字）
+- 二元组（bigram）倒排索引 + 长度分桶
+- 前缀过滤：只从最稀有的几个二元组取候选，候选数量很少
+- 带上限的编辑距离校验，超过上限立即停止
+
+例如 OCR 把 “M7战斗步枪” 识别成 “M7战斗步抢”，编辑距离为1，仍能匹配上
+"""
+
+import random
+import time
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    计算编辑距离，超过 max_distance 时返回 None
+
+    只计算对角线附近 max_distance 宽的区域，并在整行都超限时提前结束
+    """
+    la, lb = len(a), len(b)
+    if abs(la - lb) > max_distance:
+        return None
+    if a == b:
+        return 0
+
+    big = max_distance + 1
+    previous = list(range(lb + 1))
+
+    for i in range(1, la + 1):
+        lo = max(1, i - max_distance)
+        hi = min(lb, i + max_distance)
+
+        current = [big] * (lb + 1)
+        current[0] = i if i <= max_distance else big
+        ca = a[i - 1]
+        row_min = current[0]
+
+        for j in range(lo, hi + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+
+        if row_min > max_distance:
+            return None
+        previous = current
+
+    distance = previous[lb]
+    return distance if distance <= max_distance else None
+
+
+class FuzzyMatcher:
+    """
+    模糊匹配器
+
+    max_distance: 允许的最大编辑距离
+    min_similarity: 最低相似度（1 - 编辑距离 / 较长名称长度），
+                    避免短文本错一个字就匹配到别的物品
+    """
+
+    Q = 2
+    PAD = '\x00'
+
+    def __init__(self, names=(), max_distance=2, min_similarity=0.7):
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+
+        self._order = {}
+        self._next_order = 0
+
+        # 名称 -> 二元组集合（候选校验前先做计数过滤）
+        self._name_grams = {}
+
+        # 二元组 -> 名称长度 -> 名称集合
+        self._postings = {}
+        # 二元组出现在多少个名称里（用于挑选最稀有的二元组）
+        self._gram_counts = {}
+
+        self.sync(names)
+
+    def __len__(self):
+        return len(self._order)
+
+    @classmethod
+    def _grams(cls, text):
+        """带首尾填充的二元组列表（允许重复）"""
+        padded = cls.PAD + text + cls.PAD
+        return [padded[i:i + cls.Q] for i in range(len(padded) - cls.Q + 1)]
+
+    # ============ 增量维护 ============
+
+    def add(self, name):
+        """添加物品名称"""
+        if not name or name in self._order:
+            return
+
+        self._order[name] = self._next_order
+        self._next_order += 1
+
+        grams = frozenset(self._grams(name))
+        self._name_grams[name] = grams
+
+        length = len(name)
+        for gram in grams:
+            self._postings.setdefault(gram, {}).setdefault(length, set()).add(name)
+            self._gram_counts[gram] = self._gram_counts.get(gram, 0) + 1
+
+    def remove(self, name):
+        """删除物品名称"""
+        if self._order.pop(name, None) is None:
+            return
+
+        length = len(name)
+        for gram in self._name_grams.pop(name):
+            by_length = self._postings[gram]
+            by_length[length].discard(name)
+            if not by_length[length]:
+                del by_length[length]
+            if not by_length:
+                del self._postings[gram]
+
+            self._gram_counts[gram] -= 1
+            if not self._gram_counts[gram]:
+                del self._gram_counts[gram]
+
+    def sync(self, names):
+        """与数据库同步（增删变化的名称，保留数据库顺序用于同分排序）"""
+        names = list(names)
+        new_names = set(names)
+
+        for name in [n for n in self._order if n not in new_names]:
+            self.remove(name)
+
+        for name in names:
+            self.add(name)
+
+        # 同分时按数据库顺序优先
+        self._order = {name: i for i, name in enumerate(names)}
+        self._next_order = len(names)
+
+    # ============ 查询 ============
+
+    def _effective_distance(self, length, max_distance):
+        """
+        结合最低相似度，算出该长度文本实际允许的编辑距离
+
+        distance <= (1 - s) * max(len_a, len_b) 且 max(len_a, len_b) <= len_a + distance
+        => distance <= (1 - s) * len_a / s
+        """
+        if self.min_similarity <= 0:
+            return max_distance
+
+        limit = int((1 - self.min_similarity) * length / self.min_similarity + 1e-9)
+        return min(max_distance, limit)
+
+    def search(self, text, max_distance=None, limit=5):
+        """
+        查找相近的物品名称
+
+        返回 [(name, distance, similarity), ...]，按距离、数据库顺序排序
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+
+        length = len(text)
+        k = self._effective_distance(length, max_distance)
+        if k <= 0 or not text:
+            return []
+
+        grams = self._grams(text)
+
+        # q-gram 引理：编辑距离 <= k 的两个字符串至少共享 len(grams) - k*Q 个二元组
+        threshold = len(grams) - k * self.Q
+        if threshold <= 0:
+            return []
+
+        # 前缀过滤：任意 len(grams) - threshold + 1 个二元组中至少有一个是共享的，
+        # 选出现次数最少的那几个来生成候选
+        prefix_size = len(grams) - threshold + 1
+        rare_grams = sorted(grams, key=lambda g: self._gram_counts.get(g, 0))[:prefix_size]
+
+        candidates = set()
+        for gram in rare_grams:
+            by_length = self._postings.get(gram)
+            if not by_length:
+                continue
+            for candidate_length in range(length - k, length + k + 1):
+                names = by_length.get(candidate_length)
+                if names:
+                    candidates.update(names)
+
+        # 计数过滤：按集合计数时，查询文本中重复的二元组可能少算，阈值相应放宽
+        gram_set = frozenset(grams)
+        set_threshold = threshold - (len(grams) - len(gram_set))
+        name_grams = self._name_grams
+
+        matches = []
+        for name in candidates:
+            if len(gram_set & name_grams[name]) < set_threshold:
+                continue
+
+            distance = bounded_edit_distance(text, name, k)
+            if distance is None:
+                continue
+
+            similarity = 1 - distance / max(length, len(name))
+            if similarity < self.min_similarity:
+                continue
+
+            matches.append((name, distance, similarity))
+
+        matches.sort(key=lambda m: (m[1], -m[2], self._order[m[0]]))
+        return matches[:limit]
+
+    def match(self, text, max_distance=None):
+        """
+        返回最相近的物品名称
+
+        返回 (name, similarity)，没有足够相近的返回 None
+        """
+        matches = self.search(text, max_distance, limit=1)
+        if not matches:
+            return None
+
+        name, _, similarity = matches[0]
+        return name, similarity
+
+
+def benchmark(item_count=50000, query_count=20000):
+    """模糊匹配性能测试（随机生成物品名称，模拟OCR错字）"""
+    rng = random.Random(0)
+    # 常用汉字 + 型号字符
+    alphabet = [chr(c) for c in range(0x4e00, 0x4e00 + 800)] + list("ABCDEFGHKMQRSVX0123456789-")
+
+    names = list(dict.fromkeys(
+        ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 10)))
+        for _ in range(item_count)
+    ))
+
+    start = time.perf_counter()
+    matcher = FuzzyMatcher(names)
+    build_time = time.perf_counter() - start
+
+    queries = []
+    for _ in range(query_count):
+        name = list(rng.choice(names))
+        name[rng.randrange(len(name))] = rng.choice(alphabet)
+        queries.append(''.join(name))
+
+    start = time.perf_counter()
+    found = sum(1 for q in queries if matcher.match(q) is not None)
+    query_time = time.perf_counter() - start
+
+    print(f"物品数：{len(names)}  建索引：{build_time:.2f} 秒")
+    print(f"查询数：{len(queries)}  匹配上：{found}")
+    print(f"平均每次查询：{query_time / len(queries) * 1e6:.1f} 微秒")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,210 @@
+"""
+物品图标识别（代替OCR识别开箱/背包格子里的物品）
+- 所有物品图标预先堆叠成一个 NumPy 模板矩阵
+- 把格子切出来，多尺度缩放后与模板做归一化互相关
+- 全部格子 × 全部尺度 × 全部模板 一次矩阵乘法算完，毫秒级
+
+图标来源：data/icon_status.json 中列出的 recognition/models/templates/*.png
+（由 ItemDataScraper.create_icon_placeholders 生成清单，截图提取图标后放入）
+"""
+
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+ICON_STATUS_FILE = "data/icon_status.json"
+TEMPLATES_DIR = "recognition/models/templates"
+
+# 格子布局：分辨率 -> 网格（坐标为相对比例），需要根据实际截图校准
+DEFAULT_GRIDS = {
+    (1920, 1080): {'x': 0.05, 'y': 0.20, 'cell_w': 0.040, 'cell_h': 0.071,
+                   'gap_x': 0.002, 'gap_y': 0.004, 'cols': 10, 'rows': 6},
+    (2560, 1440): {'x': 0.05, 'y': 0.20, 'cell_w': 0.040, 'cell_h': 0.071,
+                   'gap_x': 0.002, 'gap_y': 0.004, 'cols': 10, 'rows': 6},
+}
+
+
+def read_image(path, flags=cv2.IMREAD_COLOR):
+    """读取图片（支持中文路径）"""
+    try:
+        return cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), flags)
+    except Exception:
+        return None
+
+
+class IconRecognizer:
+    """
+    图标识别器
+
+    template_size: 模板统一缩放到的大小 (宽, 高)
+    scales: 在格子中心取多大比例的区域与模板比较（应对图标大小差异）
+    threshold: 最低相关系数，低于它认为是空格子或未知物品
+    """
+
+    def __init__(self, template_size=(40, 40), scales=(0.8, 0.9, 1.0),
+                 threshold=0.75, grids=None,
+                 icon_status_file=ICON_STATUS_FILE, templates_dir=TEMPLATES_DIR):
+        self.template_size = template_size
+        self.scales = scales
+        self.threshold = threshold
+        self.grids = grids if grids is not None else dict(DEFAULT_GRIDS)
+        self.icon_status_file = icon_status_file
+        self.templates_dir = templates_dir
+
+        self.names = []
+        self.bank = np.zeros((0, template_size[0] * template_size[1]), dtype=np.float32)
+
+        self.load_templates()
+
+    def __len__(self):
+        return len(self.names)
+
+    # ============ 模板库 ============
+
+    def _normalize(self, patches):
+        """
+        把图像块展平成零均值、单位长度的向量
+
+        两个这样的向量点积就是归一化互相关系数
+        """
+        vectors = patches.reshape(len(patches), -1).astype(np.float32)
+        vectors -= vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _to_patch(self, img):
+        """转灰度并缩放到模板大小"""
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(img, self.template_size, interpolation=cv2.INTER_AREA)
+
+    def load_templates(self):
+        """从图标清单和模板目录加载所有图标"""
+        icons = {}
+
+        if Path(self.icon_status_file).exists():
+            with open(self.icon_status_file, 'r', encoding='utf-8') as f:
+                for icon in json.load(f).get('required_icons', []):
+                    if Path(icon['icon_path']).exists():
+                        icons[icon['item_name']] = icon['icon_path']
+
+        # 模板目录里直接以物品名命名的图标
+        templates_dir = Path(self.templates_dir)
+        if templates_dir.exists():
+            listed = {Path(p).resolve() for p in icons.values()}
+            for path in sorted(templates_dir.glob("*.png")):
+                if path.resolve() not in listed:
+                    icons.setdefault(path.stem, str(path))
+
+        names = []
+        patches = []
+        for name, path in icons.items():
+            img = read_image(path, cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                continue
+            names.append(name)
+            patches.append(self._to_patch(img))
+
+        self.names = names
+        if patches:
+            self.bank = self._normalize(np.stack(patches))
+
+        return len(names)
+
+    def add_template(self, name, icon_img, save=True):
+        """
+        添加一个图标模板
+
+        save: 同时保存到模板目录（文件名为物品名）
+        """
+        if save:
+            Path(self.templates_dir).mkdir(parents=True, exist_ok=True)
+            path = Path(self.templates_dir) / f"{name}.png"
+            cv2.imencode('.png', icon_img)[1].tofile(str(path))
+
+        vector = self._normalize(self._to_patch(icon_img)[None])
+
+        if name in self.names:
+            self.bank[self.names.index(name)] = vector[0]
+        else:
+            self.names.append(name)
+            self.bank = np.vstack([self.bank, vector])
+
+    # ============ 格子识别 ============
+
+    def grid_cells(self, img, grid=None):
+        """按网格配置切出所有格子 [(x, y, w, h), ...]，没有该分辨率配置返回 None"""
+        height, width = img.shape[:2]
+        grid = grid or self.grids.get((width, height))
+        if grid is None:
+            return None
+
+        cell_w = int(grid['cell_w'] * width)
+        cell_h = int(grid['cell_h'] * height)
+        step_x = cell_w + int(grid.get('gap_x', 0) * width)
+        step_y = cell_h + int(grid.get('gap_y', 0) * height)
+        x0 = int(grid['x'] * width)
+        y0 = int(grid['y'] * height)
+
+        cells = []
+        for row in range(grid['rows']):
+            for col in range(grid['cols']):
+                x, y = x0 + col * step_x, y0 + row * step_y
+                if x + cell_w <= width and y + cell_h <= height:
+                    cells.append((x, y, cell_w, cell_h))
+        return cells
+
+    def _cell_patches(self, gray, cells):
+        """每个格子按各个尺度取中心区域，缩放成模板大小"""
+        patches = []
+        for x, y, w, h in cells:
+            for scale in self.scales:
+                cw, ch = max(1, int(w * scale)), max(1, int(h * scale))
+                cx, cy = x + (w - cw) // 2, y + (h - ch) // 2
+                patches.append(self._to_patch(gray[cy:cy + ch, cx:cx + cw]))
+        return np.stack(patches)
+
+    def recognize_cells(self, img, cells):
+        """
+        识别格子中的物品
+
+        返回 [{'cell': (x, y, w, h), 'name': ..., 'score': ...}, ...]（只含识别成功的格子）
+        """
+        if not cells or not self.names:
+            return []
+
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+        vectors = self._normalize(self._cell_patches(gray, cells))
+
+        # (格子×尺度, 模板) 的相关系数矩阵，一次算完
+        scores = vectors @ self.bank.T
+        scores = scores.reshape(len(cells), len(self.scales), len(self.names)).max(axis=1)
+
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(cells)), best]
+
+        results = []
+        for cell, index, score in zip(cells, best, best_scores):
+            if score >= self.threshold:
+                results.append({'cell': cell, 'name': self.names[index], 'score': float(score)})
+        return results
+
+    def recognize(self, img, grid=None):
+        """
+        识别整张截图中网格里的物品
+
+        没有该分辨率的网格配置或没有模板时返回 None（调用方应退回OCR）
+        """
+        if not self.names:
+            return None
+
+        cells = self.grid_cells(img, grid)
+        if cells is None:
+            return None
+
+        return self.recognize_cells(img, cells)
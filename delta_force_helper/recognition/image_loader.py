@@ -0,0 +1,187 @@
+"""
+截图预读取与流式处理
+- 小线程池提前读取、解码后面的 N 张截图（内存占用固定）
+- 识别线程按顺序取图，读盘/解码和OCR同时进行
+- 下游不需要原分辨率时，可以在解码时直接缩小（IMREAD_REDUCED_*，解码更快、更省内存）
+- 记录队列深度和等待时间，判断瓶颈在读取还是识别
+- 支持中途取消，随时可以查询剩余数量
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+# 解码时缩小的倍数 -> imdecode 参数
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def read_image(path, reduction=1):
+    """读取图片（支持中文路径），reduction 为解码时缩小的倍数，失败返回 None"""
+    try:
+        img_array = np.fromfile(str(path), dtype=np.uint8)
+        return cv2.imdecode(img_array, REDUCED_FLAGS[reduction])
+    except Exception:
+        return None
+
+
+class PrefetchLoader:
+    """
+    预读取器
+
+    paths: 要读取的文件列表
+    prefetch: 最多提前读取多少张（已解码和正在解码的合计）
+    workers: 读取线程数
+    read: 读取函数 read(path) -> 图片；不传时用 read_image
+    reduction: 解码时缩小的倍数（1/2/4/8，只在不传 read 时有效）
+    """
+
+    def __init__(self, paths, prefetch=4, workers=2, read=None, reduction=1):
+        if reduction not in REDUCED_FLAGS:
+            raise ValueError(f"不支持的缩小倍数：{reduction}（可选：1/2/4/8）")
+
+        self.paths = list(paths)
+        self.prefetch = max(1, prefetch)
+        self.workers = max(1, workers)
+        self.reduction = reduction
+        self.read = read or (lambda path: read_image(path, reduction))
+
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+        # 统计
+        self.loaded = 0
+        self.read_time = 0.0
+        self.wait_time = 0.0
+        self.empty_waits = 0
+        self._depth_total = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _timed_read(self, path):
+        start = time.perf_counter()
+        img = self.read(path)
+        with self._lock:
+            self.read_time += time.perf_counter() - start
+        return img
+
+    def __iter__(self):
+        """按顺序返回 (路径, 图片)，读取失败的图片为 None"""
+        pending = deque()
+        remaining = iter(self.paths)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers,
+                                      thread_name_prefix="prefetch")
+
+        def submit_next():
+            path = next(remaining, None)
+            if path is not None:
+                pending.append((path, executor.submit(self._timed_read, path)))
+
+        try:
+            for _ in range(self.prefetch):
+                submit_next()
+
+            while pending and not self._cancelled:
+                # 队列深度：已经解码好、等着被取走的图片数
+                depth = sum(1 for _, future in pending if future.done())
+                self._depth_total += depth
+                self.max_depth = max(self.max_depth, depth)
+
+                path, future = pending.popleft()
+                if not future.done():
+                    self.empty_waits += 1
+
+                start = time.perf_counter()
+                img = future.result()
+                self.wait_time += time.perf_counter() - start
+                self.loaded += 1
+
+                submit_next()
+                yield path, img
+        finally:
+            # 调用方提前结束遍历或取消时，丢弃还没开始的读取
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def cancel(self):
+        """取消读取"""
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def get_stats(self):
+        """
+        预读取统计
+
+        avg_depth 接近 prefetch：读取比识别快（瓶颈在识别）
+        empty_waits 很多：识别在等读取（可以增加 workers 或用 reduction）
+        """
+        return {
+            'loaded': self.loaded,
+            'prefetch': self.prefetch,
+            'workers': self.workers,
+            'reduction': self.reduction,
+            'avg_depth': round(self._depth_total / self.loaded, 2) if self.loaded else 0.0,
+            'max_depth': self.max_depth,
+            'empty_waits': self.empty_waits,
+            'wait_time': round(self.wait_time, 3),
+            'read_time': round(self.read_time, 3),
+        }
+
+
+class ResultStream:
+    """
+    流式处理结果
+
+    for path, result in stream: ...   # 每处理完一张就返回一张
+    stream.remaining                  # 还剩多少张
+    stream.cancel()                   # 可以在其他线程调用
+    """
+
+    def __init__(self, loader, process):
+        self.loader = loader
+        self.process = process
+
+        self.total = len(loader)
+        self.processed = 0
+
+    @property
+    def remaining(self):
+        """剩余未处理的数量"""
+        return self.total - self.processed
+
+    @property
+    def cancelled(self):
+        return self.loader.cancelled
+
+    def cancel(self):
+        """取消处理（当前这张处理完后停止）"""
+        self.loader.cancel()
+
+    def get_stats(self):
+        """预读取统计（见 PrefetchLoader.get_stats）"""
+        return self.loader.get_stats()
+
+    def __iter__(self):
+        for path, img in self.loader:
+            result = self.process(path, img)
+            self.processed += 1
+            yield path, result
+
+            if self.loader.cancelled:
+                break
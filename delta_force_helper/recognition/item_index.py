@@ -0,0 +1,235 @@
+"""
+物品名称索引（加速 match_item 的包含匹配）
+- Aho-Corasick 自动机：一次扫描找出文本中包含的所有物品名
+- 子串索引：直接查出包含该文本的物品名
+- 数据库变化时增量更新
+
+匹配结果与原来的线性扫描完全一致：
+在所有满足 item_name in text 或 text in item_name 的物品中，
+返回在数据库中排在最前面的那一个。
+"""
+
+
+class ItemNameIndex:
+    """
+    物品名称索引
+
+    names: 物品名称（按数据库顺序），通常直接传 items_db
+    """
+
+    def __init__(self, names=()):
+        self._reset()
+        self.sync(names)
+
+    def _reset(self):
+        """清空索引"""
+        # 名称 -> 顺序号（越小越靠前）
+        self._order = {}
+        self._names_by_order = {}
+        self._next_order = 0
+
+        # Aho-Corasick 自动机（节点用列表下标表示）
+        self._goto = [{}]
+        self._outputs = [set()]   # 在该节点结束的名称顺序号
+        self._fail = [0]
+        self._output_link = [-1]  # 沿失败链最近的有输出的节点
+        self._links_dirty = False
+
+        # 子串索引：子串 -> 包含它的名称顺序号集合，以及其中的最小值
+        self._substrings = {}
+        self._substring_min = {}
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, name):
+        return name in self._order
+
+    def names(self):
+        """按顺序返回所有名称"""
+        return sorted(self._order, key=self._order.get)
+
+    # ============ 增量维护 ============
+
+    def add(self, name):
+        """添加物品名称（排在所有已有名称之后）"""
+        if not name or name in self._order:
+            return
+
+        order = self._next_order
+        self._next_order += 1
+        self._order[name] = order
+        self._names_by_order[order] = name
+
+        # 插入字典树
+        node = 0
+        for ch in name:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._outputs.append(set())
+                self._fail.append(0)
+                self._output_link.append(-1)
+            node = next_node
+        self._outputs[node].add(order)
+        self._links_dirty = True
+
+        # 新名称顺序号最大，不会改变已有子串的最小值
+        for sub in self._iter_substrings(name):
+            orders = self._substrings.get(sub)
+            if orders is None:
+                self._substrings[sub] = {order}
+                self._substring_min[sub] = order
+            else:
+                orders.add(order)
+
+    def remove(self, name):
+        """删除物品名称"""
+        order = self._order.pop(name, None)
+        if order is None:
+            return
+        del self._names_by_order[order]
+
+        # 字典树节点保留，只去掉输出
+        node = 0
+        for ch in name:
+            node = self._goto[node][ch]
+        self._outputs[node].discard(order)
+        self._links_dirty = True
+
+        for sub in self._iter_substrings(name):
+            orders = self._substrings[sub]
+            orders.discard(order)
+            if not orders:
+                del self._substrings[sub]
+                del self._substring_min[sub]
+            elif self._substring_min[sub] == order:
+                self._substring_min[sub] = min(orders)
+
+    def sync(self, names):
+        """
+        与数据库同步
+
+        只新增或删除了物品时增量更新；顺序发生变化时整体重建
+        """
+        names = list(names)
+        new_names = set(names)
+
+        kept = [name for name in self.names() if name in new_names]
+        added = [name for name in names if name not in self._order]
+
+        if names != kept + added:
+            self.rebuild(names)
+            return
+
+        for name in list(self._order):
+            if name not in new_names:
+                self.remove(name)
+
+        for name in added:
+            self.add(name)
+
+    def rebuild(self, names):
+        """整体重建索引"""
+        self._reset()
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def _iter_substrings(name):
+        """名称的所有不重复子串"""
+        seen = set()
+        length = len(name)
+        for i in range(length):
+            for j in range(i + 1, length + 1):
+                sub = name[i:j]
+                if sub not in seen:
+                    seen.add(sub)
+                    yield sub
+
+    def _build_links(self):
+        """广度优先计算失败链接和输出链接"""
+        queue = []
+
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            self._output_link[node] = -1
+            queue.append(node)
+
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+
+                self._fail[child] = fail
+                self._output_link[child] = fail if self._outputs[fail] else self._output_link[fail]
+                queue.append(child)
+
+        self._links_dirty = False
+
+    # ============ 查询 ============
+
+    def find_contained(self, text):
+        """文本中包含的物品名里，顺序号最小的那个（没有返回 None）"""
+        if self._links_dirty:
+            self._build_links()
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        output_link = self._output_link
+
+        best = None
+        node = 0
+
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            match = node if outputs[node] else output_link[node]
+            while match > 0:
+                order = min(outputs[match])
+                if best is None or order < best:
+                    best = order
+                match = output_link[match]
+
+        return None if best is None else self._names_by_order[best]
+
+    def find_containing(self, text):
+        """包含该文本的物品名里，顺序号最小的那个（没有返回 None）"""
+        if not text:
+            return self._first_name()
+
+        order = self._substring_min.get(text)
+        return None if order is None else self._names_by_order[order]
+
+    def match(self, text):
+        """
+        包含匹配：item_name in text 或 text in item_name
+
+        返回数据库中排在最前面的匹配名称，与线性扫描结果一致
+        """
+        contained = self.find_contained(text)
+        containing = self.find_containing(text)
+
+        if contained is None:
+            return containing
+        if containing is None:
+            return contained
+
+        return min(contained, containing, key=self._order.get)
+
+    def _first_name(self):
+        """顺序号最小的名称"""
+        if not self._order:
+            return None
+        return self._names_by_order[min(self._names_by_order)]
@@ -0,0 +1,242 @@
+"""
+OCR结果缓存
+- 按图片内容哈希 + OCR配置作为键，同一张图不再重复识别
+  （传入的是文件路径时直接哈希文件字节，命中时不用解码图片）
+- 持久化到本地 SQLite 文件，重新分析同一文件夹时直接命中
+- 超过容量上限时按最近使用时间（LRU）淘汰
+- CachedReader：每个调用方各自包装共享OCR引擎，开关缓存和命中统计互不影响
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_CACHE_FILE = "data/cache/ocr_cache.db"
+
+# 缓存格式版本，结果结构变化时修改它让旧缓存失效
+CACHE_VERSION = 1
+
+
+def _to_builtin(obj):
+    """把 numpy 数值转换成 JSON 可序列化的 Python 类型"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"无法序列化类型：{type(obj)}")
+
+
+class OCRCache:
+    """
+    OCR结果缓存
+
+    存储 readtext 的原始结果 [(bbox, text, confidence), ...]
+    """
+
+    def __init__(self, cache_file=DEFAULT_CACHE_FILE, max_size_mb=256):
+        self.cache_file = cache_file
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(cache_file, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                key TEXT PRIMARY KEY,
+                results TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON ocr_cache(last_access)"
+        )
+        self._conn.commit()
+
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM ocr_cache"
+        ).fetchone()[0]
+
+    def make_key(self, img, config):
+        """
+        生成缓存键
+
+        img: 解码后的图片数组（裁剪区域也可以）、图片文件路径或文件字节
+        config: OCR配置（语言、readtext参数等），必须可JSON序列化
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(str(CACHE_VERSION).encode())
+        h.update(json.dumps(config, sort_keys=True, default=_to_builtin).encode('utf-8'))
+
+        # 文件：哈希原始字节（与解码后的数组不会得到同一个键）
+        if isinstance(img, (str, Path)):
+            with open(img, 'rb') as f:
+                img = f.read()
+        if isinstance(img, (bytes, bytearray)):
+            h.update(b'file')
+            h.update(img)
+            return h.hexdigest()
+
+        h.update(str(img.shape).encode())
+        h.update(str(img.dtype).encode())
+        h.update(memoryview(img).cast('B') if img.flags['C_CONTIGUOUS'] else img.tobytes())
+        return h.hexdigest()
+
+    def get(self, key):
+        """读取缓存，未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results FROM ocr_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE ocr_cache SET last_access = ? WHERE key = ?",
+                (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return [(bbox, text, confidence) for bbox, text, confidence in json.loads(row[0])]
+
+    def put(self, key, results):
+        """写入缓存"""
+        data = json.dumps(
+            [(bbox, text, confidence) for bbox, text, confidence in results],
+            ensure_ascii=False, default=_to_builtin
+        )
+        size = len(data.encode('utf-8'))
+
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM ocr_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, results, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, data, size, time.time())
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+            self._conn.commit()
+
+    def _evict(self):
+        """淘汰最久未使用的条目，直到容量降到上限的90%"""
+        target = self.max_bytes * 0.9
+
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM ocr_cache ORDER BY last_access LIMIT 100"
+            ).fetchall()
+
+            if not rows:
+                self._total_bytes = 0
+                break
+
+            for key, size in rows:
+                self._conn.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+                if self._total_bytes <= target:
+                    break
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_cache")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def get_stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+
+        lookups = self.hits + self.misses
+
+        return {
+            'entries': entries,
+            'size_mb': self._total_bytes / (1024 * 1024),
+            'max_size_mb': self.max_bytes / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedReader:
+    """
+    带结果缓存的 reader（与 easyocr.Reader 一样的 readtext 接口）
+
+    共享OCR引擎本身不带缓存，每个调用方各自包装一层：
+    一个工具关闭缓存不会影响另一个，hits / misses 也只统计这个调用方
+    """
+
+    def __init__(self, reader, cache):
+        self.reader = reader
+        self.cache = cache
+        self.languages = list(getattr(reader, 'languages', ()))
+
+        self.hits = 0
+        self.misses = 0
+
+    def readtext(self, img, **kwargs):
+        key = self.cache.make_key(img, {
+            'languages': self.languages,
+            'readtext': kwargs
+        })
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        results = self.reader.readtext(img, **kwargs)
+        self.cache.put(key, results)
+        return results
+
+
+def cached_reader(reader, use_cache=True, cache_file=DEFAULT_CACHE_FILE):
+    """按配置给 reader 加上结果缓存（use_cache 为 False 时原样返回）"""
+    return CachedReader(reader, get_ocr_cache(cache_file)) if use_cache else reader
+
+
+# 进程级共享实例（按文件路径区分）
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_ocr_cache(cache_file=DEFAULT_CACHE_FILE):
+    """获取共享OCR缓存，同一文件在同一进程内只打开一次"""
+    with _caches_lock:
+        cache = _caches.get(cache_file)
+        if cache is None:
+            cache = OCRCache(cache_file)
+            _caches[cache_file] = cache
+
+    return cache
@@ -0,0 +1,151 @@
+"""
+共享OCR引擎
+- 整个进程只加载一份 easyocr 模型（截图分析、价格追踪共用）
+- 延迟加载：第一次识别时才初始化
+- 线程安全，并记录加载耗时和内存占用
+- 结果缓存由各调用方自己包装（见 recognition.ocr_cache.CachedReader），互不影响
+"""
+
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from recognition.profiler import profiled, profile_stage
+
+
+DEFAULT_LANGUAGES = ('ch_sim', 'en')
+
+
+def get_process_memory_mb():
+    """获取当前进程内存占用（MB），无法获取时返回 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    if resource is not None:
+        # Linux 下 ru_maxrss 单位是 KB（峰值内存，作为近似值）
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+class OCREngine:
+    """
+    OCR引擎包装
+
+    对外提供与 easyocr.Reader 相同的 readtext 接口，
+    可以直接替换原来的 self.ocr_reader
+    """
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, gpu=False):
+        self.languages = list(languages)
+        self.gpu = gpu
+
+        self._reader = None
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+        # 加载统计
+        self.load_time = None
+        self.memory_mb = None
+        self.warmed_up = False
+
+    @property
+    def is_loaded(self):
+        """模型是否已加载"""
+        return self._reader is not None
+
+    @property
+    def reader(self):
+        """获取底层 easyocr.Reader（首次访问时加载）"""
+        if self._reader is None:
+            self.load()
+        return self._reader
+
+    def load(self):
+        """加载OCR模型（多线程同时调用时只会加载一次）"""
+        with self._load_lock:
+            if self._reader is not None:
+                return self._reader
+
+            print("   加载OCR引擎...")
+            import easyocr
+
+            memory_before = get_process_memory_mb()
+            start = time.perf_counter()
+
+            self._reader = easyocr.Reader(self.languages, gpu=self.gpu)
+
+            self.load_time = time.perf_counter() - start
+            memory_after = get_process_memory_mb()
+            if memory_before is not None and memory_after is not None:
+                self.memory_mb = memory_after - memory_before
+
+            print(f"   ✅ OCR引擎加载完成（耗时 {self.load_time:.1f} 秒"
+                  f"{f'，内存 +{self.memory_mb:.0f} MB' if self.memory_mb is not None else ''}）")
+
+            return self._reader
+
+    def warm_up(self):
+        """
+        预热：加载模型并跑一次空白图片识别
+
+        第一次推理会有额外的初始化开销，预热后正式识别更快
+        """
+        reader = self.reader
+
+        with self._infer_lock:
+            if self.warmed_up:
+                return
+
+            import numpy as np
+            blank = np.full((32, 128, 3), 255, dtype=np.uint8)
+            reader.readtext(blank)
+            self.warmed_up = True
+
+    @profiled('readtext')
+    def readtext(self, img, **kwargs):
+        """识别文字，参数与 easyocr.Reader.readtext 相同"""
+        reader = self.reader
+
+        with self._infer_lock, profile_stage('readtext.infer'):
+            return reader.readtext(img, **kwargs)
+
+    def get_stats(self):
+        """获取引擎状态"""
+        return {
+            'languages': self.languages,
+            'gpu': self.gpu,
+            'loaded': self.is_loaded,
+            'warmed_up': self.warmed_up,
+            'load_time': self.load_time,
+            'memory_mb': self.memory_mb
+        }
+
+
+# 进程级共享实例（按语言和GPU配置区分）
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_ocr_engine(languages=DEFAULT_LANGUAGES, gpu=False):
+    """
+    获取共享OCR引擎
+
+    相同配置在同一进程内总是返回同一个实例，模型只加载一次
+    """
+    key = (tuple(languages), gpu)
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = OCREngine(languages, gpu)
+            _engines[key] = engine
+
+    return engine
@@ -0,0 +1,243 @@
+"""
+OCR前图片预处理流水线
+- 声明式配置：步骤列表，如 [{"op": "downscale", "factor": 0.5}, {"op": "grayscale"}]
+- 支持：裁剪、缩小、灰度、对比度归一化、二值化
+- OCR结果坐标自动换算回原图，下游逻辑不受影响
+
+预置方案见 PRESET_CHAINS，也可以在 data/preprocess_chains.json 中自定义
+"""
+
+import json
+from pathlib import Path
+
+import cv2
+
+
+PREPROCESS_CHAINS_FILE = "data/preprocess_chains.json"
+
+PRESET_CHAINS = {
+    'none': [],
+    'gray': [
+        {'op': 'grayscale'},
+    ],
+    'gray_clahe': [
+        {'op': 'grayscale'},
+        {'op': 'normalize', 'method': 'clahe'},
+    ],
+    'half_gray': [
+        {'op': 'downscale', 'factor': 0.5},
+        {'op': 'grayscale'},
+    ],
+    'binary': [
+        {'op': 'grayscale'},
+        {'op': 'normalize', 'method': 'minmax'},
+        {'op': 'binarize', 'method': 'otsu'},
+    ],
+    'half_binary': [
+        {'op': 'downscale', 'factor': 0.5},
+        {'op': 'grayscale'},
+        {'op': 'binarize', 'method': 'otsu'},
+    ],
+}
+
+
+# ============ 预处理步骤 ============
+# 每个步骤返回 (新图片, 坐标变换)，坐标变换为 (缩放, x偏移, y偏移)：
+# 上一步图片坐标 = 新图片坐标 * 缩放 + 偏移
+
+def _crop(img, box):
+    """按相对比例裁剪 box = (x, y, w, h)"""
+    height, width = img.shape[:2]
+    fx, fy, fw, fh = box
+    x0, y0 = int(fx * width), int(fy * height)
+    x1, y1 = min(width, x0 + int(fw * width)), min(height, y0 + int(fh * height))
+    return img[y0:y1, x0:x1], (1.0, x0, y0)
+
+
+def _downscale(img, factor=0.5):
+    """按比例缩小（factor < 1）"""
+    if factor >= 1.0:
+        return img, (1.0, 0, 0)
+    resized = cv2.resize(img, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    return resized, (1.0 / factor, 0, 0)
+
+
+def _grayscale(img):
+    """转灰度"""
+    if img.ndim == 2:
+        return img, (1.0, 0, 0)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), (1.0, 0, 0)
+
+
+def _normalize(img, method='clahe', clip_limit=2.0, tile=8):
+    """对比度归一化：minmax 拉伸 或 CLAHE 自适应直方图均衡"""
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    if method == 'minmax':
+        result = cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
+    elif method == 'clahe':
+        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile, tile))
+        result = clahe.apply(gray)
+    else:
+        raise ValueError(f"未知的归一化方法：{method}")
+
+    return result, (1.0, 0, 0)
+
+
+def _binarize(img, method='otsu', block_size=31, c=10, invert=False):
+    """二值化：otsu 全局阈值 或 adaptive 自适应阈值"""
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    flag = cv2.THRESH_BINARY_INV if invert else cv2.THRESH_BINARY
+
+    if method == 'otsu':
+        _, result = cv2.threshold(gray, 0, 255, flag | cv2.THRESH_OTSU)
+    elif method == 'adaptive':
+        result = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                       flag, block_size, c)
+    else:
+        raise ValueError(f"未知的二值化方法：{method}")
+
+    return result, (1.0, 0, 0)
+
+
+STEPS = {
+    'crop': _crop,
+    'downscale': _downscale,
+    'grayscale': _grayscale,
+    'normalize': _normalize,
+    'binarize': _binarize,
+}
+
+
+class PreprocessChain:
+    """
+    预处理流水线
+
+    steps: [{'op': 步骤名, 其他参数...}, ...]
+    """
+
+    def __init__(self, steps=(), name='custom'):
+        self.name = name
+        self.steps = [dict(step) for step in steps]
+
+        for step in self.steps:
+            if step.get('op') not in STEPS:
+                raise ValueError(f"未知的预处理步骤：{step.get('op')}")
+
+    def __bool__(self):
+        return bool(self.steps)
+
+    def __repr__(self):
+        return f"PreprocessChain({self.name!r}, {self.steps!r})"
+
+    def apply(self, img):
+        """
+        执行预处理
+
+        返回 (处理后图片, (缩放, x偏移, y偏移))：原图坐标 = 处理后坐标 * 缩放 + 偏移
+        """
+        scale, ox, oy = 1.0, 0.0, 0.0
+
+        for step in self.steps:
+            params = {k: v for k, v in step.items() if k != 'op'}
+            img, (s, dx, dy) = STEPS[step['op']](img, **params)
+
+            # 组合坐标变换
+            ox += dx * scale
+            oy += dy * scale
+            scale *= s
+
+        return img, (scale, ox, oy)
+
+    def decode_reduction(self):
+        """
+        解码时可以直接缩小的倍数（1/2/4/8）
+
+        只有第一步就是 downscale 时，才能把它提前到解码（IMREAD_REDUCED_*）
+        """
+        if not self.steps or self.steps[0]['op'] != 'downscale':
+            return 1
+
+        factor = self.steps[0].get('factor', 0.5)
+        for reduction in (8, 4, 2):
+            if factor * reduction <= 1.0:
+                return reduction
+        return 1
+
+    def after_reduction(self, reduction):
+        """解码时已经缩小 reduction 倍之后，剩下的预处理"""
+        if reduction == 1:
+            return self
+
+        first = dict(self.steps[0])
+        first['factor'] = first.get('factor', 0.5) * reduction
+        steps = ([first] if first['factor'] < 1.0 else []) + self.steps[1:]
+        return PreprocessChain(steps, f"{self.name}@1/{reduction}")
+
+    @staticmethod
+    def map_results(results, transform):
+        """把OCR结果坐标换算回原图"""
+        scale, ox, oy = transform
+        if scale == 1.0 and ox == 0 and oy == 0:
+            return results
+
+        return [
+            ([[x * scale + ox, y * scale + oy] for x, y in bbox], text, confidence)
+            for bbox, text, confidence in results
+        ]
+
+    def readtext(self, reader, img, **kwargs):
+        """预处理后OCR，结果坐标为原图坐标"""
+        processed, transform = self.apply(img)
+        return self.map_results(reader.readtext(processed, **kwargs), transform)
+
+    def wrap(self, reader):
+        """包装成带预处理的 reader（与 easyocr.Reader 一样的 readtext 接口）"""
+        return PreprocessedReader(reader, self)
+
+
+class PreprocessedReader:
+    """先预处理再识别的 reader，可以直接替换 ocr_reader 使用"""
+
+    def __init__(self, reader, chain):
+        self.reader = reader
+        self.chain = chain
+
+    def readtext(self, img, **kwargs):
+        return self.chain.readtext(self.reader, img, **kwargs)
+
+
+def load_chains(chains_file=PREPROCESS_CHAINS_FILE):
+    """加载所有预处理方案（预置 + 自定义文件）"""
+    chains = {name: PreprocessChain(steps, name) for name, steps in PRESET_CHAINS.items()}
+
+    if Path(chains_file).exists():
+        with open(chains_file, 'r', encoding='utf-8') as f:
+            for name, steps in json.load(f).items():
+                chains[name] = PreprocessChain(steps, name)
+
+    return chains
+
+
+def build_chain(spec):
+    """
+    根据配置创建预处理流水线
+
+    spec: None、方案名称、步骤列表 或 PreprocessChain
+    """
+    if spec is None or isinstance(spec, PreprocessChain):
+        return spec
+
+    if isinstance(spec, str):
+        chains = load_chains()
+        if spec not in chains:
+            raise ValueError(f"未知的预处理方案：{spec}（可选：{', '.join(chains)}）")
+        return chains[spec]
+
+    return PreprocessChain(spec)
+
+
+def wrap_reader(reader, spec):
+    """按配置给 reader 加上预处理（spec 为空时原样返回）"""
+    chain = build_chain(spec)
+    return chain.wrap(reader) if chain else reader
@@ -0,0 +1,268 @@
+"""
+物品名称与价格配对
+- 价格按 y 分桶（桶高 = 最大垂直距离），每个物品只看自己和上下相邻的桶
+- 桶内价格按 x 排好序，用二分查找直接取出物品右侧 max_dx 以内的价格
+- 配对代价与原来一样：dy * 3 + dx * 0.5（同一行、右侧优先）
+- 一个价格只能配给一个物品：先让每个物品取代价最小的价格，有价格被抢时
+  再解一次最小代价一一匹配（匈牙利算法，NumPy 向量化），先保证配上的数量最多，再让总代价最小
+
+原来每个物品各自找最近的价格，同一行有两个物品时会配到同一个价格上
+
+用法：python recognition/price_pairing.py [--rows 50] [--pages 200]
+生成密集的交易行页面，对比逐个找最近价格和一一配对的耗时与重复配对数
+"""
+
+import time
+
+import numpy as np
+
+
+MAX_DX = 800  # 价格最多在物品右侧多远（像素）
+MAX_DY = 50   # 价格与物品的最大垂直距离（像素）
+
+
+def linear_assignment(cost):
+    """
+    最小代价一一匹配（匈牙利算法，O(n²m)，内层循环用 NumPy 向量化）
+
+    先把每一行配给本行最小的列（列没被占用时），只有剩下的行才走增广路，
+    大多数行互不冲突时接近线性
+
+    cost: (n, m) 代价矩阵
+    返回 [(行, 列), ...]，行数和列数中较小的一方全部配上
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+
+    n, m = cost.shape
+    if n == 0:
+        return []
+
+    # 下标从 1 开始，第 0 列是虚拟列
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # 每一列配给了哪一行
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    # 初始解：u 取每行最小值（对偶可行），本行最小的列还空着就直接配上
+    u[1:] = cost.min(axis=1)
+    remaining = []
+    for row, col in enumerate(cost.argmin(axis=1).tolist(), start=1):
+        if owner[col + 1] == 0:
+            owner[col + 1] = row
+        else:
+            remaining.append(row)
+
+    for row in remaining:
+        owner[0] = row
+        col = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        # 从虚拟列出发找一条增广路
+        while True:
+            used[col] = True
+            current_row = owner[col]
+
+            free = np.flatnonzero(~used[1:]) + 1
+            reduced = cost[current_row - 1, free - 1] - u[current_row] - v[free]
+            better = reduced < min_reduced[free]
+            min_reduced[free[better]] = reduced[better]
+            way[free[better]] = col
+
+            next_col = free[np.argmin(min_reduced[free])]
+            delta = min_reduced[next_col]
+
+            used_cols = np.flatnonzero(used)
+            u[owner[used_cols]] += delta
+            v[used_cols] -= delta
+            min_reduced[free] -= delta
+
+            col = next_col
+            if owner[col] == 0:
+                break
+
+        # 沿增广路翻转匹配
+        while col:
+            previous = way[col]
+            owner[col] = owner[previous]
+            col = previous
+
+    pairs = [(int(owner[col]) - 1, col - 1) for col in range(1, m + 1) if owner[col]]
+    if transposed:
+        pairs = [(c, r) for r, c in pairs]
+    return sorted(pairs)
+
+
+class PricePairing:
+    """
+    物品/价格配对器
+
+    items / prices: [{'x': 中心x, 'y': 中心y, ...}, ...]（与 extract_items_and_prices 的候选格式相同）
+    """
+
+    def __init__(self, max_dx=MAX_DX, max_dy=MAX_DY, dy_weight=3.0, dx_weight=0.5):
+        self.max_dx = max_dx
+        self.max_dy = max_dy
+        self.dy_weight = dy_weight
+        self.dx_weight = dx_weight
+
+    def candidate_edges(self, items, prices):
+        """
+        所有满足距离限制的 (物品, 价格) 组合
+
+        价格按 (桶号, x) 排成一个有序键，每个物品对上、中、下三个桶各做一次二分查找，
+        取出右侧 max_dx 以内的一段；全部物品一起向量化计算
+
+        返回 (物品下标数组, 价格下标数组, 代价数组)
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        if not items or not prices:
+            return empty, empty, np.zeros(0)
+
+        item_x = np.array([it['x'] for it in items], dtype=np.float64)
+        item_y = np.array([it['y'] for it in items], dtype=np.float64)
+        price_x = np.array([p['x'] for p in prices], dtype=np.float64)
+        price_y = np.array([p['y'] for p in prices], dtype=np.float64)
+
+        # 键 = 桶号 * span + x，span 足够大，同一桶内的查找范围不会越到下一个桶
+        x_min = min(item_x.min(), price_x.min())
+        span = max(item_x.max(), price_x.max()) - x_min + self.max_dx + 1
+        price_rows = np.floor(price_y / self.max_dy)
+        keys = price_rows * span + (price_x - x_min)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+
+        item_rows = np.floor(item_y / self.max_dy)
+        neighbour_rows = (item_rows[:, None] + np.array([-1, 0, 1])).ravel()
+        starts = neighbour_rows * span + np.repeat(item_x - x_min, 3)
+
+        # 向右扫：x 在 [x, x + max_dx] 之间的价格
+        lo = np.searchsorted(keys, starts, side='left')
+        hi = np.searchsorted(keys, starts + self.max_dx, side='right')
+        counts = hi - lo
+        total = int(counts.sum())
+        if not total:
+            return empty, empty, np.zeros(0)
+
+        # 展开成边：每个查询区间 [lo, hi) 里的每个位置一条
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        item_index = np.repeat(np.arange(len(items)).repeat(3), counts)
+        price_index = order[np.repeat(lo, counts) + offsets]
+
+        dx = price_x[price_index] - item_x[item_index]
+        dy = np.abs(price_y[price_index] - item_y[item_index])
+        keep = dy <= self.max_dy
+
+        costs = dy[keep] * self.dy_weight + dx[keep] * self.dx_weight
+        return item_index[keep], price_index[keep], costs
+
+    def pair(self, items, prices):
+        """
+        一一配对
+
+        返回 [(物品下标, 价格下标, 代价), ...]，按物品下标排序；没有合适价格的物品不出现
+        """
+        item_index, price_index, costs = self.candidate_edges(items, prices)
+        if not len(costs):
+            return []
+
+        # 先让每个物品取自己代价最小的价格；没有价格被重复使用时这就是最优解（密集页面的常见情况）
+        order = np.lexsort((costs, item_index))
+        first = order[np.flatnonzero(np.diff(item_index[order], prepend=-1))]
+        best_prices = price_index[first]
+        if len(np.unique(best_prices)) == len(best_prices):
+            return [(int(i), int(p), float(c))
+                    for i, p, c in zip(item_index[first], best_prices, costs[first])]
+
+        # 有价格被重复使用：对涉及到的物品和价格解一次一一匹配
+        rows, row_of = np.unique(item_index, return_inverse=True)
+        cols, col_of = np.unique(price_index, return_inverse=True)
+
+        # 比任何一组可能的总代价都大：先保证配上的数量最多
+        infeasible = (self.max_dy * self.dy_weight + self.max_dx * self.dx_weight + 1) * (len(rows) + 1)
+        matrix = np.full((len(rows), len(cols)), infeasible)
+        # 同一对 (物品, 价格) 只有一条边，直接赋值
+        matrix[row_of, col_of] = costs
+
+        pairs = []
+        for r, c in linear_assignment(matrix):
+            if matrix[r, c] < infeasible:
+                pairs.append((int(rows[r]), int(cols[c]), float(matrix[r, c])))
+
+        return sorted(pairs)
+
+
+def nearest_price(item, prices, max_dx=MAX_DX, max_dy=MAX_DY):
+    """原来的做法：每个物品各自找代价最小的价格（价格可能被重复使用）"""
+    best, best_score = None, float('inf')
+    for price in prices:
+        dx = price['x'] - item['x']
+        dy = abs(price['y'] - item['y'])
+        if dx < 0 or dy > max_dy or dx > max_dx:
+            continue
+        score = dy * 3 + dx * 0.5
+        if score < best_score:
+            best, best_score = price, score
+    return best
+
+
+# ============ 测试 ============
+
+def make_page(rows=50, columns=2, seed=0):
+    """
+    生成一页密集的交易行：每行 columns 个物品，每个物品右侧一个价格，
+    坐标带少量抖动，偶尔缺价格
+    """
+    rng = np.random.default_rng(seed)
+    items, prices = [], []
+    for row in range(rows):
+        y = 120 + row * 36
+        for column in range(columns):
+            x = 100 + column * 600
+            items.append({'x': x + rng.normal(0, 3), 'y': y + rng.normal(0, 2)})
+            if rng.random() < 0.95:
+                prices.append({'x': x + 320 + rng.normal(0, 5), 'y': y + rng.normal(0, 2)})
+    return items, prices
+
+
+def benchmark(rows=50, pages=200):
+    """对比逐个找最近价格和一一配对"""
+    pairing = PricePairing()
+    page_list = [make_page(rows, seed=seed) for seed in range(pages)]
+
+    start = time.perf_counter()
+    duplicates = 0
+    for items, prices in page_list:
+        matched = [id(p) for p in (nearest_price(item, prices) for item in items) if p is not None]
+        duplicates += len(matched) - len(set(matched))
+    nearest_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    paired_duplicates = 0
+    paired = 0
+    for items, prices in page_list:
+        pairs = pairing.pair(items, prices)
+        used = [p for _, p, _ in pairs]
+        paired += len(pairs)
+        paired_duplicates += len(used) - len(set(used))
+    pairing_time = time.perf_counter() - start
+
+    item_count = sum(len(items) for items, _ in page_list)
+    print(f"📄 {pages} 页 × {rows} 行，共 {item_count} 个物品")
+    print(f"   逐个找最近价格：{nearest_time / pages * 1000:.2f} ms/页，重复配对 {duplicates} 次")
+    print(f"   一一配对：      {pairing_time / pages * 1000:.2f} ms/页，重复配对 {paired_duplicates} 次，"
+          f"配上 {paired} 个")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="物品/价格配对测试")
+    parser.add_argument('--rows', type=int, default=50, help="每页行数")
+    parser.add_argument('--pages', type=int, default=200, help="页数")
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.pages)
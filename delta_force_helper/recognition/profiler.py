@@ -0,0 +1,195 @@
+"""
+分阶段耗时统计（默认关闭）
+- 用 @profiled('阶段名') 标记要统计的函数，或用 with profile_stage('阶段名'):
+- 关闭时只多一次布尔判断，几乎没有开销
+- 开启后记录每个阶段的调用次数、总耗时、最短/最长耗时
+- 导出 JSON 汇总，以及 Chrome trace-event 文件（chrome://tracing 或 https://ui.perfetto.dev 打开）
+
+注意：阶段可以嵌套（如 is_market_interface 里调用 readtext），汇总中的耗时包含子阶段
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class StageProfiler:
+    """
+    阶段耗时统计器
+
+    max_events: 最多保留多少条 trace 事件（超过后只累计汇总，不再记录事件）
+    """
+
+    def __init__(self, enabled=False, max_events=200000):
+        self.enabled = enabled
+        self.max_events = max_events
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空已记录的数据"""
+        with self._lock:
+            self.stages = {}
+            self.events = []
+            self.dropped_events = 0
+            self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def add(self, name, start, duration):
+        """记录一次阶段耗时（start 为 perf_counter 时间）"""
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = {'count': 0, 'total': 0.0,
+                                             'min': duration, 'max': duration}
+            stage['count'] += 1
+            stage['total'] += duration
+            stage['min'] = min(stage['min'], duration)
+            stage['max'] = max(stage['max'], duration)
+
+            if len(self.events) < self.max_events:
+                self.events.append((name, start, duration, threading.get_ident()))
+            else:
+                self.dropped_events += 1
+
+    @contextmanager
+    def stage(self, name):
+        """统计一段代码的耗时"""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter() - start)
+
+    # ============ 导出 ============
+
+    def summary(self):
+        """各阶段汇总（按总耗时从高到低）"""
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in self.stages.items()}
+
+        result = {}
+        for name, stage in sorted(stages.items(), key=lambda kv: kv[1]['total'], reverse=True):
+            result[name] = {
+                'count': stage['count'],
+                'total_ms': round(stage['total'] * 1000, 3),
+                'avg_ms': round(stage['total'] / stage['count'] * 1000, 3),
+                'min_ms': round(stage['min'] * 1000, 3),
+                'max_ms': round(stage['max'] * 1000, 3),
+            }
+        return result
+
+    def trace_events(self):
+        """转换成 Chrome trace-event 格式（完整事件，单位微秒）"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            origin = self._origin
+
+        return [{
+            'name': name,
+            'cat': 'pipeline',
+            'ph': 'X',
+            'ts': round((start - origin) * 1e6, 3),
+            'dur': round(duration * 1e6, 3),
+            'pid': pid,
+            'tid': tid,
+        } for name, start, duration, tid in events]
+
+    def save_summary(self, path):
+        """保存 JSON 汇总"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': self.summary(), 'dropped_events': self.dropped_events},
+                      f, ensure_ascii=False, indent=2)
+
+    def save_trace(self, path):
+        """保存 Chrome trace 文件"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+
+    def save(self, prefix):
+        """同时保存 <prefix>.json 和 <prefix>.trace.json，返回两个路径"""
+        summary_file = f"{prefix}.json"
+        trace_file = f"{prefix}.trace.json"
+        self.save_summary(summary_file)
+        self.save_trace(trace_file)
+        return summary_file, trace_file
+
+    def display(self):
+        """打印汇总表"""
+        summary = self.summary()
+        if not summary:
+            print("ℹ️  没有耗时记录")
+            return
+
+        print("\n" + "="*72)
+        print("⏱️  各阶段耗时（包含子阶段）")
+        print("="*72)
+        print(f"{'阶段':<28} {'次数':>7} {'总计(ms)':>12} {'平均(ms)':>10} {'最长(ms)':>10}")
+        print("-"*72)
+        for name, stage in summary.items():
+            print(f"{name:<28} {stage['count']:>7} {stage['total_ms']:>12.1f} "
+                  f"{stage['avg_ms']:>10.3f} {stage['max_ms']:>10.3f}")
+        print("="*72)
+
+
+# 全局统计器（所有模块共用）
+_profiler = StageProfiler()
+
+
+def get_profiler():
+    """获取全局统计器"""
+    return _profiler
+
+
+def enable_profiling():
+    """开启全局耗时统计，返回统计器"""
+    _profiler.reset()
+    _profiler.enable()
+    return _profiler
+
+
+def profile_stage(name):
+    """with profile_stage('ocr'): ..."""
+    return _profiler.stage(name)
+
+
+def profiled(name=None):
+    """
+    装饰器：统计函数耗时
+
+    @profiled('decode')
+    def read_image_chinese_path(self, path): ...
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _profiler.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _profiler.add(stage_name, start, time.perf_counter() - start)
+
+        return wrapper
+    return decorator
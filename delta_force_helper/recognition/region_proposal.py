@@ -0,0 +1,344 @@
+"""
+文字区域预选（只对可能有文字的区域做OCR）
+- 按分辨率的布局配置：直接裁出物品名称、价格所在的面板
+- 形态学 / MSER 检测：用 OpenCV 快速找出候选文字块
+- 只把这些裁剪区域送进OCR，识别结果坐标换算回整张截图
+
+用法：
+    python recognition/region_proposal.py 截图文件夹 [--mode auto|layout|morph|mser]
+输出每种分辨率的面积节省比例和整张截图的识别加速比
+"""
+
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+# 布局配置：分辨率 -> 面板列表（坐标为相对比例 x, y, w, h）
+# 需要根据实际截图校准，可在 data/layout_profiles.json 中覆盖
+DEFAULT_LAYOUT_PROFILES = {
+    (1920, 1080): [
+        {'name': 'item_list', 'box': (0.02, 0.12, 0.56, 0.80)},
+        {'name': 'item_detail', 'box': (0.62, 0.12, 0.36, 0.70)},
+    ],
+    (2560, 1440): [
+        {'name': 'item_list', 'box': (0.02, 0.12, 0.56, 0.80)},
+        {'name': 'item_detail', 'box': (0.62, 0.12, 0.36, 0.70)},
+    ],
+}
+
+LAYOUT_PROFILES_FILE = "data/layout_profiles.json"
+
+# 交易行列表的列位置：物品名称列、价格列（相对比例 x, y, w, h）
+# 价格列只有固定字体的数字，交给 DigitRecognizer。下面只是占位的估计值，
+# 列位置不对会丢行：只在 price_tracker --digits 时使用，
+# 应先根据实际截图在 data/market_columns.json 中校准
+DEFAULT_MARKET_COLUMNS = {
+    (1920, 1080): {'name': (0.02, 0.12, 0.33, 0.80), 'price': (0.36, 0.12, 0.22, 0.80)},
+    (2560, 1440): {'name': (0.02, 0.12, 0.33, 0.80), 'price': (0.36, 0.12, 0.22, 0.80)},
+}
+
+MARKET_COLUMNS_FILE = "data/market_columns.json"
+
+
+def load_layout_profiles(profiles_file=LAYOUT_PROFILES_FILE):
+    """
+    加载布局配置
+
+    JSON格式：{"1920x1080": [{"name": "item_list", "box": [x, y, w, h]}, ...]}
+    """
+    profiles = dict(DEFAULT_LAYOUT_PROFILES)
+
+    if Path(profiles_file).exists():
+        with open(profiles_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        for resolution, panels in data.items():
+            width, height = (int(v) for v in resolution.lower().split('x'))
+            profiles[(width, height)] = [
+                {'name': panel['name'], 'box': tuple(panel['box'])} for panel in panels
+            ]
+
+    return profiles
+
+
+def load_market_columns(columns_file=MARKET_COLUMNS_FILE):
+    """
+    加载交易行列位置
+
+    JSON格式：{"1920x1080": {"name": [x, y, w, h], "price": [x, y, w, h]}}
+    """
+    columns = dict(DEFAULT_MARKET_COLUMNS)
+
+    if Path(columns_file).exists():
+        with open(columns_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        for resolution, boxes in data.items():
+            width, height = (int(v) for v in resolution.lower().split('x'))
+            columns[(width, height)] = {
+                'name': tuple(boxes['name']), 'price': tuple(boxes['price'])
+            }
+
+    return columns
+
+
+def crop_box(img, box):
+    """按相对比例裁剪，返回 (裁剪图, x, y)"""
+    height, width = img.shape[:2]
+    fx, fy, fw, fh = box
+    x, y = int(fx * width), int(fy * height)
+    return img[y:y + int(fh * height), x:x + int(fw * width)], x, y
+
+
+def offset_ocr_results(results, dx, dy):
+    """把裁剪区域内的OCR结果坐标换算回原图"""
+    return [
+        ([[x + dx, y + dy] for x, y in bbox], text, confidence)
+        for bbox, text, confidence in results
+    ]
+
+
+class RegionProposer:
+    """
+    文字区域预选器
+
+    mode:
+        layout - 只用布局配置（未知分辨率时退回整张图）
+        morph  - 形态学检测文字块
+        mser   - MSER 检测文字块
+        auto   - 有布局配置用布局，否则用形态学检测
+    """
+
+    MODES = ('auto', 'layout', 'morph', 'mser')
+
+    def __init__(self, mode='auto', profiles=None, padding=6,
+                 min_area=80, max_regions=40):
+        if mode not in self.MODES:
+            raise ValueError(f"未知的区域预选模式：{mode}")
+
+        self.mode = mode
+        self.profiles = profiles if profiles is not None else load_layout_profiles()
+        self.padding = padding
+        self.min_area = min_area
+        self.max_regions = max_regions
+
+        # 统计
+        self.total_pixels = 0
+        self.ocr_pixels = 0
+        self.image_count = 0
+
+    # ============ 区域预选 ============
+
+    def propose(self, img):
+        """
+        返回需要OCR的区域列表 [(x, y, w, h), ...]
+        """
+        height, width = img.shape[:2]
+
+        if self.mode in ('auto', 'layout'):
+            regions = self.layout_regions(width, height)
+            if regions is None:
+                regions = self.detect_regions(img, 'morph') if self.mode == 'auto' \
+                    else [(0, 0, width, height)]
+        else:
+            regions = self.detect_regions(img, self.mode)
+
+        self.image_count += 1
+        self.total_pixels += width * height
+        self.ocr_pixels += sum(w * h for _, _, w, h in regions)
+
+        return regions
+
+    def layout_regions(self, width, height):
+        """按分辨率取布局配置中的面板，没有配置返回 None"""
+        panels = self.profiles.get((width, height))
+        if panels is None:
+            return None
+
+        regions = []
+        for panel in panels:
+            fx, fy, fw, fh = panel['box']
+            regions.append((int(fx * width), int(fy * height),
+                            int(fw * width), int(fh * height)))
+        return regions
+
+    def detect_regions(self, img, method='morph'):
+        """用形态学或MSER检测文字块，合并相邻的块"""
+        height, width = img.shape[:2]
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+        # 在缩小图上检测，速度更快
+        scale = 960 / width if width > 960 else 1.0
+        small = cv2.resize(gray, None, fx=scale, fy=scale,
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+        if method == 'mser':
+            mask = self._mser_mask(small)
+        else:
+            mask = self._morph_mask(small)
+
+        # 横向连接同一行的字符，合并成文字块
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE,
+                                cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        min_area = self.min_area * scale * scale
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < min_area or h < 4 or w < 6:
+                continue
+            boxes.append((x, y, w, h))
+
+        # 换算回原图并加边距
+        pad = self.padding
+        regions = []
+        for x, y, w, h in boxes:
+            x0 = max(0, int(x / scale) - pad)
+            y0 = max(0, int(y / scale) - pad)
+            x1 = min(width, int((x + w) / scale) + pad)
+            y1 = min(height, int((y + h) / scale) + pad)
+            regions.append((x0, y0, x1 - x0, y1 - y0))
+
+        # 区域太多时，每个区域单独OCR反而更慢，合并成包围行带
+        if len(regions) > self.max_regions:
+            regions = self._merge_rows(regions, width)
+
+        return regions
+
+    @staticmethod
+    def _morph_mask(gray):
+        """形态学梯度 + Otsu 二值化，突出文字笔画边缘"""
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT,
+                                    cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        return mask
+
+    @staticmethod
+    def _mser_mask(gray):
+        """MSER 稳定极值区域，过滤掉过大的区域后画到掩码上"""
+        mser = cv2.MSER_create()
+        mser.setMaxArea(int(gray.shape[0] * gray.shape[1] * 0.01))
+        _, bboxes = mser.detectRegions(gray)
+
+        mask = np.zeros(gray.shape, dtype=np.uint8)
+        for x, y, w, h in bboxes:
+            mask[y:y + h, x:x + w] = 255
+        return mask
+
+    @staticmethod
+    def _merge_rows(regions, width):
+        """把垂直方向重叠的区域合并成整行"""
+        regions = sorted(regions, key=lambda r: r[1])
+        merged = []
+
+        for x, y, w, h in regions:
+            if merged:
+                mx, my, mw, mh = merged[-1]
+                if y <= my + mh:
+                    x0, x1 = min(mx, x), max(mx + mw, x + w)
+                    merged[-1] = (x0, my, x1 - x0, max(my + mh, y + h) - my)
+                    continue
+            merged.append((x, y, w, h))
+
+        return merged
+
+    # ============ 区域OCR ============
+
+    def readtext(self, reader, img, regions=None, **kwargs):
+        """
+        只对预选区域做OCR，返回与整张图OCR相同格式的结果（坐标为原图坐标）
+
+        reader: OCREngine 或 easyocr.Reader
+        """
+        if regions is None:
+            regions = self.propose(img)
+
+        results = []
+        for x, y, w, h in regions:
+            if w <= 0 or h <= 0:
+                continue
+            crop = img[y:y + h, x:x + w]
+            results.extend(offset_ocr_results(reader.readtext(crop, **kwargs), x, y))
+
+        return results
+
+    def get_stats(self):
+        """获取面积统计"""
+        saved = 1 - self.ocr_pixels / self.total_pixels if self.total_pixels else 0.0
+        return {
+            'mode': self.mode,
+            'images': self.image_count,
+            'total_pixels': self.total_pixels,
+            'ocr_pixels': self.ocr_pixels,
+            'area_saved': saved
+        }
+
+
+def benchmark(folder, mode='auto'):
+    """
+    对比整张图OCR和区域OCR的耗时
+
+    按分辨率分组输出：面积节省比例、平均耗时、加速比
+    """
+    from recognition.ocr_engine import get_ocr_engine
+    from recognition.file_manifest import list_screenshots
+
+    engine = get_ocr_engine()
+    engine.warm_up()
+
+    stats = {}
+
+    for image_path in list_screenshots(folder):
+        img = cv2.imdecode(np.fromfile(str(image_path), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            continue
+
+        resolution = f"{img.shape[1]}x{img.shape[0]}"
+        proposer = RegionProposer(mode)
+
+        start = time.perf_counter()
+        engine.reader.readtext(img)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        regions = proposer.propose(img)
+        proposer.readtext(engine.reader, img, regions)
+        roi_time = time.perf_counter() - start
+
+        group = stats.setdefault(resolution, {'count': 0, 'full': 0.0, 'roi': 0.0, 'saved': 0.0})
+        group['count'] += 1
+        group['full'] += full_time
+        group['roi'] += roi_time
+        group['saved'] += proposer.get_stats()['area_saved']
+
+        print(f"   {image_path.name}: {resolution} 区域 {len(regions)} 个  "
+              f"整图 {full_time:.2f}s  区域 {roi_time:.2f}s  加速 {full_time / roi_time:.1f}x")
+
+    print("\n" + "="*60)
+    print(f"📊 区域预选效果（模式：{mode}）")
+    print("="*60)
+    for resolution, group in stats.items():
+        count = group['count']
+        print(f"{resolution}: {count} 张  面积节省 {group['saved'] / count:.0%}  "
+              f"整图 {group['full'] / count:.2f}s  区域 {group['roi'] / count:.2f}s  "
+              f"加速 {group['full'] / group['roi']:.1f}x")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    parser = argparse.ArgumentParser(description="文字区域预选效果测试")
+    parser.add_argument('folder', help="截图文件夹")
+    parser.add_argument('--mode', default='auto', choices=RegionProposer.MODES)
+    args = parser.parse_args()
+
+    benchmark(args.folder, args.mode)
@@ -0,0 +1,231 @@
+"""
+界面类型识别（在OCR之前给截图分类）
+- 交易行、开箱、仓库/背包、大厅、战局内 HUD
+- 每张截图缩成 64x36 的小图，取两种特征：
+  灰度小图（界面框架的布局）+ HSV 颜色直方图（界面主色调）
+- 与各类型的样例小图比较，取最相似的类型；都不像时返回 unknown
+- 一张截图几毫秒，不需要OCR
+
+样例小图由 TemplateExtractor.extract_screen_templates 从人工分好类的截图生成，
+放在 data_collection/templates/screen/<类型>/*.png
+
+用法：python recognition/screen_classifier.py 分好类的截图文件夹
+（子文件夹名为类型名，输出留一法准确率和每张耗时）
+"""
+
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from recognition.profiler import profiled
+
+
+SCREEN_TEMPLATES_DIR = "data_collection/templates/screen"
+
+SCREEN_TYPES = ('market', 'loot', 'inventory', 'lobby', 'raid_hud')
+UNKNOWN = 'unknown'
+
+SCREEN_NAMES = {
+    'market': '交易行',
+    'loot': '开箱',
+    'inventory': '仓库/背包',
+    'lobby': '大厅',
+    'raid_hud': '战局内',
+    UNKNOWN: '未知',
+}
+
+THUMBNAIL_SIZE = (64, 36)
+
+
+def read_image(path, flags=cv2.IMREAD_COLOR):
+    """读取图片（支持中文路径）"""
+    try:
+        return cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), flags)
+    except Exception:
+        return None
+
+
+def make_thumbnail(img):
+    """缩成分类用的小图（彩色）"""
+    return cv2.resize(img, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+
+class ScreenClassifier:
+    """
+    界面类型分类器
+
+    threshold: 最低相似度，低于它返回 unknown
+    layout_weight: 布局特征的权重（其余为颜色直方图）
+    """
+
+    def __init__(self, templates_dir=SCREEN_TEMPLATES_DIR, threshold=0.6, layout_weight=0.6):
+        self.templates_dir = templates_dir
+        self.threshold = threshold
+        self.layout_weight = layout_weight
+
+        self.labels = []
+        self.layouts = np.zeros((0, THUMBNAIL_SIZE[0] * THUMBNAIL_SIZE[1]), dtype=np.float32)
+        self.histograms = np.zeros((0, 16 * 4), dtype=np.float32)
+
+        # 统计
+        self.counts = {}
+
+        self.load_templates()
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def is_ready(self):
+        """有样例时才能分类"""
+        return bool(self.labels)
+
+    # ============ 特征 ============
+
+    @staticmethod
+    def features(thumbnail):
+        """
+        小图 -> (布局向量, 颜色直方图)
+
+        布局向量零均值、单位长度（点积即相关系数）；直方图和为1（用直方图交集比较）
+        """
+        gray = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY).astype(np.float32).ravel()
+        gray -= gray.mean()
+        norm = np.linalg.norm(gray)
+        layout = gray / norm if norm > 0 else gray
+
+        hsv = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2HSV)
+        histogram = cv2.calcHist([hsv], [0, 1], None, [16, 4], [0, 180, 0, 256]).ravel()
+        histogram /= max(histogram.sum(), 1.0)
+
+        return layout, histogram
+
+    # ============ 样例 ============
+
+    def load_templates(self):
+        """加载样例小图"""
+        labels = []
+        layouts = []
+        histograms = []
+
+        templates_dir = Path(self.templates_dir)
+        for screen_type in SCREEN_TYPES:
+            for path in sorted((templates_dir / screen_type).glob("*.png")):
+                thumbnail = read_image(path)
+                if thumbnail is None:
+                    continue
+                if thumbnail.shape[1::-1] != THUMBNAIL_SIZE:
+                    thumbnail = make_thumbnail(thumbnail)
+
+                layout, histogram = self.features(thumbnail)
+                labels.append(screen_type)
+                layouts.append(layout)
+                histograms.append(histogram)
+
+        self.labels = labels
+        if labels:
+            self.layouts = np.stack(layouts)
+            self.histograms = np.stack(histograms)
+
+        return len(labels)
+
+    def add_example(self, screen_type, img, save=True):
+        """添加一个样例（img 为整张截图）"""
+        if screen_type not in SCREEN_TYPES:
+            raise ValueError(f"未知的界面类型：{screen_type}（可选：{', '.join(SCREEN_TYPES)}）")
+
+        thumbnail = make_thumbnail(img)
+
+        if save:
+            type_dir = Path(self.templates_dir) / screen_type
+            type_dir.mkdir(parents=True, exist_ok=True)
+            index = len(list(type_dir.glob("*.png")))
+            cv2.imencode('.png', thumbnail)[1].tofile(str(type_dir / f"{screen_type}_{index:04d}.png"))
+
+        layout, histogram = self.features(thumbnail)
+        self.labels.append(screen_type)
+        self.layouts = np.vstack([self.layouts, layout])
+        self.histograms = np.vstack([self.histograms, histogram])
+
+    # ============ 分类 ============
+
+    def scores(self, img):
+        """与每个样例的相似度（0~1）"""
+        layout, histogram = self.features(make_thumbnail(img))
+
+        # 相关系数 [-1, 1] -> [0, 1]
+        layout_scores = (self.layouts @ layout + 1) / 2
+        histogram_scores = np.minimum(self.histograms, histogram).sum(axis=1)
+
+        return self.layout_weight * layout_scores + (1 - self.layout_weight) * histogram_scores
+
+    @profiled('classify_screen')
+    def classify(self, img):
+        """
+        判断截图的界面类型
+
+        返回 (类型, 相似度)，没有样例或都不像时类型为 unknown
+        """
+        if not self.labels:
+            return UNKNOWN, 0.0
+
+        scores = self.scores(img)
+        best = int(scores.argmax())
+        score = float(scores[best])
+
+        screen_type = self.labels[best] if score >= self.threshold else UNKNOWN
+        self.counts[screen_type] = self.counts.get(screen_type, 0) + 1
+        return screen_type, score
+
+    def get_stats(self):
+        """各类型的分类次数"""
+        return dict(self.counts)
+
+
+def evaluate(labeled_dir, threshold=0.6):
+    """
+    留一法评估：每张截图用其余截图做样例来分类
+
+    labeled_dir 下每个子文件夹是一种界面类型（与样例目录结构相同）
+    """
+    classifier = ScreenClassifier(templates_dir=labeled_dir, threshold=threshold)
+    if len(classifier) < 2:
+        print(f"❌ 样例太少：{labeled_dir}")
+        return
+
+    labels, layouts, histograms = classifier.labels, classifier.layouts, classifier.histograms
+    paths = [path for screen_type in SCREEN_TYPES
+             for path in sorted((Path(labeled_dir) / screen_type).glob("*.png"))]
+
+    correct = 0
+    elapsed = 0.0
+    for index, path in enumerate(paths):
+        keep = np.arange(len(labels)) != index
+        classifier.labels = [label for i, label in enumerate(labels) if i != index]
+        classifier.layouts = layouts[keep]
+        classifier.histograms = histograms[keep]
+
+        img = read_image(path)
+        start = time.perf_counter()
+        predicted, _ = classifier.classify(img)
+        elapsed += time.perf_counter() - start
+
+        if predicted == labels[index]:
+            correct += 1
+
+    print(f"✅ 准确率 {correct / len(paths):.1%}（{correct}/{len(paths)}）")
+    print(f"⏱️  平均 {elapsed / len(paths) * 1000:.2f} ms/张")
+    print(f"📊 分类结果：{classifier.get_stats()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="界面类型识别评估")
+    parser.add_argument('folder', help="分好类的截图文件夹（子文件夹名为类型名）")
+    parser.add_argument('--threshold', type=float, default=0.6, help="最低相似度")
+    args = parser.parse_args()
+
+    evaluate(args.folder, args.threshold)
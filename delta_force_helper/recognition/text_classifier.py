@@ -0,0 +1,208 @@
+"""
+物品文本分类（各模块共用）
+- 关键词表只在导入时编译一次，合并成一个正则（多选分支）
+- 一次扫描同时得到 类别 和 是否像物品名称
+- 武器型号格式（如AK-47、M4A1）也视为物品
+
+类别优先级：weapon > armor > equipment > material
+（同一个名称命中多个类别时取优先级最高的，与原来逐个列表判断的顺序一致）
+"""
+
+import re
+
+
+# 类别关键词（按优先级排列）
+CATEGORY_KEYWORDS = {
+    'weapon': ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋',
+               '机枪', '榴弹', '火箭'],
+    'armor': ['头盔', '护甲', '背心', '防弹'],
+    'equipment': ['背包', '腰带', '手套', '靴子', '护目镜', '战术'],
+    'material': ['砖', '板', '金属', '芯片', '零件', '电路', '材料'],
+}
+
+# 只用于判断"是物品"、不决定类别的关键词
+ITEM_KEYWORDS = ['匕首', '刀', '剑', '装备', '合金', '晶体', '药剂', '文件', '情报']
+
+# 武器型号格式
+MODEL_PATTERN = re.compile(r'[A-Z0-9\-]{2,10}')
+
+UNKNOWN = 'unknown'
+
+
+def _build():
+    """编译关键词正则，返回 (正则, {关键词: 优先级}, 优先级对应的类别)"""
+    ranks = {}
+    categories = list(CATEGORY_KEYWORDS)
+
+    for rank, category in enumerate(categories):
+        for keyword in CATEGORY_KEYWORDS[category]:
+            ranks.setdefault(keyword, rank)
+
+    # 不决定类别的关键词排在所有类别之后
+    for keyword in ITEM_KEYWORDS:
+        ranks.setdefault(keyword, len(categories))
+    categories.append(UNKNOWN)
+
+    # 用前瞻在每个位置都尝试匹配，关键词互相重叠（如"合金属"）时也不会漏掉；
+    # 同一位置优先级高的关键词排在前面
+    keywords = sorted(ranks, key=lambda kw: (ranks[kw], -len(kw)))
+    alternation = '|'.join(re.escape(kw) for kw in keywords)
+    return re.compile(f'(?=({alternation}))'), ranks, categories
+
+
+_KEYWORD_RE, _KEYWORD_RANK, _RANK_CATEGORY = _build()
+_TOP_RANK = 0
+
+
+def classify(text):
+    """
+    对一段文本分类
+
+    返回 (类别, 是否像物品名称)，类别为 weapon/armor/equipment/material/unknown
+    """
+    best = None
+    for match in _KEYWORD_RE.finditer(text):
+        rank = _KEYWORD_RANK[match.group(1)]
+        if best is None or rank < best:
+            best = rank
+            if best == _TOP_RANK:
+                break
+
+    if best is not None:
+        return _RANK_CATEGORY[best], True
+
+    if MODEL_PATTERN.fullmatch(text):
+        return UNKNOWN, True
+
+    return UNKNOWN, False
+
+
+def is_item_text(text):
+    """判断文本是否可能是物品名称"""
+    return classify(text)[1]
+
+
+def detect_category(name):
+    """根据名称判断物品类别"""
+    return classify(name)[0]
+
+
+# ============ 性能对比 ============
+
+def _legacy_is_item(weapon, equipment, material):
+    """原来 ScreenshotAnalyzer / PriceTracker 的判断方式（每次调用重建列表，逐个扫描）"""
+    def is_item(text):
+        all_keywords = list(weapon) + list(equipment) + list(material)
+        if any(kw in text for kw in all_keywords):
+            return True
+        return bool(re.match(r'^[A-Z0-9\-]+$', text)) and 2 <= len(text) <= 10
+    return is_item
+
+
+def _legacy_category(categories):
+    """原来 AutoItemImporter / SmartImporter 的判断方式（按类别顺序逐个扫描）"""
+    def detect(text):
+        for category, keywords in categories.items():
+            if any(kw in text for kw in keywords):
+                return category
+        return UNKNOWN
+    return detect
+
+
+# 合并之前各模块自己的关键词表（用于对比行为差异）
+LEGACY = {
+    'ScreenshotAnalyzer.is_potential_item': (is_item_text, _legacy_is_item(
+        ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋', '机枪', '榴弹', '火箭',
+         '匕首', '刀', '剑'],
+        ['头盔', '护甲', '背包', '护目镜', '战术', '装备', '背心', '腰带', '手套'],
+        ['砖', '板', '金属', '芯片', '零件', '电路', '材料', '合金', '晶体', '药剂'])),
+    'PriceTracker.is_item_name': (is_item_text, _legacy_is_item(
+        ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋', '机枪', '榴弹', '火箭',
+         '匕首', '刀'],
+        ['头盔', '护甲', '背包', '护目镜', '战术', '装备', '背心', '腰带', '手套', '靴子'],
+        ['砖', '板', '金属', '芯片', '零件', '电路', '材料', '合金', '晶体', '药剂',
+         '文件', '情报'])),
+    'AutoItemImporter.determine_category': (detect_category, _legacy_category({
+        'weapon': ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋', '机枪', '榴弹', '火箭'],
+        'armor': ['头盔', '护甲', '背心', '防弹'],
+        'equipment': ['背包', '腰带', '手套', '靴子', '护目镜'],
+        'material': ['砖', '板', '金属', '芯片', '零件', '电路'],
+    })),
+    'SmartImporter.auto_detect_category': (detect_category, _legacy_category({
+        'weapon': ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋', '机枪'],
+        'armor': ['头盔', '护甲', '背心', '防弹'],
+        'equipment': ['背包', '腰带', '手套', '靴子', '护目镜', '战术'],
+        'material': ['砖', '板', '金属', '芯片', '零件', '电路', '材料'],
+    })),
+}
+
+
+def behaviour_changes():
+    """
+    合并关键词表后各模块结果有变化的关键词
+
+    返回 {模块: [(关键词, 原来的结果, 现在的结果), ...]}
+    """
+    changes = {}
+    for module, (current, legacy) in LEGACY.items():
+        diffs = [(kw, legacy(kw), current(kw)) for kw in _KEYWORD_RANK if legacy(kw) != current(kw)]
+        if diffs:
+            changes[module] = diffs
+    return changes
+
+
+def _sample_tokens(count, seed=0):
+    """生成模拟OCR文本（物品名、型号、价格、界面文字混在一起）"""
+    import random
+
+    rng = random.Random(seed)
+    keywords = list(_KEYWORD_RANK)
+    filler = '交易行出售购买数量确认取消刷新筛选全部价格背景信息的了和在'
+
+    tokens = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.3:
+            token = ''.join(rng.choice(filler) for _ in range(rng.randint(1, 3)))
+            token += rng.choice(keywords)
+        elif kind < 0.4:
+            token = rng.choice(['AK-47', 'M4A1', 'SCAR-H', 'AWM', 'MP5', 'G3'])
+        elif kind < 0.6:
+            token = f"{rng.randint(100, 999999):,}"
+        else:
+            token = ''.join(rng.choice(filler) for _ in range(rng.randint(2, 8)))
+        tokens.append(token)
+    return tokens
+
+
+def benchmark(count=1_000_000):
+    """与合并前各模块的逐列表扫描对比速度，并列出结果不同的关键词"""
+    import time
+
+    tokens = _sample_tokens(count)
+    print(f"📝 {len(tokens):,} 个模拟OCR文本")
+
+    for module, (current, legacy) in LEGACY.items():
+        start = time.perf_counter()
+        old = [legacy(token) for token in tokens]
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = [current(token) for token in tokens]
+        compiled_time = time.perf_counter() - start
+
+        mismatches = sum(1 for a, b in zip(old, new) if a != b)
+        print(f"\n   {module}")
+        print(f"      逐列表扫描 {legacy_time / count * 1e6:.2f} µs/个，"
+              f"编译正则 {compiled_time / count * 1e6:.2f} µs/个，"
+              f"加速 {legacy_time / compiled_time:.1f}x，结果不同 {mismatches:,} 个")
+
+    print("\n🔀 合并关键词表后结果有变化的关键词（原来 -> 现在）：")
+    for module, diffs in behaviour_changes().items():
+        print(f"   {module}：" + "，".join(f"{kw} {old}->{new}" for kw, old, new in diffs))
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,193 @@
+"""
+未知物品记录
+- 内存中按名称计数（字典），每次记录 O(1)
+- 记录首次/最近发现时间和最高置信度
+- 写入只追加到 JSONL 日志，不重写整个文件
+- 日志过长时压缩成 unknown_items.json 快照（格式与原来兼容）
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+
+UNKNOWN_ITEMS_FILE = "data/unknown_items.json"
+UNKNOWN_ITEMS_LOG = "data/unknown_items.log.jsonl"
+
+
+def _merge_record(target, record):
+    """把一条记录合并到已有记录上"""
+    target['count'] = target.get('count', 0) + record.get('count', 1)
+    target['confidence'] = max(target.get('confidence', 0), record.get('confidence', 0))
+
+    first_seen = record.get('first_seen')
+    if first_seen and (not target.get('first_seen') or first_seen < target['first_seen']):
+        target['first_seen'] = first_seen
+
+    last_seen = record.get('last_seen')
+    if last_seen and (not target.get('last_seen') or last_seen > target['last_seen']):
+        target['last_seen'] = last_seen
+
+
+class UnknownItemTracker:
+    """
+    未知物品追踪器
+
+    flush_every: 累计多少次发现后自动写入日志（None = 只在 flush() 时写入）
+    compact_lines: 日志超过多少行时压缩成快照
+    """
+
+    def __init__(self, snapshot_file=UNKNOWN_ITEMS_FILE, log_file=UNKNOWN_ITEMS_LOG,
+                 flush_every=200, compact_lines=2000):
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file
+        self.flush_every = flush_every
+        self.compact_lines = compact_lines
+
+        # 尚未写入日志的增量
+        self.pending = {}
+        self._pending_count = 0
+
+        # 本次会话发现的物品（用于报告和生成待确认配置）
+        self.session = {}
+
+        self._log_lines = self._count_log_lines()
+
+    def _count_log_lines(self):
+        if not Path(self.log_file).exists():
+            return 0
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    # ============ 记录 ============
+
+    def record(self, name, confidence, timestamp=None):
+        """
+        记录一次发现
+
+        返回 True 表示本次会话第一次发现该物品
+        """
+        timestamp = timestamp or datetime.now().isoformat()
+        record = {'name': name, 'count': 1, 'confidence': confidence,
+                  'first_seen': timestamp, 'last_seen': timestamp}
+
+        is_new = name not in self.session
+        self.merge({name: record})
+
+        if self.flush_every and self._pending_count >= self.flush_every:
+            self.flush()
+
+        return is_new
+
+    def merge(self, records):
+        """合并其他追踪器的增量（如多进程分析时工作进程的结果）"""
+        for name, record in records.items():
+            for target in (self.pending, self.session):
+                if name in target:
+                    _merge_record(target[name], record)
+                else:
+                    target[name] = dict(record)
+            self._pending_count += record.get('count', 1)
+
+    def take_pending(self):
+        """取出并清空未写入的增量（不写文件）"""
+        pending = self.pending
+        self.pending = {}
+        self._pending_count = 0
+        return pending
+
+    def reset_session(self):
+        """开始新的会话（不影响已记录的数据）"""
+        self.session = {}
+
+    # ============ 持久化 ============
+
+    def flush(self):
+        """把增量追加写入日志，返回写入的物品数"""
+        pending = self.take_pending()
+        if not pending:
+            return 0
+
+        Path(self.log_file).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            for record in pending.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        self._log_lines += len(pending)
+
+        if self._log_lines >= self.compact_lines:
+            self.compact()
+
+        return len(pending)
+
+    def load(self):
+        """读取全部未知物品（快照 + 日志），返回 {名称: 记录}"""
+        items = {}
+
+        if Path(self.snapshot_file).exists():
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                for record in json.load(f):
+                    items[record['name']] = dict(record)
+
+        if Path(self.log_file).exists():
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩溃时最后一行可能只写了一半
+                        continue
+
+                    name = record['name']
+                    if name in items:
+                        _merge_record(items[name], record)
+                    else:
+                        items[name] = record
+
+        return items
+
+    def items(self):
+        """全部未知物品列表（包含未写入的增量）"""
+        items = self.load()
+        for name, record in self.pending.items():
+            if name in items:
+                _merge_record(items[name], record)
+            else:
+                items[name] = dict(record)
+        return list(items.values())
+
+    def compact(self):
+        """把日志合并进快照文件，然后清空日志"""
+        items = self.load()
+
+        Path(self.snapshot_file).parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = f"{self.snapshot_file}.tmp"
+
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(list(items.values()), f, ensure_ascii=False, indent=2)
+
+        os.replace(tmp_file, self.snapshot_file)
+
+        if Path(self.log_file).exists():
+            os.remove(self.log_file)
+        self._log_lines = 0
+
+    def clear(self):
+        """清空所有未知物品记录"""
+        Path(self.snapshot_file).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.snapshot_file, 'w', encoding='utf-8') as f:
+            json.dump([], f, ensure_ascii=False, indent=2)
+
+        if Path(self.log_file).exists():
+            os.remove(self.log_file)
+
+        self._log_lines = 0
+        self.pending = {}
+        self._pending_count = 0
+        self.session = {}
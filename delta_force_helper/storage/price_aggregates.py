@@ -0,0 +1,172 @@
+"""
+当前价格表的增量统计
+- 每个物品维护累计和/次数、最低/最高价、最近5次价格（算趋势），新价格进来 O(1) 更新
+- 只重新生成这次有新价格的物品（脏标记），其他物品的条目不动
+- current_prices.json 按时间间隔写出，或在批量结束时 flush(force=True)
+- 启动时用数据库的一次 GROUP BY 和每个物品最近5条记录恢复统计，不用读全部历史
+
+current_prices.json 的字段与原来相同：
+latest_price / min_price / max_price / avg_price / trend / sample_count / last_update
+"""
+
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+
+
+CURRENT_PRICES_FILE = "data/current_prices.json"
+
+# 趋势：最近几次的平均价 vs 之前的平均价
+TREND_WINDOW = 5
+TREND_THRESHOLD = 5  # 百分比
+
+
+class ItemAggregate:
+    """单个物品的累计统计"""
+
+    __slots__ = ('name', 'count', 'total', 'min_price', 'max_price', 'recent', 'last_update')
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0
+        self.min_price = None
+        self.max_price = None
+        self.recent = deque(maxlen=TREND_WINDOW)
+        self.last_update = None
+
+    def add(self, price, timestamp):
+        self.count += 1
+        self.total += price
+        self.min_price = price if self.min_price is None else min(self.min_price, price)
+        self.max_price = price if self.max_price is None else max(self.max_price, price)
+        self.recent.append(price)
+        self.last_update = timestamp
+
+    def trend(self):
+        """最近5次 vs 之前的平均价：rising / falling / stable，不足6次为 unknown"""
+        if self.count <= TREND_WINDOW:
+            return 'unknown'
+
+        recent_total = sum(self.recent)
+        recent_avg = recent_total / len(self.recent)
+        old_avg = (self.total - recent_total) / (self.count - len(self.recent))
+        trend_percent = ((recent_avg - old_avg) / old_avg) * 100
+
+        if trend_percent > TREND_THRESHOLD:
+            return 'rising'  # 上涨
+        if trend_percent < -TREND_THRESHOLD:
+            return 'falling'  # 下跌
+        return 'stable'  # 稳定
+
+    def to_current(self):
+        """当前价格表中的一条"""
+        return {
+            'name': self.name,
+            'latest_price': self.recent[-1],
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'avg_price': int(self.total / self.count),
+            'trend': self.trend(),
+            'sample_count': self.count,
+            'last_update': self.last_update
+        }
+
+
+class PriceAggregates:
+    """
+    所有物品的增量统计 + 当前价格表
+
+    flush_interval: 两次写出 current_prices.json 的最短间隔（秒），0 = 每次都写
+    """
+
+    def __init__(self, current_prices_file=CURRENT_PRICES_FILE, flush_interval=30.0):
+        self.current_prices_file = current_prices_file
+        self.flush_interval = flush_interval
+
+        self.items = {}
+        self.current = {}
+        self.dirty = set()
+
+        self._unsaved = False
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self.items)
+
+    @classmethod
+    def from_store(cls, store, current_prices_file=CURRENT_PRICES_FILE, flush_interval=30.0):
+        """从价格数据库恢复统计（见 storage.price_store）"""
+        aggregates = cls(current_prices_file, flush_interval)
+
+        recent = store.export_history(limit=TREND_WINDOW)
+        for name, count, total, min_price, max_price, last_update in store.item_stats():
+            item = ItemAggregate(name)
+            item.count = count
+            item.total = total
+            item.min_price = min_price
+            item.max_price = max_price
+            item.recent.extend(sample['price'] for sample in recent[name]['prices'])
+            item.last_update = last_update
+
+            aggregates.items[name] = item
+            aggregates.current[name] = item.to_current()
+
+        return aggregates
+
+    # ============ 更新 ============
+
+    def add(self, items_with_prices, timestamp):
+        """加入一批价格（一张截图），只标记受影响的物品"""
+        for entry in items_with_prices:
+            name = entry['name']
+            item = self.items.get(name)
+            if item is None:
+                item = self.items[name] = ItemAggregate(name)
+            item.add(entry['price'], timestamp)
+            self.dirty.add(name)
+
+    def refresh(self):
+        """重新生成被标记物品的当前价格条目，返回更新的数量"""
+        count = len(self.dirty)
+        for name in self.dirty:
+            self.current[name] = self.items[name].to_current()
+        if count:
+            self._unsaved = True
+        self.dirty.clear()
+        return count
+
+    def get_current(self):
+        """当前价格表（与 current_prices.json 内容相同）"""
+        self.refresh()
+        return self.current
+
+    # ============ 写出 ============
+
+    def flush(self, force=False):
+        """
+        写出 current_prices.json
+
+        force=False 时距离上次写出不到 flush_interval 秒就跳过；没有变化时不写
+        返回是否写出
+        """
+        self.refresh()
+        if not self._unsaved:
+            return False
+        if not force and time.monotonic() - self._last_flush < self.flush_interval:
+            return False
+
+        path = Path(self.current_prices_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 先写临时文件再替换，写到一半中断时原文件不受影响
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.current, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+        self._unsaved = False
+        self._last_flush = time.monotonic()
+        return True
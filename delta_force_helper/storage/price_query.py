@@ -0,0 +1,279 @@
+"""
+价格历史查询（基于 storage.timeseries 的列式时间序列）
+- get_series(名称, t0, t1)：某段时间的价格序列
+- ohlc(名称, bucket='1h')：按时间段汇总的开/高/低/收
+- latest(名称列表)：每个物品最近一次的价格
+- 每层数据按时间排序，范围查询用二分查找定位起止行，只读取这一段
+
+时间参数可以是 Unix 秒、datetime 或 ISO 时间字符串（本地时间）；
+时间范围为 [t0, t1)，None 表示不限
+
+较早的数据已经降采样成小时/日汇总：序列中这些点的价格是该时间段的平均价，
+ohlc 的时间段比汇总更细时，该时间段内只有一个点（汇总本身）
+
+用法：
+  python storage/price_query.py 物品名 [--from 2025-11-18] [--to 2025-11-19] [--bucket 1h]
+  python storage/price_query.py --benchmark   # 100万条样本的查询耗时
+"""
+
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# 允许直接运行 python storage/xxx.py 时导入项目内模块
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from storage.timeseries import (
+    TimeSeriesStore, TIMESERIES_DIR, ROLLUP_COLUMNS, LOG_DTYPE,
+    raw_to_rollup, rollup, concat_rows, sort_rows
+)
+
+
+BUCKET_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def to_seconds(value):
+    """Unix 秒 / datetime / ISO 时间字符串 -> Unix 秒（None 不变）"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+
+def parse_bucket(bucket):
+    """'15m' / '1h' / '4h' / '1d' -> 秒数"""
+    if isinstance(bucket, (int, float)):
+        return int(bucket)
+    match = re.fullmatch(r'(\d+)([mhd])', bucket.strip())
+    if not match:
+        raise ValueError(f"无法识别的时间段：{bucket}（例如 15m、1h、1d）")
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)]
+
+
+def time_range(ts, t0, t1):
+    """有序时间列中 [t0, t1) 的起止行（二分查找）"""
+    start = 0 if t0 is None else int(np.searchsorted(ts, t0, side='left'))
+    end = len(ts) if t1 is None else int(np.searchsorted(ts, t1, side='left'))
+    return start, max(start, end)
+
+
+class PriceQuery:
+    """
+    价格查询
+
+    store: TimeSeriesStore；不传时只读打开 data/timeseries
+    """
+
+    def __init__(self, store=None, root=TIMESERIES_DIR):
+        self.store = store if store is not None else TimeSeriesStore(root, readonly=True)
+
+    def reload(self):
+        """重新读取（价格采集合并之后）"""
+        self.store.reload()
+
+    def names(self):
+        return list(self.store.names)
+
+    # ============ 取数据 ============
+
+    def _tier_slice(self, tier, name, t0, t1):
+        """某一层中这个物品在 [t0, t1) 内的行（内存映射时只读取这一段）"""
+        columns = self.store.item_columns(tier, name)
+        start, end = time_range(columns['ts'], t0, t1)
+        return {column: values[start:end] for column, values in columns.items()}
+
+    def _pending_slice(self, name, t0, t1):
+        columns = self.store.pending_columns(name)
+        start, end = time_range(columns['ts'], t0, t1)
+        return {column: values[start:end] for column, values in columns.items()}
+
+    def _rollup_rows(self, name, t0, t1):
+        """[t0, t1) 内的全部数据，统一成汇总行格式，按时间排序"""
+        parts = [self._tier_slice('daily', name, t0, t1),
+                 self._tier_slice('hourly', name, t0, t1),
+                 raw_to_rollup(self._tier_slice('raw', name, t0, t1)),
+                 raw_to_rollup(self._pending_slice(name, t0, t1))]
+
+        items, rows = concat_rows(
+            [(np.zeros(len(part['ts']), dtype=np.int32), part) for part in parts],
+            ROLLUP_COLUMNS)
+        return sort_rows(items, rows)
+
+    # ============ 查询 ============
+
+    def get_series(self, name, t0=None, t1=None):
+        """
+        某个物品在 [t0, t1) 内的价格序列
+
+        返回 {'ts': Unix 秒, 'price': 价格, 'count': 这个点代表的样本数}（NumPy 数组，按时间排序）；
+        汇总行的价格为平均价
+        """
+        _, rows = self._rollup_rows(name, to_seconds(t0), to_seconds(t1))
+        prices = (rows['total'] // np.maximum(rows['count'], 1)).astype(np.int32)
+        return {'ts': rows['ts'], 'price': prices, 'count': rows['count']}
+
+    def ohlc(self, name, bucket='1h', t0=None, t1=None):
+        """
+        按时间段汇总（时间段按本地时间对齐）
+
+        返回 {'ts': 时间段开始, 'open', 'high', 'low', 'close', 'count', 'avg'}（NumPy 数组）
+        """
+        seconds = parse_bucket(bucket)
+        items, rows = self._rollup_rows(name, to_seconds(t0), to_seconds(t1))
+        _, bars = rollup(items, rows, seconds, self.store.utc_offset)
+
+        result = {column: bars[column] for column in ('ts', 'open', 'high', 'low', 'close', 'count')}
+        result['avg'] = (bars['total'] // np.maximum(bars['count'], 1)).astype(np.int32)
+        return result
+
+    def latest(self, names):
+        """
+        每个物品最近一次的价格
+
+        返回 {名称: {'price': 价格, 'ts': Unix 秒}}，没有记录的物品不出现
+        """
+        log = self.store.read_log()
+        pending = {}
+        if len(log):
+            # 每个物品在日志中最后（时间最大）的一条
+            log = np.sort(log, order=['item', 'ts'], kind='stable')
+            last = np.flatnonzero(np.append(log['item'][1:] != log['item'][:-1], True))
+            pending = {int(row['item']): (int(row['ts']), int(row['price'])) for row in log[last]}
+
+        result = {}
+        for name in names:
+            item = self.store.ids.get(name)
+            if item is None:
+                continue
+
+            candidates = []
+            if item in pending:
+                candidates.append(pending[item])
+            raw = self.store.item_columns('raw', name)
+            if len(raw['ts']):
+                candidates.append((int(raw['ts'][-1]), int(raw['price'][-1])))
+            else:
+                # 没有原始样本时取最近一个汇总的收盘价
+                for tier in ('hourly', 'daily'):
+                    rows = self.store.item_columns(tier, name)
+                    if len(rows['ts']):
+                        candidates.append((int(rows['ts'][-1]), int(rows['close'][-1])))
+                        break
+
+            if candidates:
+                ts, price = max(candidates, key=lambda c: c[0])
+                result[name] = {'price': price, 'ts': ts}
+
+        return result
+
+
+# ============ 测试 ============
+
+def benchmark(samples=1_000_000, items=1000, days=30, queries=200, seed=0):
+    """100万条样本：范围查询、OHLC、latest 的耗时，对比原来在 Python 列表里逐条过滤"""
+    import json
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    now = int(time.time())
+
+    with tempfile.TemporaryDirectory() as root:
+        # 保留期设得足够长，全部留在原始层（最坏情况：行最多）
+        store = TimeSeriesStore(root, raw_days=days + 1)
+        names = [f"物品{i:04d}" for i in range(items)]
+        for name in names:
+            store.item_id(name, create=True)
+
+        records = np.zeros(samples, dtype=LOG_DTYPE)
+        records['item'] = rng.integers(0, items, samples)
+        records['ts'] = now - rng.integers(0, days * 86400, samples)
+        records['price'] = rng.integers(100, 1000000, samples)
+        records['conf'] = rng.random(samples)
+        store.append_records(records)
+        store.compact(now)
+
+        query = PriceQuery(TimeSeriesStore(root, raw_days=days + 1, readonly=True))
+        picks = [names[i] for i in rng.integers(0, items, queries)]
+        starts = now - rng.integers(1, days, queries) * 86400
+
+        start = time.perf_counter()
+        total = 0
+        for name, t0 in zip(picks, starts):
+            total += len(query.get_series(name, t0, t0 + 86400)['ts'])
+        series_time = (time.perf_counter() - start) / queries
+
+        start = time.perf_counter()
+        for name in picks:
+            query.ohlc(name, '1h', now - 7 * 86400, now)
+        ohlc_time = (time.perf_counter() - start) / queries
+
+        start = time.perf_counter()
+        query.latest(names[:100])
+        latest_time = time.perf_counter() - start
+
+    # 原来的方式：所有样本是字典列表，逐条比较时间
+    history = {}
+    for item, ts, price in zip(records['item'].tolist(), records['ts'].tolist(),
+                               records['price'].tolist()):
+        history.setdefault(names[item], []).append({'price': price, 'timestamp': ts})
+    text = json.dumps(history)
+    start = time.perf_counter()
+    json.loads(text)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name, t0 in zip(picks[:20], starts[:20]):
+        [p for p in history[name] if t0 <= p['timestamp'] < t0 + 86400]
+    scan_time = (time.perf_counter() - start) / 20
+
+    print(f"📊 {samples:,} 条样本，{items} 个物品，{days} 天")
+    print(f"   get_series（1天）：{series_time * 1000:.3f} ms/次（平均 {total / queries:.0f} 个点）")
+    print(f"   ohlc（7天，1h）：  {ohlc_time * 1000:.3f} ms/次")
+    print(f"   latest（100个）：  {latest_time * 1000:.3f} ms")
+    print(f"   对比：整个 JSON 加载 {load_time:.2f} 秒，之后每次在 Python 列表里逐条过滤 "
+          f"{scan_time * 1000:.3f} ms")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="价格历史查询")
+    parser.add_argument('name', nargs='?', help="物品名称")
+    parser.add_argument('--from', dest='t0', help="开始时间（如 2025-11-18 或 2025-11-18T20:00）")
+    parser.add_argument('--to', dest='t1', help="结束时间（不含）")
+    parser.add_argument('--bucket', default='1h', help="汇总时间段（15m、1h、1d...）")
+    parser.add_argument('--benchmark', action='store_true', help="100万条样本的查询测试")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    if not args.name:
+        parser.error("需要物品名称（或 --benchmark）")
+
+    query = PriceQuery()
+    bars = query.ohlc(args.name, args.bucket, args.t0, args.t1)
+    if not len(bars['ts']):
+        print(f"❌ 没有 {args.name} 的价格记录")
+        return
+
+    print(f"📈 {args.name}（{args.bucket}）")
+    print(f"{'时间':<17} {'开':>9} {'高':>9} {'低':>9} {'收':>9} {'均价':>9} {'次数':>5}")
+    for i in range(len(bars['ts'])):
+        when = datetime.fromtimestamp(int(bars['ts'][i])).strftime('%Y-%m-%d %H:%M')
+        print(f"{when:<17} {bars['open'][i]:>9,} {bars['high'][i]:>9,} {bars['low'][i]:>9,} "
+              f"{bars['close'][i]:>9,} {bars['avg'][i]:>9,} {bars['count'][i]:>5}")
+
+
+if __name__ == "__main__":
+    main()
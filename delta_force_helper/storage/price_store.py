@@ -0,0 +1,259 @@
+"""
+价格样本数据库（SQLite，WAL 模式）
+- 每张截图的价格追加写入，一次事务只写新增的几行（原来每张截图都重写整个 price_history.json）
+- WAL 模式下程序中途崩溃也不会损坏已写入的数据
+- 第一次打开时自动从旧的 data/price_history.json 导入（原文件保留不动）
+- export_history() 导出与原 price_history.json 相同结构的字典，旧代码可以直接使用
+
+数据库文件：data/prices.db（同目录下的 prices.db-wal / prices.db-shm 是 SQLite 的临时文件）
+
+用法：python storage/price_store.py [--export 文件] [--migrate 文件]
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+
+DB_FILE = "data/prices.db"
+LEGACY_FILE = "data/price_history.json"
+
+# 导出旧格式时每个物品保留的最近样本数（与原 price_history.json 相同）
+HISTORY_LIMIT = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    name TEXT PRIMARY KEY,
+    first_seen TEXT NOT NULL,
+    last_update TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS samples_by_name ON samples (name, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class PriceStore:
+    """
+    价格样本数据库
+
+    legacy_file: 旧的 price_history.json，数据库为空时自动导入（None = 不导入）
+    """
+
+    def __init__(self, db_file=DB_FILE, legacy_file=LEGACY_FILE):
+        self.db_file = db_file
+
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 下 NORMAL 足够防止崩溃损坏，比 FULL 少一次 fsync
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        if legacy_file and Path(legacy_file).exists() and not self.get_meta('migrated_from') \
+                and self.sample_count() == 0:
+            self.migrate_json(legacy_file)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ============ 元数据 ============
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ============ 写入 ============
+
+    def _insert(self, rows):
+        """rows: [(名称, 价格, 时间, 置信度), ...]（在调用方的事务中执行）"""
+        self.conn.executemany(
+            "INSERT INTO samples (name, price, timestamp, confidence) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+        # 每个物品的首次/最近出现时间
+        seen = {}
+        for name, _, timestamp, _ in rows:
+            first, last = seen.get(name, (timestamp, timestamp))
+            seen[name] = (min(first, timestamp), max(last, timestamp))
+
+        self.conn.executemany(
+            """
+            INSERT INTO items (name, first_seen, last_update) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                first_seen = MIN(first_seen, excluded.first_seen),
+                last_update = MAX(last_update, excluded.last_update)
+            """,
+            [(name, first, last) for name, (first, last) in seen.items()]
+        )
+
+    def append(self, items_with_prices, timestamp=None):
+        """
+        追加一批价格（一张截图的识别结果），一个事务内完成
+
+        items_with_prices: [{'name', 'price', 'confidence'}, ...]
+        返回写入的行数
+        """
+        if not items_with_prices:
+            return 0
+
+        timestamp = timestamp or datetime.now().isoformat()
+        rows = [(item['name'], int(item['price']), timestamp, item.get('confidence'))
+                for item in items_with_prices]
+
+        with self.conn:
+            self._insert(rows)
+        return len(rows)
+
+    def migrate_json(self, json_file):
+        """从旧的 price_history.json 导入，返回导入的样本数"""
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️  无法读取旧的价格历史：{json_file}（{e}）")
+            return 0
+
+        rows = []
+        first_seen = {}
+        for name, data in history.items():
+            for sample in data.get('prices', []):
+                rows.append((name, int(sample['price']), sample['timestamp'],
+                             sample.get('confidence')))
+            if data.get('first_seen'):
+                first_seen[name] = data['first_seen']
+
+        with self.conn:
+            if rows:
+                self._insert(rows)
+            # 旧文件只保留了最近100条，首次出现时间以旧文件记录的为准
+            self.conn.executemany(
+                "UPDATE items SET first_seen = MIN(first_seen, ?) WHERE name = ?",
+                [(first, name) for name, first in first_seen.items()]
+            )
+            self.set_meta('migrated_from', str(json_file))
+
+        print(f"📦 已从 {json_file} 导入 {len(history)} 个物品、{len(rows)} 条价格记录")
+        return len(rows)
+
+    # ============ 读取 ============
+
+    def item_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def sample_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+
+    def names(self):
+        """所有物品名称"""
+        return [row[0] for row in self.conn.execute("SELECT name FROM items ORDER BY name")]
+
+    def samples(self, name, limit=None):
+        """某个物品的价格记录（从旧到新），limit 为只取最近几条"""
+        rows = self.conn.execute(
+            "SELECT price, timestamp, confidence FROM samples WHERE name = ? "
+            "ORDER BY id DESC LIMIT ?",
+            (name, -1 if limit is None else limit)
+        ).fetchall()
+        return [{'price': price, 'timestamp': timestamp, 'confidence': confidence}
+                for price, timestamp, confidence in reversed(rows)]
+
+    def all_samples(self):
+        """全部价格记录 [(名称, 价格, 时间, 置信度), ...]（按写入顺序）"""
+        return self.conn.execute(
+            "SELECT name, price, timestamp, confidence FROM samples ORDER BY id").fetchall()
+
+    def item_stats(self):
+        """每个物品的 (名称, 次数, 总价, 最低价, 最高价, 最近更新时间)，一次 GROUP BY"""
+        return self.conn.execute(
+            """
+            SELECT s.name, COUNT(*), SUM(s.price), MIN(s.price), MAX(s.price), i.last_update
+            FROM samples s JOIN items i ON i.name = s.name
+            GROUP BY s.name
+            """
+        ).fetchall()
+
+    def export_history(self, limit=HISTORY_LIMIT):
+        """
+        导出为原 price_history.json 的结构：
+        {名称: {'name', 'prices': [{'price', 'timestamp', 'confidence'}, ...], 'first_seen', 'last_update'}}
+
+        limit: 每个物品只取最近几条（None = 全部）
+        """
+        history = {
+            name: {'name': name, 'prices': [], 'first_seen': first_seen, 'last_update': last_update}
+            for name, first_seen, last_update in self.conn.execute(
+                "SELECT name, first_seen, last_update FROM items")
+        }
+
+        if limit is None:
+            rows = self.conn.execute(
+                "SELECT name, price, timestamp, confidence FROM samples ORDER BY name, id")
+        else:
+            rows = self.conn.execute(
+                """
+                SELECT name, price, timestamp, confidence FROM (
+                    SELECT name, price, timestamp, confidence, id,
+                           ROW_NUMBER() OVER (PARTITION BY name ORDER BY id DESC) AS recent
+                    FROM samples
+                )
+                WHERE recent <= ?
+                ORDER BY name, id
+                """,
+                (limit,)
+            )
+        for name, price, timestamp, confidence in rows:
+            history[name]['prices'].append(
+                {'price': price, 'timestamp': timestamp, 'confidence': confidence})
+
+        return history
+
+    def export_json(self, json_file, limit=HISTORY_LIMIT):
+        """导出为 price_history.json 格式的文件（给还在读旧文件的工具用）"""
+        Path(json_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(self.export_history(limit), f, ensure_ascii=False, indent=2)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="价格数据库")
+    parser.add_argument('--db', default=DB_FILE, help="数据库文件")
+    parser.add_argument('--migrate', metavar='JSON', help="从 price_history.json 格式的文件导入")
+    parser.add_argument('--export', metavar='JSON', help="导出为 price_history.json 格式")
+    args = parser.parse_args()
+
+    with PriceStore(args.db, legacy_file=None) as store:
+        if args.migrate:
+            store.migrate_json(args.migrate)
+
+        print(f"📊 {args.db}：{store.item_count()} 个物品，{store.sample_count()} 条价格记录")
+
+        if args.export:
+            store.export_json(args.export)
+            print(f"💾 已导出：{args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""
+列式价格时间序列（NumPy，按层级降采样）
+- 每个样本只占 14 字节：价格 int32、时间 int64（Unix 秒）、置信度 float16
+- 三层保留：原始样本（默认 7 天）-> 小时汇总（默认 30 天）-> 日汇总（一直保留）
+  汇总行记录开/高/低/收、次数、总价和平均置信度，可以继续合并成更粗的汇总
+- 同一层所有物品的数据放在一起，按 (物品, 时间) 排序，offsets 记录每个物品的起止行，
+  取一个物品的一段时间只需切片 + 二分查找
+- 列存成 .npy，默认用内存映射打开（mmap=False 时读进内存），启动时不需要解析任何数据
+
+写入：
+  append() 把新样本追加到定长记录的日志文件（只写新增的字节）
+  compact() 把日志合并进原始层、把过期的原始样本汇总成小时/日，写成新的一代文件，
+  最后原子替换 meta.json 切换到新一代；中途崩溃时旧一代和日志都还在
+
+目录结构（data/timeseries/）：
+  meta.json            当前代号
+  names.txt            物品名称（行号即物品编号，只追加）
+  log_<代号>.bin       还没合并的新样本
+  gen_<代号>/<层>.<列>.npy、<层>.offsets.npy
+
+用法：python storage/timeseries.py [--rebuild] [--benchmark]
+--rebuild 从价格数据库（data/prices.db）重建；--benchmark 模拟一年数据，看占用和加载时间
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+
+TIMESERIES_DIR = "data/timeseries"
+
+TIERS = ('raw', 'hourly', 'daily')
+TIER_SECONDS = {'hourly': 3600, 'daily': 86400}
+
+RAW_COLUMNS = {
+    'ts': np.int64,
+    'price': np.int32,
+    'conf': np.float16,
+}
+
+ROLLUP_COLUMNS = {
+    'ts': np.int64,      # 时间段开始
+    'open': np.int32,
+    'high': np.int32,
+    'low': np.int32,
+    'close': np.int32,
+    'count': np.int32,
+    'total': np.int64,   # 价格总和（平均价 = total / count）
+    'conf': np.float16,  # 平均置信度
+}
+
+TIER_COLUMNS = {'raw': RAW_COLUMNS, 'hourly': ROLLUP_COLUMNS, 'daily': ROLLUP_COLUMNS}
+
+# 日志文件的定长记录
+LOG_DTYPE = np.dtype([('item', '<i4'), ('ts', '<i8'), ('price', '<i4'), ('conf', '<f2')])
+
+
+def local_utc_offset():
+    """本地时区相对 UTC 的秒数（小时/日汇总按本地时间对齐）"""
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+
+def to_epoch(timestamps, utc_offset=None):
+    """本地时间的 ISO 时间字符串 -> Unix 秒（int64 数组）"""
+    if utc_offset is None:
+        utc_offset = local_utc_offset()
+    naive = np.array(timestamps, dtype='datetime64[s]').astype(np.int64)
+    return naive - utc_offset
+
+
+def empty_columns(columns):
+    return {name: np.zeros(0, dtype=dtype) for name, dtype in columns.items()}
+
+
+def raw_to_rollup(raw):
+    """原始样本转成汇总行的格式（每个样本一行）"""
+    price = raw['price'].astype(np.int32)
+    return {
+        'ts': raw['ts'],
+        'open': price,
+        'high': price,
+        'low': price,
+        'close': price,
+        'count': np.ones(len(price), dtype=np.int32),
+        'total': price.astype(np.int64),
+        'conf': raw['conf'],
+    }
+
+
+def rollup(items, rows, seconds, utc_offset):
+    """
+    按 (物品, 时间段) 合并汇总行
+
+    items / rows 需已按 (物品, 时间) 排序；已经是汇总的行可以再次合并
+    返回 (物品编号数组, 汇总列)
+    """
+    if not len(items):
+        return items, empty_columns(ROLLUP_COLUMNS)
+
+    buckets = (rows['ts'] + utc_offset) // seconds * seconds - utc_offset
+
+    new_group = np.ones(len(items), dtype=bool)
+    new_group[1:] = (items[1:] != items[:-1]) | (buckets[1:] != buckets[:-1])
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], len(items)) - 1
+
+    counts = np.add.reduceat(rows['count'].astype(np.int64), starts)
+    weighted_conf = np.add.reduceat(rows['conf'].astype(np.float32) * rows['count'], starts)
+
+    return items[starts], {
+        'ts': buckets[starts],
+        'open': rows['open'][starts],
+        'high': np.maximum.reduceat(rows['high'], starts),
+        'low': np.minimum.reduceat(rows['low'], starts),
+        'close': rows['close'][ends],
+        'count': counts.astype(np.int32),
+        'total': np.add.reduceat(rows['total'], starts),
+        'conf': (weighted_conf / counts).astype(np.float16),
+    }
+
+
+def sort_rows(items, rows):
+    """按 (物品, 时间) 排序（稳定排序，同一时间保持写入顺序）"""
+    order = np.lexsort((rows['ts'], items))
+    return items[order], {name: column[order] for name, column in rows.items()}
+
+
+def concat_rows(parts, columns):
+    """拼接多段 (物品编号, 列)"""
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return np.zeros(0, dtype=np.int32), empty_columns(columns)
+    items = np.concatenate([items for items, _ in parts]).astype(np.int32)
+    rows = {name: np.concatenate([r[name] for _, r in parts]).astype(dtype)
+            for name, dtype in columns.items()}
+    return items, rows
+
+
+class TimeSeriesStore:
+    """
+    列式价格时间序列
+
+    raw_days / hourly_days: 原始样本和小时汇总的保留天数（更早的合并到下一层）
+    mmap: True = 列文件用内存映射打开，False = 读进内存
+    readonly: 只读打开（不清理旧文件，其他程序可能正在合并），用于查询
+    """
+
+    def __init__(self, root=TIMESERIES_DIR, raw_days=7, hourly_days=30, mmap=True, readonly=False):
+        self.root = Path(root)
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+        self.mmap = mmap
+        self.readonly = readonly
+        self.utc_offset = local_utc_offset()
+
+        if not readonly:
+            self.root.mkdir(parents=True, exist_ok=True)
+
+        self.names = []
+        self.ids = {}
+        self.generation = 0
+        self.tiers = {}
+
+        self._load()
+
+    # ============ 文件 ============
+
+    @property
+    def meta_file(self):
+        return self.root / "meta.json"
+
+    @property
+    def names_file(self):
+        return self.root / "names.txt"
+
+    def _gen_dir(self, generation):
+        return self.root / f"gen_{generation}"
+
+    def _log_file(self, generation):
+        return self.root / f"log_{generation}.bin"
+
+    def _load(self):
+        """读取当前一代的文件（内存映射），清理崩溃留下的旧文件"""
+        if self.meta_file.exists():
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                self.generation = json.load(f)['generation']
+
+        if self.names_file.exists():
+            with open(self.names_file, 'r', encoding='utf-8') as f:
+                self.names = [line.rstrip('\n') for line in f if line.strip()]
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        gen_dir = self._gen_dir(self.generation)
+        mmap_mode = 'r' if self.mmap else None
+        for tier in TIERS:
+            offsets_file = gen_dir / f"{tier}.offsets.npy"
+            if offsets_file.exists():
+                offsets = np.load(offsets_file, mmap_mode=mmap_mode)
+                columns = {name: np.load(gen_dir / f"{tier}.{name}.npy", mmap_mode=mmap_mode)
+                           for name in TIER_COLUMNS[tier]}
+            else:
+                offsets = np.zeros(1, dtype=np.int64)
+                columns = empty_columns(TIER_COLUMNS[tier])
+            self.tiers[tier] = (offsets, columns)
+
+        if self.readonly:
+            return
+
+        # 其他代的目录和日志（切换代号后崩溃留下的）
+        for path in self.root.glob("gen_*"):
+            if path != gen_dir:
+                shutil.rmtree(path, ignore_errors=True)
+        for path in self.root.glob("log_*.bin"):
+            if path != self._log_file(self.generation):
+                path.unlink()
+
+    def disk_size(self):
+        """所有文件占用的字节数"""
+        return sum(path.stat().st_size for path in self.root.rglob("*") if path.is_file())
+
+    def reload(self):
+        """重新读取当前一代（其他程序合并之后）"""
+        self.tiers = {}
+        self._load()
+
+    # ============ 写入 ============
+
+    def _check_writable(self):
+        if self.readonly:
+            raise RuntimeError(f"时间序列是只读打开的：{self.root}")
+
+    def item_id(self, name, create=False):
+        """物品编号（create=True 时没有就新建）"""
+        item = self.ids.get(name)
+        if item is None and create:
+            self._check_writable()
+            item = len(self.names)
+            with open(self.names_file, 'a', encoding='utf-8') as f:
+                f.write(name + '\n')
+            self.names.append(name)
+            self.ids[name] = item
+        return item
+
+    def append(self, items_with_prices, timestamp=None):
+        """
+        追加一批价格（一张截图），只写日志末尾
+
+        items_with_prices: [{'name', 'price', 'confidence'}, ...]
+        """
+        if not items_with_prices:
+            return 0
+
+        timestamp = timestamp or datetime.now().isoformat()
+        records = np.zeros(len(items_with_prices), dtype=LOG_DTYPE)
+        records['item'] = [self.item_id(item['name'], create=True) for item in items_with_prices]
+        records['ts'] = to_epoch(timestamp, self.utc_offset)
+        records['price'] = [item['price'] for item in items_with_prices]
+        records['conf'] = [item.get('confidence') or 0.0 for item in items_with_prices]
+
+        self.append_records(records)
+        return len(records)
+
+    def append_records(self, records):
+        """直接追加 LOG_DTYPE 记录（批量导入用）"""
+        self._check_writable()
+        with open(self._log_file(self.generation), 'ab') as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read_log(self):
+        """还没合并的样本（末尾写了一半的记录会被忽略）"""
+        log_file = self._log_file(self.generation)
+        if not log_file.exists():
+            return np.zeros(0, dtype=LOG_DTYPE)
+        count = log_file.stat().st_size // LOG_DTYPE.itemsize
+        return np.fromfile(log_file, dtype=LOG_DTYPE, count=count)
+
+    # ============ 读取 ============
+
+    def tier_rows(self, tier):
+        """某一层的全部行：(每行的物品编号, 列)"""
+        offsets, columns = self.tiers[tier]
+        items = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+        return items, columns
+
+    def item_columns(self, tier, name):
+        """某个物品在某一层的列（按时间排序的切片，内存映射时不复制）"""
+        item = self.ids.get(name)
+        offsets, columns = self.tiers[tier]
+        if item is None or item >= len(offsets) - 1:
+            return empty_columns(TIER_COLUMNS[tier])
+        start, end = int(offsets[item]), int(offsets[item + 1])
+        return {column: values[start:end] for column, values in columns.items()}
+
+    def pending_columns(self, name):
+        """某个物品还在日志里的样本（原始样本格式，按时间排序）"""
+        item = self.ids.get(name)
+        log = self.read_log()
+        if item is None or not len(log):
+            return empty_columns(RAW_COLUMNS)
+        rows = np.sort(log[log['item'] == item], order='ts', kind='stable')
+        return {column: rows[column].astype(dtype) for column, dtype in RAW_COLUMNS.items()}
+
+    def sample_count(self):
+        """各层的行数（raw 包含日志中的样本）"""
+        counts = {tier: len(self.tiers[tier][1]['ts']) for tier in TIERS}
+        counts['raw'] += len(self.read_log())
+        return counts
+
+    # ============ 合并 ============
+
+    def compact(self, now=None):
+        """
+        合并日志、按保留期降采样，写成新的一代
+
+        返回各层的行数
+        """
+        self._check_writable()
+        now = time.time() if now is None else now
+        log = self.read_log()
+
+        # 原始层 + 日志
+        log_rows = (log['item'].astype(np.int32),
+                    {column: log[column].astype(dtype) for column, dtype in RAW_COLUMNS.items()})
+        raw_items, raw = sort_rows(*concat_rows([self.tier_rows('raw'), log_rows], RAW_COLUMNS))
+
+        # 过期的原始样本 -> 小时（截止时间对齐到整点，同一小时不会被拆开）
+        hourly_cutoff = self._align(now - self.raw_days * 86400, TIER_SECONDS['hourly'])
+        old = raw['ts'] < hourly_cutoff
+        moved = (raw_items[old], raw_to_rollup({c: v[old] for c, v in raw.items()}))
+        raw_items, raw = raw_items[~old], {c: v[~old] for c, v in raw.items()}
+
+        hourly_items, hourly = rollup(
+            *sort_rows(*concat_rows([self.tier_rows('hourly'), moved], ROLLUP_COLUMNS)),
+            TIER_SECONDS['hourly'], self.utc_offset)
+
+        # 过期的小时汇总 -> 日
+        daily_cutoff = self._align(now - self.hourly_days * 86400, TIER_SECONDS['daily'])
+        old = hourly['ts'] < daily_cutoff
+        moved = (hourly_items[old], {c: v[old] for c, v in hourly.items()})
+        hourly_items, hourly = hourly_items[~old], {c: v[~old] for c, v in hourly.items()}
+
+        daily_items, daily = rollup(
+            *sort_rows(*concat_rows([self.tier_rows('daily'), moved], ROLLUP_COLUMNS)),
+            TIER_SECONDS['daily'], self.utc_offset)
+
+        self._write_generation({
+            'raw': (raw_items, raw),
+            'hourly': (hourly_items, hourly),
+            'daily': (daily_items, daily),
+        })
+        return self.sample_count()
+
+    def _align(self, ts, seconds):
+        """对齐到本地时间的整点/整天"""
+        return int((ts + self.utc_offset) // seconds * seconds - self.utc_offset)
+
+    def _write_generation(self, tiers):
+        generation = self.generation + 1
+        gen_dir = self._gen_dir(generation)
+        if gen_dir.exists():
+            shutil.rmtree(gen_dir)
+        gen_dir.mkdir(parents=True)
+
+        item_count = len(self.names)
+        for tier, (items, columns) in tiers.items():
+            offsets = np.searchsorted(items, np.arange(item_count + 1), side='left').astype(np.int64)
+            np.save(gen_dir / f"{tier}.offsets.npy", offsets)
+            for column, dtype in TIER_COLUMNS[tier].items():
+                np.save(gen_dir / f"{tier}.{column}.npy", columns[column].astype(dtype))
+
+        # 原子切换到新一代，之后再删除旧文件
+        tmp_meta = self.meta_file.with_name("meta.json.tmp")
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({'generation': generation, 'utc_offset': self.utc_offset}, f)
+        os.replace(tmp_meta, self.meta_file)
+
+        self.reload()
+
+    # ============ 导入 ============
+
+    def rebuild_from(self, price_store):
+        """用价格数据库（storage.price_store）的全部样本重建，返回样本数"""
+        rows = price_store.all_samples()
+        if not rows:
+            return 0
+
+        names, prices, timestamps, confidences = zip(*rows)
+
+        # 清空现有数据（保留物品编号）
+        self.tiers = {tier: (np.zeros(1, dtype=np.int64), empty_columns(TIER_COLUMNS[tier]))
+                      for tier in TIERS}
+        log_file = self._log_file(self.generation)
+        if log_file.exists():
+            log_file.unlink()
+
+        records = np.zeros(len(rows), dtype=LOG_DTYPE)
+        records['item'] = [self.item_id(name, create=True) for name in names]
+        records['ts'] = to_epoch(list(timestamps), self.utc_offset)
+        records['price'] = prices
+        records['conf'] = [c or 0.0 for c in confidences]
+
+        self.append_records(records)
+        self.compact()
+        return len(rows)
+
+
+# ============ 测试 ============
+
+def benchmark(items=2000, days=365, samples_per_day=3000, seed=0):
+    """
+    模拟一年的价格，看各层行数、占用空间和加载时间
+
+    samples_per_day: 每天一共采集多少个价格（所有物品合计，约 300 张截图 × 10 个物品）
+    """
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    count = days * samples_per_day
+
+    with tempfile.TemporaryDirectory() as root:
+        store = TimeSeriesStore(root)
+        for i in range(items):
+            store.item_id(f"物品{i:05d}", create=True)
+
+        records = np.zeros(count, dtype=LOG_DTYPE)
+        # 热门物品出现得多（交易行常看的几页），按幂律分布抽物品
+        records['item'] = (rng.pareto(1.0, count) * items / 50).astype(np.int64) % items
+        records['ts'] = (now - rng.random(count) * days * 86400).astype(np.int64)
+        records['price'] = rng.integers(100, 1000000, count)
+        records['conf'] = rng.random(count)
+
+        start = time.perf_counter()
+        store.append_records(records)
+        store.compact(now)
+        compact_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reopened = TimeSeriesStore(root)
+        load_time = time.perf_counter() - start
+
+        counts = reopened.sample_count()
+        size = reopened.disk_size()
+
+    print(f"📈 {items} 个物品，{days} 天，每天 {samples_per_day} 个价格，共 {count:,} 个样本")
+    print(f"   原始 {counts['raw']:,} 行，小时 {counts['hourly']:,} 行，日 {counts['daily']:,} 行")
+    print(f"   占用 {size / 1024 / 1024:.1f} MB（原始样本全部保留约需 "
+          f"{count * 14 / 1024 / 1024:.1f} MB）")
+    print(f"   合并 {compact_time:.2f} 秒，打开 {load_time * 1000:.1f} ms")
+
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="列式价格时间序列")
+    parser.add_argument('--rebuild', action='store_true', help="从价格数据库重建")
+    parser.add_argument('--benchmark', action='store_true', help="模拟一年数据测试")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    store = TimeSeriesStore()
+
+    if args.rebuild:
+        # 允许直接运行 python storage/xxx.py 时导入项目内模块
+        project_root = Path(__file__).resolve().parent.parent
+        if str(project_root) not in sys.path:
+            sys.path.insert(0, str(project_root))
+        from storage.price_store import PriceStore
+
+        with PriceStore() as price_store:
+            print(f"🔄 已从价格数据库导入 {store.rebuild_from(price_store):,} 个样本")
+
+    counts = store.sample_count()
+    print(f"📊 {store.root}：{len(store.names)} 个物品")
+    print(f"   原始 {counts['raw']:,} 行，小时 {counts['hourly']:,} 行，日 {counts['daily']:,} 行")
+    print(f"   占用 {store.disk_size() / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import os
 import numpy as np
 from pathlib import Path
 
+from recognition.screen_classifier import SCREEN_TYPES, SCREEN_NAMES, make_thumbnail, read_image
+
 class TemplateExtractor:
     def __init__(self, raw_path, output_path):
         self.raw_path = raw_path
@@ -94,6 +96,51 @@ class TemplateExtractor:
         
         print(f"✅ 提取了 {count} 张UI元素")
     
+    def extract_screen_templates(self, labeled_dir="data_collection/labeled_screens", per_type=30):
+        """
+        提取界面类型样例（供 ScreenClassifier 使用）
+
+        labeled_dir 下按类型分好文件夹（market、loot、inventory、lobby、raid_hud），
+        每种类型均匀挑选最多 per_type 张，缩成小图保存到 <output>/screen/<类型>/
+        """
+        print(f"\n🔍 正在提取界面类型样例...")
+        
+        if not os.path.exists(labeled_dir):
+            print(f"❌ 找不到目录：{labeled_dir}")
+            return
+        
+        total = 0
+        for screen_type in SCREEN_TYPES:
+            type_dir = os.path.join(labeled_dir, screen_type)
+            if not os.path.isdir(type_dir):
+                continue
+            
+            files = sorted([f for f in os.listdir(type_dir) if f.endswith(('.png', '.jpg'))])
+            if not files:
+                continue
+            
+            # 均匀挑选（连续截图很相似，没必要全部保存）
+            step = max(1, len(files) // per_type)
+            selected_files = files[::step][:per_type]
+            
+            output_dir = os.path.join(self.output_path, 'screen', screen_type)
+            os.makedirs(output_dir, exist_ok=True)
+            
+            count = 0
+            for filename in selected_files:
+                img = read_image(os.path.join(type_dir, filename))
+                if img is None:
+                    continue
+                
+                output_file = os.path.join(output_dir, f"{screen_type}_{count:04d}.png")
+                cv2.imencode('.png', make_thumbnail(img))[1].tofile(output_file)
+                count += 1
+            
+            print(f"   {SCREEN_NAMES[screen_type]}：{count} 张")
+            total += count
+        
+        print(f"✅ 提取了 {total} 张界面样例")
+    
     def process_game(self, game_id):
         """处理单局游戏"""
         print(f"\n{'='*50}")
@@ -130,6 +177,12 @@ def main():
             print(f"{'='*50}")
         else:
             print("❌ 找不到数据目录")
+    elif sys.argv[1] == '--screens':
+        # 界面类型样例：python template_extractor.py --screens [分好类的截图文件夹]
+        if len(sys.argv) > 2:
+            extractor.extract_screen_templates(sys.argv[2])
+        else:
+            extractor.extract_screen_templates()
     else:
         game_id = sys.argv[1]
         extractor.process_game(game_id)
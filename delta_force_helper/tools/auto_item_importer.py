@@ -6,10 +6,19 @@
 """
 
 import json
-import re
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# 允许直接运行 python tools/xxx.py 时导入项目内模块
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from recognition.unknown_items import UnknownItemTracker
+from recognition.text_classifier import detect_category
+from storage.price_store import PriceStore
+
 class AutoItemImporter:
     """
     自动物品导入器
@@ -18,7 +27,8 @@ class AutoItemImporter:
     def __init__(self):
         self.items_db_file = "data/items/items_database.json"
         self.unknown_items_file = "data/unknown_items.json"
-        self.price_history_file = "data/price_history.json"
+        self.unknown_tracker = UnknownItemTracker(self.unknown_items_file)
+        self.price_db_file = "data/prices.db"
         
         # 加载现有数据
         self.items_db = self.load_items_database()
@@ -33,11 +43,9 @@ class AutoItemImporter:
         return {}
     
     def load_price_data(self):
-        """加载价格数据"""
-        if Path(self.price_history_file).exists():
-            with open(self.price_history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        """加载价格数据（结构同原 price_history.json）"""
+        with PriceStore(self.price_db_file) as store:
+            return store.export_history()
     
     def auto_import_unknown_items(self):
         """
@@ -50,13 +58,12 @@ class AutoItemImporter:
         4. 批量导入到数据库
         """
         
-        if not Path(self.unknown_items_file).exists():
-            print("❌ 未找到未知物品文件")
-            return
+        # 读取未知物品（快照 + 追加日志）
+        unknown_items = self.unknown_tracker.items()
         
-        # 读取未知物品
-        with open(self.unknown_items_file, 'r', encoding='utf-8') as f:
-            unknown_items = json.load(f)
+        if not unknown_items:
+            print("❌ 没有未知物品记录")
+            return
         
         print("="*60)
         print("🔄 开始自动导入未知物品")
@@ -215,35 +222,7 @@ class AutoItemImporter:
     
     def determine_category(self, item_name):
         """根据名称判断物品类别"""
-        
-        weapon_keywords = [
-            '步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋',
-            '机枪', '榴弹', '火箭'
-        ]
-        
-        armor_keywords = ['头盔', '护甲', '背心', '防弹']
-        
-        equipment_keywords = ['背包', '腰带', '手套', '靴子', '护目镜']
-        
-        material_keywords = ['砖', '板', '金属', '芯片', '零件', '电路']
-        
-        for kw in weapon_keywords:
-            if kw in item_name:
-                return 'weapon'
-        
-        for kw in armor_keywords:
-            if kw in item_name:
-                return 'armor'
-        
-        for kw in equipment_keywords:
-            if kw in item_name:
-                return 'equipment'
-        
-        for kw in material_keywords:
-            if kw in item_name:
-                return 'material'
-        
-        return 'unknown'
+        return detect_category(item_name)
     
     def save_items_database(self):
         """保存物品数据库"""
@@ -263,8 +242,7 @@ class AutoItemImporter:
     
     def clear_unknown_items(self):
         """清空未知物品列表（可选）"""
-        with open(self.unknown_items_file, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+        self.unknown_tracker.clear()
         
         print("🗑️  已清空未知物品列表")
 
@@ -0,0 +1,125 @@
+"""
+预处理方案对比工具
+- 对同一批截图分别用每种预处理方案做OCR
+- 统计OCR耗时和物品匹配情况（以不预处理的结果为基准）
+- 推荐在保持识别率的前提下最快的方案
+
+用法：python tools/ocr_chain_benchmark.py 截图文件夹 [--chains none gray half_gray] [--limit 30]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 允许直接运行 python tools/xxx.py 时导入项目内模块
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from recognition.preprocess import load_chains
+from recognition.file_manifest import list_screenshots
+from tools.screenshot_analyzer import ScreenshotAnalyzer
+
+
+def matched_items(analyzer, ocr_results):
+    """OCR结果中能匹配到的物品名称集合"""
+    names = set()
+
+    for (_, text, confidence) in ocr_results:
+        text = text.strip()
+        if len(text) < 2 or confidence < 0.4:
+            continue
+
+        item = analyzer.match_item(text)
+        if item:
+            names.add(item['name'])
+
+    return names
+
+
+def benchmark_chain(analyzer, chain, images):
+    """
+    用一种预处理方案识别所有图片
+
+    返回 (每张耗时列表, 每张匹配到的物品集合列表)
+    """
+    # 直接用底层模型，不走结果缓存，保证测到真实耗时
+    reader = analyzer.ocr_reader.reader
+
+    latencies = []
+    matches = []
+
+    for img in images:
+        start = time.perf_counter()
+        results = chain.readtext(reader, img)
+        latencies.append(time.perf_counter() - start)
+        matches.append(matched_items(analyzer, results))
+
+    return latencies, matches
+
+
+def main():
+    import argparse
+
+    chains = load_chains()
+
+    parser = argparse.ArgumentParser(description="OCR预处理方案对比")
+    parser.add_argument('folder', help="截图文件夹")
+    parser.add_argument('--chains', nargs='+', default=list(chains), choices=list(chains),
+                        help="要对比的方案（默认全部）")
+    parser.add_argument('--limit', type=int, default=30, help="最多使用多少张截图")
+    parser.add_argument('--min-recall', type=float, default=0.98,
+                        help="推荐方案需要达到的识别率（相对不预处理）")
+    args = parser.parse_args()
+
+    analyzer = ScreenshotAnalyzer(use_cache=False)
+    analyzer.ocr_reader.warm_up()
+
+    images = []
+    for path in list_screenshots(args.folder)[:args.limit]:
+        img = analyzer.read_image_chinese_path(path)
+        if img is not None:
+            images.append(img)
+
+    if not images:
+        print(f"❌ 文件夹中没有找到截图：{args.folder}")
+        return
+
+    print(f"📁 使用 {len(images)} 张截图对比 {len(args.chains)} 种方案\n")
+
+    # 基准：不预处理
+    names = ['none'] + [name for name in args.chains if name != 'none']
+    _, baseline = benchmark_chain(analyzer, chains['none'], images)
+    baseline_total = sum(len(m) for m in baseline)
+
+    report = []
+    for name in names:
+        latencies, matches = benchmark_chain(analyzer, chains[name], images)
+
+        found = sum(len(m & b) for m, b in zip(matches, baseline))
+        extra = sum(len(m - b) for m, b in zip(matches, baseline))
+        recall = found / baseline_total if baseline_total else 1.0
+        avg_latency = sum(latencies) / len(latencies)
+
+        report.append((name, avg_latency, recall, extra))
+        print(f"   {name:<14} 平均 {avg_latency * 1000:8.1f} ms  识别率 {recall:6.1%}  新增 {extra}")
+
+    print("\n" + "="*60)
+    print("📊 预处理方案对比（按耗时排序）")
+    print("="*60)
+
+    report.sort(key=lambda r: r[1])
+    base_latency = next(r[1] for r in report if r[0] == 'none')
+
+    for name, latency, recall, extra in report:
+        print(f"{name:<14} {latency * 1000:8.1f} ms  加速 {base_latency / latency:4.1f}x  "
+              f"识别率 {recall:6.1%}  新增物品 {extra}")
+
+    best = next((r for r in report if r[2] >= args.min_recall), None)
+    if best:
+        print(f"\n💡 推荐方案：{best[0]}（识别率 >= {args.min_recall:.0%} 中最快）")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,36 @@ import cv2
 import numpy as np
 from pathlib import Path
 import json
-import easyocr
+import sys
 from PIL import Image
 import re
 from datetime import datetime
 
+# 允许直接运行 python tools/xxx.py 时导入项目内模块
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from recognition.ocr_engine import get_ocr_engine
+from recognition.ocr_cache import cached_reader
+from recognition.preprocess import wrap_reader, load_chains
+from recognition.frame_dedup import FrameDeduplicator
+from recognition.image_loader import PrefetchLoader
+from recognition.profiler import profiled, enable_profiling
+from recognition.digit_recognizer import DigitRecognizer
+from recognition.screen_classifier import ScreenClassifier, SCREEN_NAMES, UNKNOWN
+from recognition.region_proposal import load_market_columns, crop_box, offset_ocr_results
+from recognition.text_classifier import is_item_text
+from recognition.price_pairing import PricePairing, nearest_price
+from recognition.file_manifest import ProcessedManifest, list_screenshots, parse_since
+from storage.price_store import PriceStore
+from storage.price_aggregates import PriceAggregates
+from storage.timeseries import TimeSeriesStore
+
+# 标题栏高度（占截图高度的比例），用其中的文字判断是否交易行
+HEADER_RATIO = 0.15
+
+
 class PriceTracker:
     """
     价格追踪器
@@ -19,32 +44,66 @@ class PriceTracker:
     - 分析价格趋势
     """
     
-    def __init__(self):
+    def __init__(self, use_cache=True, preprocess=None, use_digits=False, flush_interval=30.0):
+        """
+        preprocess: OCR前预处理方案（None = 原图，见 recognition.preprocess）
+        use_digits: 价格列用数字识别器读取（只有名称列走 easyocr）；
+                    需要先在 data/market_columns.json 中校准列位置，列位置不对会丢行
+        """
         print("🔧 初始化价格追踪系统...")
         
-        # OCR引擎
-        print("   加载OCR引擎...")
-        self.ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=False)
+        # OCR引擎（与截图分析共用一份模型，首次识别时才加载）
+        self.ocr_reader = get_ocr_engine()
+        
+        # OCR结果缓存（同一张截图不重复识别，只对这个追踪器生效）
+        self.cached_reader = cached_reader(self.ocr_reader, use_cache)
+        
+        # OCR前预处理（缩小、灰度、二值化等）
+        self.text_reader = wrap_reader(self.cached_reader, preprocess)
+        
+        # 界面分类（有样例时不用OCR判断是否交易行）
+        self.screen_classifier = ScreenClassifier()
         
-        # 价格数据库文件
-        self.price_db_file = "data/price_history.json"
+        # 物品名称与价格配对
+        self.pairing = PricePairing()
+        
+        # 价格列数字识别（需要该分辨率的列位置配置，见 recognition.region_proposal）
+        self.digit_recognizer = DigitRecognizer() if use_digits else None
+        self.market_columns = load_market_columns() if use_digits else {}
+        
+        # 价格数据库（SQLite，第一次运行时自动导入旧的 price_history.json）
+        self.price_db_file = "data/prices.db"
         self.current_prices_file = "data/current_prices.json"
         
+        # 当前价格表最多每 flush_interval 秒写一次（批量结束时一定写）
+        self.flush_interval = flush_interval
+        
+        # 已处理截图清单（增量采集）
+        self.manifest_file = "data/manifests/price_tracker.jsonl"
+        
         # 加载历史数据
         self.load_price_history()
         
         print("✅ 初始化完成！\n")
     
     def load_price_history(self):
-        """加载价格历史数据"""
-        if Path(self.price_db_file).exists():
-            with open(self.price_db_file, 'r', encoding='utf-8') as f:
-                self.price_history = json.load(f)
-            print(f"   ✅ 已加载 {len(self.price_history)} 个物品的历史价格")
+        """打开价格数据库，恢复每个物品的价格统计"""
+        self.price_store = PriceStore(self.price_db_file)
+        self.price_aggregates = PriceAggregates.from_store(
+            self.price_store, self.current_prices_file, self.flush_interval)
+        
+        # 列式时间序列（长期历史，按小时/天降采样）；第一次运行时从数据库导入
+        self.timeseries = TimeSeriesStore()
+        if not self.timeseries.names and len(self.price_aggregates):
+            count = self.timeseries.rebuild_from(self.price_store)
+            print(f"   📈 已把 {count} 条价格记录导入时间序列")
+        
+        if self.price_aggregates:
+            print(f"   ✅ 已加载 {len(self.price_aggregates)} 个物品的历史价格")
         else:
-            self.price_history = {}
             print("   ℹ️  价格历史数据库为空，开始新记录")
     
+    @profiled('read_image_chinese_path')
     def read_image_chinese_path(self, image_path):
         """读取中文路径图片"""
         try:
@@ -63,39 +122,173 @@ class PriceTracker:
             ...
         ]
         """
+        return self.analyze_market_image(image_path, self.read_image_chinese_path(image_path))
+    
+    def analyze_market_image(self, image_path, img):
+        """分析已读取的交易行截图（返回格式同 analyze_market_screenshot）"""
         print(f"\n📸 分析截图：{Path(image_path).name}")
         
-        img = self.read_image_chinese_path(image_path)
-        
         if img is None:
             print(f"   ❌ 无法读取图片")
             return []
         
         print(f"   ✅ 图片尺寸：{img.shape[1]}x{img.shape[0]}")
         
-        # 检测是否是交易行界面
-        if not self.is_market_interface(img):
-            print(f"   ℹ️  非交易行界面，跳过")
+        # 界面分类（有样例时不用OCR就能判断）
+        screen_type = self.classify_screen(img)
+        
+        if screen_type not in ('market', UNKNOWN):
+            print(f"   ℹ️  {SCREEN_NAMES[screen_type]}界面，跳过")
             return []
         
-        print(f"   🏪 检测到交易行界面")
         print(f"   🔍 OCR识别中...")
         
-        # OCR识别
-        ocr_results = self.ocr_reader.readtext(img)
+        # 只OCR一次：整张图，或按列识别时名称列与标题栏拼在一起；
+        # 用其中标题栏部分的文字判断是否交易行
+        ocr_results = self.read_market_names(img, with_header=screen_type == UNKNOWN)
+        if screen_type == UNKNOWN and not self.is_market_interface(img, ocr_results):
+            print(f"   ℹ️  非交易行界面，跳过")
+            return []
+        
+        # 价格列用数字识别（确认是交易行之后才读）
+        ocr_results.extend(self.read_market_prices(img))
+        
+        print(f"   🏪 检测到交易行界面")
         
         # 提取物品和价格
         items_with_prices = self.extract_items_and_prices(ocr_results)
         
         return items_with_prices
     
-    def is_market_interface(self, img):
-        """检测是否是交易行界面"""
+    def classify_screen(self, img):
+        """
+        界面分类，返回类型（见 recognition.screen_classifier）
+        
+        没有样例或分类不确定时返回 unknown，需要用OCR判断
+        """
+        if not self.screen_classifier.is_ready:
+            return UNKNOWN
+        
+        screen_type, score = self.screen_classifier.classify(img)
+        if screen_type != UNKNOWN:
+            print(f"   🖼️  界面分类：{SCREEN_NAMES[screen_type]}（相似度 {score:.2f}）")
+        return screen_type
+    
+    def market_columns_for(self, img):
+        """该分辨率的交易行列位置（不使用数字识别或没有配置时返回 None）"""
+        if self.digit_recognizer is None:
+            return None
         height, width = img.shape[:2]
-        top_region = img[0:int(height*0.15), :]
+        return self.market_columns.get((width, height))
+    
+    def read_market_names(self, img, with_header=False):
+        """
+        识别交易行名称文字（easyocr，一次调用）
+
+        有该分辨率的列位置配置时只识别名称列；with_header 时把顶部标题栏
+        拼在名称列上方一起识别，结果里同时有标题栏文字，用来判断是否交易行。
+        没有列位置配置时整张图识别（已包含标题栏和价格）
+        """
+        columns = self.market_columns_for(img)
+        
+        if columns is None:
+            return self.text_reader.readtext(img)
+        
+        name_img, name_x, name_y = crop_box(img, columns['name'])
+        if not with_header:
+            return offset_ocr_results(self.text_reader.readtext(name_img), name_x, name_y)
+        
+        # 标题栏（整行宽度）在上、名称列在下，中间留空白，避免两部分的文字连成一行
+        header = img[0:int(img.shape[0] * HEADER_RATIO)]
+        gap = 32
+        top = header.shape[0] + gap
+        canvas = np.zeros((top + name_img.shape[0], max(header.shape[1], name_img.shape[1]))
+                          + img.shape[2:], dtype=img.dtype)
+        canvas[:header.shape[0], :header.shape[1]] = header
+        canvas[top:, :name_img.shape[1]] = name_img
+        
+        name_right = name_x + name_img.shape[1]
+        name_bottom = name_y + name_img.shape[0]
+        
+        results = []
+        for bbox, text, confidence in self.text_reader.readtext(canvas):
+            cx = sum(p[0] for p in bbox) / 4
+            cy = sum(p[1] for p in bbox) / 4
+            if cy >= top - gap / 2:
+                results.extend(offset_ocr_results([(bbox, text, confidence)], name_x, name_y - top))
+            elif not (name_x <= cx < name_right and name_y <= cy < name_bottom):
+                # 标题栏与名称列重叠的部分在名称列里已经识别过
+                results.append((bbox, text, confidence))
+        
+        return results
+    
+    def read_market_prices(self, img):
+        """识别交易行价格列（没有列位置配置时价格已在 read_market_names 的整张图结果里）"""
+        columns = self.market_columns_for(img)
+        
+        if columns is None:
+            return []
+        
+        price_img, price_x, price_y = crop_box(img, columns['price'])
+        return offset_ocr_results(self.read_prices(price_img), price_x, price_y)
+    
+    @profiled('read_prices')
+    def read_prices(self, column):
+        """
+        识别价格列（坐标相对于这一列）
+        
+        数字识别失败的格子交给 easyocr；easyocr 高置信度读出的价格用来学习数字模板。
+        模板还不全（0-9 没有都学到）时整列直接一次 easyocr，不逐格尝试
+        """
+        if not self.digit_recognizer.is_ready:
+            results = self.text_reader.readtext(column)
+            for bbox, text, confidence in results:
+                xs = [int(p[0]) for p in bbox]
+                ys = [int(p[1]) for p in bbox]
+                cell = column[max(0, min(ys)):max(ys), max(0, min(xs)):max(xs)]
+                self.learn_digits(cell, text, confidence)
+            return results
+        
+        results = []
+        
+        for bbox, text, confidence, (x, y, w, h) in self.digit_recognizer.read_column(column):
+            if text is not None:
+                results.append((bbox, text, confidence))
+                continue
+            
+            cell = column[y:y + h, x:x + w]
+            cell_results = self.text_reader.readtext(cell)
+            results.extend(offset_ocr_results(cell_results, x, y))
+            
+            if len(cell_results) == 1:
+                _, cell_text, cell_confidence = cell_results[0]
+                self.learn_digits(cell, cell_text, cell_confidence)
+        
+        return results
+    
+    def learn_digits(self, cell, text, confidence):
+        """easyocr 高置信度读出的纯数字价格用来学习数字模板"""
+        text = text.strip()
+        if cell.size and confidence >= 0.9 and re.fullmatch(r'[\d,\.]+', text):
+            self.digit_recognizer.learn(cell, text)
+    
+    @profiled('is_market_interface')
+    def is_market_interface(self, img, ocr_results=None):
+        """
+        检测是否是交易行界面（看顶部 15% 标题栏里的文字）
+        
+        ocr_results: 整张图的OCR结果；传入时只取标题栏内的文字框，不再单独OCR
+        """
+        header_height = int(img.shape[0] * HEADER_RATIO)
         
         try:
-            results = self.ocr_reader.readtext(top_region)
+            if ocr_results is None:
+                results = self.text_reader.readtext(img[0:header_height, :])
+            else:
+                results = [
+                    (bbox, text, confidence) for (bbox, text, confidence) in ocr_results
+                    if sum(p[1] for p in bbox) / 4 < header_height
+                ]
             texts = [text for (_, text, _) in results]
             
             keywords = ['交易行', '仓库', '特勤处', '开始游戏', '装备', '武器', '枪械']
@@ -108,6 +301,7 @@ class PriceTracker:
         
         return False
     
+    @profiled('extract_items_and_prices')
     def extract_items_and_prices(self, ocr_results):
         """
         从OCR结果中提取物品名称和对应价格
@@ -158,44 +352,25 @@ class PriceTracker:
         print(f"   找到 {len(item_candidates)} 个物品候选")
         print(f"   找到 {len(price_candidates)} 个价格候选")
         
-        # 为每个物品匹配最近的价格
-        for item in item_candidates:
-            matched_price = self.find_nearest_price(item, price_candidates)
+        # 物品和价格一一配对（一个价格只配给一个物品）
+        for item_index, price_index, _ in self.pairing.pair(item_candidates, price_candidates):
+            item = item_candidates[item_index]
+            matched_price = price_candidates[price_index]
             
-            if matched_price:
-                items_with_prices.append({
-                    'name': item['text'],
-                    'price': matched_price['price'],
-                    'confidence': min(item['confidence'], matched_price['confidence']),
-                    'timestamp': datetime.now().isoformat()
-                })
-                
-                print(f"   💰 {item['text']:<20} {matched_price['price']:>10,} 币")
+            items_with_prices.append({
+                'name': item['text'],
+                'price': matched_price['price'],
+                'confidence': min(item['confidence'], matched_price['confidence']),
+                'timestamp': datetime.now().isoformat()
+            })
+            
+            print(f"   💰 {item['text']:<20} {matched_price['price']:>10,} 币")
         
         return items_with_prices
     
     def is_item_name(self, text):
         """判断文本是否是物品名称"""
-        weapon_keywords = ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋', 
-                          '机枪', '榴弹', '火箭', '匕首', '刀']
-        
-        equipment_keywords = ['头盔', '护甲', '背包', '护目镜', '战术', '装备', 
-                            '背心', '腰带', '手套', '靴子']
-        
-        material_keywords = ['砖', '板', '金属', '芯片', '零件', '电路', '材料',
-                           '合金', '晶体', '药剂', '文件', '情报']
-        
-        all_keywords = weapon_keywords + equipment_keywords + material_keywords
-        
-        # 包含关键词
-        if any(kw in text for kw in all_keywords):
-            return True
-        
-        # 武器型号格式
-        if re.match(r'^[A-Z0-9\-]+$', text) and 2 <= len(text) <= 10:
-            return True
-        
-        return False
+        return is_item_text(text)
     
     def extract_numbers(self, text):
         """
@@ -228,45 +403,18 @@ class PriceTracker:
     
     def find_nearest_price(self, item, price_candidates):
         """
-        为物品找到最近的价格
+        为单个物品找到最近的价格（不考虑其他物品，价格可能被重复使用）
         
         策略：
         1. 优先找右侧的价格（交易行通常在右边显示价格）
         2. 垂直距离要近（同一行）
         3. 水平距离合理（不要太远）
-        """
-        if not price_candidates:
-            return None
         
-        best_match = None
-        best_score = float('inf')
-        
-        for price in price_candidates:
-            # 计算距离
-            dx = price['x'] - item['x']
-            dy = abs(price['y'] - item['y'])
-            
-            # 价格应该在物品右侧
-            if dx < 0:
-                continue
-            
-            # 垂直距离要小（同一行）
-            if dy > 50:  # 像素阈值
-                continue
-            
-            # 水平距离合理（不要太远）
-            if dx > 800:  # 像素阈值
-                continue
-            
-            # 综合评分（垂直距离权重更高）
-            score = dy * 3 + dx * 0.5
-            
-            if score < best_score:
-                best_score = score
-                best_match = price
-        
-        return best_match
+        整页配对请用 self.pairing.pair（见 recognition.price_pairing）
+        """
+        return nearest_price(item, price_candidates)
     
+    @profiled('record_prices')
     def record_prices(self, items_with_prices):
         """
         记录价格到历史数据库
@@ -276,49 +424,23 @@ class PriceTracker:
         
         timestamp = datetime.now().isoformat()
         
-        for item in items_with_prices:
-            name = item['name']
-            price = item['price']
-            
-            # 初始化物品记录
-            if name not in self.price_history:
-                self.price_history[name] = {
-                    'name': name,
-                    'prices': [],
-                    'first_seen': timestamp,
-                    'last_update': timestamp
-                }
-            
-            # 添加价格记录
-            self.price_history[name]['prices'].append({
-                'price': price,
-                'timestamp': timestamp,
-                'confidence': item['confidence']
-            })
-            
-            self.price_history[name]['last_update'] = timestamp
-            
-            # 只保留最近100条记录（避免文件过大）
-            if len(self.price_history[name]['prices']) > 100:
-                self.price_history[name]['prices'] = \
-                    self.price_history[name]['prices'][-100:]
-        
-        # 保存到文件
-        self.save_price_history()
+        # 追加到数据库
+        self.save_price_history(items_with_prices, timestamp)
         
         # 更新当前价格表
+        self.price_aggregates.add(items_with_prices, timestamp)
         self.update_current_prices()
         
         print(f"\n💾 已记录 {len(items_with_prices)} 个物品的价格")
     
-    def save_price_history(self):
-        """保存价格历史"""
-        Path(self.price_db_file).parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(self.price_db_file, 'w', encoding='utf-8') as f:
-            json.dump(self.price_history, f, ensure_ascii=False, indent=2)
+    @profiled('save_price_history')
+    def save_price_history(self, items_with_prices, timestamp):
+        """把这一批价格追加到数据库和时间序列（只写新增的行）"""
+        self.price_store.append(items_with_prices, timestamp)
+        self.timeseries.append(items_with_prices, timestamp)
     
-    def update_current_prices(self):
+    @profiled('update_current_prices')
+    def update_current_prices(self, force=False):
         """
         更新当前价格表（用于快速查询）
         
@@ -328,74 +450,86 @@ class PriceTracker:
         - 最高价
         - 平均价
         - 价格趋势
+        
+        只重新计算有新价格的物品；文件按 flush_interval 写出，force=True 时立即写出
         """
-        current_prices = {}
+        updated = self.price_aggregates.refresh()
         
-        for name, data in self.price_history.items():
-            prices = [p['price'] for p in data['prices']]
-            
-            if not prices:
-                continue
-            
-            latest_price = prices[-1]
-            min_price = min(prices)
-            max_price = max(prices)
-            avg_price = sum(prices) / len(prices)
-            
-            # 计算趋势（最近5次 vs 之前平均）
-            recent_prices = prices[-5:] if len(prices) >= 5 else prices
-            recent_avg = sum(recent_prices) / len(recent_prices)
-            
-            if len(prices) > 5:
-                old_avg = sum(prices[:-5]) / len(prices[:-5])
-                trend_percent = ((recent_avg - old_avg) / old_avg) * 100
-                
-                if trend_percent > 5:
-                    trend = 'rising'  # 上涨
-                elif trend_percent < -5:
-                    trend = 'falling'  # 下跌
-                else:
-                    trend = 'stable'  # 稳定
-            else:
-                trend = 'unknown'
-            
-            current_prices[name] = {
-                'name': name,
-                'latest_price': latest_price,
-                'min_price': min_price,
-                'max_price': max_price,
-                'avg_price': int(avg_price),
-                'trend': trend,
-                'sample_count': len(prices),
-                'last_update': data['last_update']
-            }
-        
-        # 保存当前价格表
-        with open(self.current_prices_file, 'w', encoding='utf-8') as f:
-            json.dump(current_prices, f, ensure_ascii=False, indent=2)
-        
-        print(f"💾 已更新当前价格表：{self.current_prices_file}")
-    
-    def batch_analyze(self, screenshots_folder):
-        """批量分析截图文件夹"""
-        folder = Path(screenshots_folder)
-        screenshots = list(folder.glob("*.png")) + list(folder.glob("*.jpg"))
+        if self.price_aggregates.flush(force=force):
+            print(f"💾 已更新当前价格表：{self.current_prices_file}")
+        
+        return updated
+    
+    def batch_analyze(self, screenshots_folder, incremental=True, since=None,
+                      dedup_threshold=None):
+        """
+        批量分析截图文件夹
+
+        incremental: 只分析新增或修改过的截图（False = 全部重新分析）
+        since: 只分析该时间戳之后修改的截图
+        dedup_threshold: 近似重复帧的汉明距离阈值（None = 不去重）
+        """
+        screenshots = list_screenshots(screenshots_folder)
         
         if not screenshots:
             print(f"❌ 文件夹中没有找到截图：{screenshots_folder}")
             return
         
-        print(f"📁 找到 {len(screenshots)} 张截图")
+        manifest = ProcessedManifest(self.manifest_file)
+        pending = manifest.select(screenshots, since=since, incremental=incremental)
+        
+        print(f"📁 找到 {len(screenshots)} 张截图，需要分析 {len(pending)} 张")
+        
+        if not pending:
+            print("✅ 没有新的截图需要分析")
+            return
+        
+        manifest.begin_batch(len(pending))
+        
+        # 近似重复帧只分析代表帧（重复帧的价格不重复记录）
+        duplicates = {}
+        if dedup_threshold is not None:
+            deduplicator = FrameDeduplicator(threshold=dedup_threshold)
+            pending, duplicates = deduplicator.group(pending)
+            print(f"🔁 去重：跳过 {len(duplicates)} 张近似重复截图，实际分析 {len(pending)} 张")
         
         all_items = []
         
-        for screenshot in screenshots:
-            items = self.analyze_market_screenshot(screenshot)
+        # 后台线程提前读取解码后面的截图，与OCR同时进行
+        loader = PrefetchLoader(pending, prefetch=4, workers=2, read=self.read_image_chinese_path)
+        
+        for screenshot, img in loader:
+            items = self.analyze_market_image(screenshot, img)
             
             if items:
                 all_items.extend(items)
                 # 实时记录（避免数据丢失）
                 self.record_prices(items)
+                manifest.record(screenshot, 'recorded', item_count=len(items))
+            else:
+                manifest.record(screenshot, 'no_prices')
+        
+        for screenshot, representative in duplicates.items():
+            manifest.record(screenshot, 'duplicate', representative=str(representative))
+        
+        manifest.end_batch()
+        
+        # 批量结束时写出当前价格表，时间序列合并日志并降采样
+        self.update_current_prices(force=True)
+        self.timeseries.compact()
+        
+        if self.digit_recognizer is not None:
+            learned = self.digit_recognizer.save()
+            if learned:
+                print(f"\n🔢 学到 {learned} 个新的数字模板（{self.digit_recognizer.templates_dir}）")
+        
+        cache = self.cached_reader
+        if cache is not self.ocr_reader and cache.hits + cache.misses:
+            print(f"\n📦 OCR缓存：命中 {cache.hits} 次，未命中 {cache.misses} 次")
+        
+        stats = loader.get_stats()
+        print(f"📥 预读取：平均 {stats['avg_depth']}/{stats['prefetch']} 张已就绪，"
+              f"等待读取 {stats['empty_waits']} 次（{stats['wait_time']:.2f} 秒）")
         
         # 显示汇总
         if all_items:
@@ -466,26 +600,120 @@ class PriceTracker:
         print("="*60)
 
 
+def verify_single_pass(tracker, screenshots_folder, limit=None):
+    """
+    验证单次OCR的交易行检测与原来的两次OCR结果一致
+
+    原来：先OCR顶部 15% 判断是否交易行，是的话再OCR整张图（或名称列）
+    现在：与 analyze_market_image 相同的一次OCR（整张图，或 --digits 时标题栏+名称列拼图），
+    取标题栏内的文字框判断
+    名称和价格的OCR结果两种方式相同，只需要比较交易行判断是否一致
+    """
+    import time
+    
+    screenshots = list_screenshots(screenshots_folder)[:limit]
+    if not screenshots:
+        print(f"❌ 文件夹中没有找到截图：{screenshots_folder}")
+        return
+    
+    print(f"🔬 验证 {len(screenshots)} 张截图的交易行检测...\n")
+    
+    mismatches = []
+    market_count = 0
+    full_time = 0.0
+    header_time = 0.0
+    
+    for screenshot in screenshots:
+        img = tracker.read_image_chinese_path(screenshot)
+        if img is None:
+            continue
+        
+        start = time.perf_counter()
+        ocr_results = tracker.read_market_names(img, with_header=True)
+        full_time += time.perf_counter() - start
+        single_pass = tracker.is_market_interface(img, ocr_results)
+        
+        start = time.perf_counter()
+        two_pass = tracker.is_market_interface(img)
+        header_time += time.perf_counter() - start
+        
+        if two_pass:
+            market_count += 1
+        if single_pass != two_pass:
+            mismatches.append((screenshot.name, two_pass, single_pass))
+    
+    print("="*60)
+    print(f"交易行截图：{market_count}/{len(screenshots)}")
+    print(f"判断一致：{len(screenshots) - len(mismatches)}/{len(screenshots)}")
+    for name, two_pass, single_pass in mismatches:
+        print(f"   ⚠️  {name}：两次OCR={two_pass}，单次OCR={single_pass}")
+    
+    if screenshots:
+        print(f"\n标题栏OCR：平均 {header_time / len(screenshots) * 1000:.0f} ms/张（现在省掉）")
+        print(f"单次OCR：  平均 {full_time / len(screenshots) * 1000:.0f} ms/张")
+    print("="*60)
+    
+    return mismatches
+
+
 def main():
     """主函数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="三角洲行动 - 价格自动采集系统")
+    parser.add_argument('folder', nargs='?', default="D:/游戏截图/物品识别/",
+                        help="截图文件夹")
+    parser.add_argument('--since', default=None,
+                        help="只分析该时间之后修改的截图（如 2025-11-20 或 2025-11-20T18:00）")
+    parser.add_argument('--full', action='store_true',
+                        help="忽略已处理清单，全部重新分析")
+    parser.add_argument('--preprocess', choices=list(load_chains()), default=None,
+                        help="OCR前预处理方案（默认原图）")
+    parser.add_argument('--dedup', type=int, nargs='?', const=5, default=None,
+                        metavar='THRESHOLD',
+                        help="跳过近似重复的连续截图（汉明距离阈值，默认5）")
+    parser.add_argument('--digits', action='store_true',
+                        help="价格列用数字识别器读取（需要先在 data/market_columns.json 校准列位置）")
+    parser.add_argument('--verify-single-pass', action='store_true',
+                        help="只验证单次OCR的交易行检测与原来一致（不记录价格）")
+    parser.add_argument('--profile', action='store_true',
+                        help="统计各阶段耗时，保存到 data/profiles/")
+    args = parser.parse_args()
+    
+    profiler = enable_profiling() if args.profile else None
+    
     print("="*60)
     print("🎮 三角洲行动 - 价格自动采集系统")
     print("="*60)
     print()
     
-    tracker = PriceTracker()
+    tracker = PriceTracker(use_cache=not args.verify_single_pass, preprocess=args.preprocess,
+                           use_digits=args.digits)
     
-    screenshots_folder = "D:/游戏截图/物品识别/"
+    screenshots_folder = args.folder
     
     if not Path(screenshots_folder).exists():
         print(f"❌ 截图文件夹不存在")
         return
     
-    tracker.batch_analyze(screenshots_folder)
+    if args.verify_single_pass:
+        verify_single_pass(tracker, screenshots_folder)
+        return
+    
+    tracker.batch_analyze(screenshots_folder, incremental=not args.full,
+                          since=parse_since(args.since), dedup_threshold=args.dedup)
+    
+    if profiler is not None:
+        profiler.display()
+        summary_file, trace_file = profiler.save(
+            f"data/profiles/price_tracker_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        print(f"💾 耗时汇总：{summary_file}")
+        print(f"💾 Chrome trace：{trace_file}（chrome://tracing 中打开）")
     
     print("\n✅ 采集完成！")
     print("\n💡 生成的文件：")
-    print(f"   📊 价格历史：data/price_history.json")
+    print(f"   📊 价格历史：data/prices.db")
+    print(f"   📈 时间序列：data/timeseries/")
     print(f"   💰 当前价格：data/current_prices.json")
 
 
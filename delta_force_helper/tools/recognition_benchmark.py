@@ -0,0 +1,387 @@
+"""
+识别性能与准确率基准测试
+- 用 items_database.json 中的物品名称和价格，PIL 合成交易行截图和开箱（背包）截图
+- 截图内容已知，可以直接算识别的准确率（precision）和召回率（recall）
+- 测量 ScreenshotAnalyzer.analyze_all_text、match_item、
+  PriceTracker.extract_items_and_prices 的吞吐量、p50/p95 延迟和内存峰值
+- 纯CPU、离线运行（EasyOCR 模型需事先下载到本机）
+
+用法：python tools/recognition_benchmark.py [--market 20] [--loot 20] [--oracle] [--save 文件夹]
+
+--oracle：不跑OCR，直接把合成时已知的文字框当作OCR结果，
+          只测OCR之后的匹配和配对逻辑（没有OCR模型时也能运行）
+"""
+
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# 允许直接运行 python tools/xxx.py 时导入项目内模块
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from recognition.ocr_engine import get_process_memory_mb
+
+
+# 常见的中文字体位置（Windows / Linux / macOS）
+FONT_CANDIDATES = [
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+]
+
+
+def find_font(font_path=None):
+    """找一个能显示中文的字体，找不到返回 None"""
+    for path in ([font_path] if font_path else []) + FONT_CANDIDATES:
+        if path and Path(path).exists():
+            return path
+    return None
+
+
+class SyntheticScreenshotGenerator:
+    """
+    合成截图生成器
+
+    每张截图同时返回"标准答案"：
+    {'type': 'market'/'loot', 'items': [(名称, 价格或None), ...],
+     'ocr': [(bbox, 文字, 1.0), ...]}   # 与 easyocr.readtext 格式相同
+    """
+
+    def __init__(self, items_db, size=(1920, 1080), font_path=None, seed=0):
+        self.items = [(name, item.get('value', 0)) for name, item in items_db.items()]
+        self.size = size
+        self.rng = random.Random(seed)
+
+        self.font_path = find_font(font_path)
+        if self.font_path is None:
+            print("⚠️  没有找到中文字体，合成截图中的中文无法正常显示（--oracle 模式不受影响）")
+
+        self._fonts = {}
+
+    def font(self, size):
+        """按字号取字体（缓存）"""
+        if size not in self._fonts:
+            if self.font_path:
+                self._fonts[size] = ImageFont.truetype(self.font_path, size)
+            else:
+                try:
+                    self._fonts[size] = ImageFont.load_default(size)
+                except TypeError:
+                    # 旧版 Pillow 的默认字体不能指定大小
+                    self._fonts[size] = ImageFont.load_default()
+        return self._fonts[size]
+
+    def _background(self):
+        """深色带噪点的背景（接近游戏界面）"""
+        width, height = self.size
+        base = self.rng.randint(20, 45)
+        noise = np.random.default_rng(self.rng.randint(0, 2**31)).integers(
+            0, 12, (height, width, 3), dtype=np.uint8)
+        return Image.fromarray(noise + np.uint8(base))
+
+    def _draw_text(self, draw, ocr, position, text, size, fill=(230, 230, 230)):
+        """写一段文字，同时记录它的文字框"""
+        font = self.font(size)
+        draw.text(position, text, font=font, fill=fill)
+
+        left, top, right, bottom = draw.textbbox(position, text, font=font)
+        bbox = [[left, top], [right, top], [right, bottom], [left, bottom]]
+        ocr.append((bbox, text, 1.0))
+
+    def _pick_items(self, count):
+        count = min(count, len(self.items))
+        return self.rng.sample(self.items, count)
+
+    def market(self, rows=8):
+        """交易行截图：顶部标题 + 每行 物品名称 ... 价格"""
+        width, height = self.size
+        img = self._background()
+        draw = ImageDraw.Draw(img)
+        ocr = []
+
+        self._draw_text(draw, ocr, (int(width * 0.05), int(height * 0.04)), "交易行", 40)
+        self._draw_text(draw, ocr, (int(width * 0.20), int(height * 0.05)), "购买", 28, (180, 180, 180))
+        self._draw_text(draw, ocr, (int(width * 0.27), int(height * 0.05)), "出售", 28, (180, 180, 180))
+
+        items = []
+        row_height = height * 0.08
+        for row, (name, value) in enumerate(self._pick_items(rows)):
+            y = int(height * 0.18 + row * row_height)
+            price = max(100, int(value * self.rng.uniform(0.8, 1.2)))
+
+            self._draw_text(draw, ocr, (int(width * 0.10), y), name, 30)
+            self._draw_text(draw, ocr, (int(width * 0.40), y), f"{price:,}", 30, (240, 210, 120))
+            items.append((name, price))
+
+        return self._to_bgr(img), {'type': 'market', 'items': items, 'ocr': ocr}
+
+    def loot(self, count=10, cols=5):
+        """开箱/背包截图：物品名称分布在网格格子里"""
+        width, height = self.size
+        img = self._background()
+        draw = ImageDraw.Draw(img)
+        ocr = []
+
+        cell_w = width * 0.8 / cols
+        cell_h = height * 0.14
+
+        items = []
+        for index, (name, _) in enumerate(self._pick_items(count)):
+            row, col = divmod(index, cols)
+            x = int(width * 0.1 + col * cell_w + self.rng.uniform(0, cell_w * 0.2))
+            y = int(height * 0.2 + row * cell_h + self.rng.uniform(0, cell_h * 0.3))
+
+            draw.rectangle([x - 8, y - 8, x + int(cell_w * 0.85), y + int(cell_h * 0.7)],
+                           outline=(90, 90, 90), width=2)
+            self._draw_text(draw, ocr, (x, y), name, 26)
+            items.append((name, None))
+
+        return self._to_bgr(img), {'type': 'loot', 'items': items, 'ocr': ocr}
+
+    def _to_bgr(self, img):
+        return cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+
+
+class RecordingReader:
+    """
+    记录最近一次OCR结果的 readtext 包装
+
+    oracle 不为 None 时不跑OCR，直接返回 oracle 中的结果
+    """
+
+    def __init__(self, reader, oracle=None):
+        self.reader = reader
+        self.oracle = oracle
+        self.last = []
+
+    def readtext(self, img, **kwargs):
+        if self.oracle is not None:
+            self.last = list(self.oracle)
+        else:
+            self.last = self.reader.readtext(img, **kwargs)
+        return self.last
+
+
+def latency_summary(samples):
+    """耗时统计（毫秒）"""
+    if not samples:
+        return {'count': 0}
+
+    values = np.asarray(samples) * 1000
+    total = float(values.sum()) / 1000
+    return {
+        'count': len(samples),
+        'total_s': round(total, 4),
+        'throughput_per_s': round(len(samples) / total, 1) if total > 0 else None,
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def precision_recall(true_positive, predicted, expected):
+    precision = true_positive / predicted if predicted else 0.0
+    recall = true_positive / expected if expected else 0.0
+    return {'precision': round(precision, 4), 'recall': round(recall, 4),
+            'tp': true_positive, 'predicted': predicted, 'expected': expected}
+
+
+def run_benchmark(market_count=20, loot_count=20, oracle=False, font_path=None,
+                  save_folder=None, trace_memory=True, seed=0):
+    """运行基准测试，返回报告字典"""
+    # 识别模块依赖较重，放在这里导入（只生成截图时不需要）
+    from tools.screenshot_analyzer import ScreenshotAnalyzer
+    from tools.price_tracker import PriceTracker
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = ScreenshotAnalyzer(use_cache=False)
+        tracker = PriceTracker(use_cache=False)
+
+    # 基准测试不写未知物品文件
+    analyzer.unknown_tracker.flush_every = None
+
+    generator = SyntheticScreenshotGenerator(analyzer.items_db, font_path=font_path, seed=seed)
+
+    print(f"🖼️  合成 {market_count} 张交易行截图、{loot_count} 张开箱截图...")
+    samples = [generator.market() for _ in range(market_count)]
+    samples += [generator.loot() for _ in range(loot_count)]
+
+    if save_folder:
+        save_path = Path(save_folder)
+        save_path.mkdir(parents=True, exist_ok=True)
+        truth = {}
+        for index, (img, answer) in enumerate(samples):
+            filename = f"{answer['type']}_{index:04d}.png"
+            cv2.imencode('.png', img)[1].tofile(str(save_path / filename))
+            truth[filename] = {'type': answer['type'], 'items': answer['items']}
+        with open(save_path / "ground_truth.json", 'w', encoding='utf-8') as f:
+            json.dump(truth, f, ensure_ascii=False, indent=2)
+        print(f"💾 截图和标准答案已保存到：{save_path}")
+
+    reader = RecordingReader(analyzer.text_reader)
+    analyzer.text_reader = reader
+
+    if not oracle:
+        print("🔥 加载OCR模型...")
+        analyzer.ocr_reader.warm_up()
+    else:
+        # oracle 模式不做区域裁剪（文字框已经是整图坐标）
+        analyzer.region_proposer = None
+
+    timings = {'analyze_all_text': [], 'match_item': [], 'extract_items_and_prices': []}
+    counts = {'analyzer_tp': 0, 'analyzer_pred': 0, 'analyzer_expected': 0,
+              'price_tp': 0, 'price_pred': 0, 'price_expected': 0}
+
+    memory_before = get_process_memory_mb()
+    if trace_memory:
+        tracemalloc.start()
+
+    print(f"⏱️  测试中（{len(samples)} 张）...")
+    wall_start = time.perf_counter()
+
+    for img, answer in samples:
+        reader.oracle = answer['ocr'] if oracle else None
+        expected_names = {name for name, _ in answer['items']}
+
+        # 1. 整张截图识别（OCR + 匹配）
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = analyzer.analyze_all_text(img)
+            timings['analyze_all_text'].append(time.perf_counter() - start)
+
+        found = {item['name'] for item in result['items']} if result else set()
+        counts['analyzer_tp'] += len(found & expected_names)
+        counts['analyzer_pred'] += len(found)
+        counts['analyzer_expected'] += len(expected_names)
+
+        ocr_results = reader.last
+
+        # 2. 单条文字匹配（复用同一次OCR结果）
+        for (_, text, confidence) in ocr_results:
+            text = text.strip()
+            if len(text) < 2 or confidence < 0.4:
+                continue
+            start = time.perf_counter()
+            analyzer.match_item(text)
+            timings['match_item'].append(time.perf_counter() - start)
+
+        # 3. 物品与价格配对（只统计交易行截图）
+        if answer['type'] != 'market':
+            continue
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            priced = tracker.extract_items_and_prices(ocr_results)
+            timings['extract_items_and_prices'].append(time.perf_counter() - start)
+
+        expected_pairs = set(answer['items'])
+        predicted_pairs = {(item['name'], item['price']) for item in priced}
+        counts['price_tp'] += len(predicted_pairs & expected_pairs)
+        counts['price_pred'] += len(predicted_pairs)
+        counts['price_expected'] += len(expected_pairs)
+
+    wall_time = time.perf_counter() - wall_start
+
+    peak_traced_mb = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_traced_mb = round(peak / (1024 * 1024), 2)
+
+    memory_after = get_process_memory_mb()
+
+    return {
+        'mode': 'oracle' if oracle else 'ocr',
+        'screenshots': len(samples),
+        'wall_time_s': round(wall_time, 3),
+        'screenshots_per_s': round(len(samples) / wall_time, 2) if wall_time > 0 else None,
+        'latency': {stage: latency_summary(values) for stage, values in timings.items()},
+        'accuracy': {
+            'analyze_all_text': precision_recall(
+                counts['analyzer_tp'], counts['analyzer_pred'], counts['analyzer_expected']),
+            'extract_items_and_prices': precision_recall(
+                counts['price_tp'], counts['price_pred'], counts['price_expected']),
+        },
+        'memory': {
+            'python_peak_mb': peak_traced_mb,
+            'process_before_mb': round(memory_before, 1) if memory_before else None,
+            'process_after_mb': round(memory_after, 1) if memory_after else None,
+        },
+    }
+
+
+def display_report(report):
+    """打印报告"""
+    print("\n" + "="*70)
+    print(f"📊 识别基准测试（{report['mode']} 模式，{report['screenshots']} 张截图）")
+    print("="*70)
+
+    print(f"\n总耗时 {report['wall_time_s']:.2f} 秒，{report['screenshots_per_s']} 张/秒\n")
+
+    print(f"{'阶段':<28} {'次数':>6} {'吞吐(次/秒)':>12} {'p50(ms)':>10} {'p95(ms)':>10}")
+    print("-"*70)
+    for stage, stats in report['latency'].items():
+        if not stats['count']:
+            continue
+        print(f"{stage:<28} {stats['count']:>6} {stats['throughput_per_s']:>12} "
+              f"{stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f}")
+
+    print(f"\n{'识别结果':<28} {'precision':>10} {'recall':>10}")
+    print("-"*70)
+    for stage, stats in report['accuracy'].items():
+        print(f"{stage:<28} {stats['precision']:>10.1%} {stats['recall']:>10.1%}")
+
+    memory = report['memory']
+    print("\n💾 内存：", end="")
+    if memory['python_peak_mb'] is not None:
+        print(f"Python 峰值 {memory['python_peak_mb']} MB", end="  ")
+    if memory['process_after_mb'] is not None:
+        print(f"进程 {memory['process_before_mb']} → {memory['process_after_mb']} MB", end="")
+    print("\n" + "="*70)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="识别性能与准确率基准测试")
+    parser.add_argument('--market', type=int, default=20, help="交易行截图数量")
+    parser.add_argument('--loot', type=int, default=20, help="开箱截图数量")
+    parser.add_argument('--oracle', action='store_true',
+                        help="不跑OCR，用合成时的文字框代替（只测匹配和配对）")
+    parser.add_argument('--font', help="中文字体文件路径")
+    parser.add_argument('--save', help="保存合成截图和标准答案的文件夹")
+    parser.add_argument('--no-tracemalloc', action='store_true',
+                        help="不统计Python内存峰值（tracemalloc 会拖慢纯Python部分）")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--output', help="把报告保存为JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.market, args.loot, oracle=args.oracle, font_path=args.font,
+                           save_folder=args.save, trace_memory=not args.no_tracemalloc,
+                           seed=args.seed)
+    display_report(report)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 报告已保存到：{args.output}")
+
+
+if __name__ == "__main__":
+    main()
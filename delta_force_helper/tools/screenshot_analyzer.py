@@ -6,27 +6,86 @@ import cv2
 import numpy as np
 from pathlib import Path
 import json
-import easyocr
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
-import re
+from datetime import datetime
+
+# 允许直接运行 python tools/xxx.py 时导入项目内模块
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from recognition.ocr_engine import get_ocr_engine
+from recognition.ocr_cache import cached_reader
+from recognition.item_index import ItemNameIndex
+from recognition.fuzzy_matcher import FuzzyMatcher
+from recognition.region_proposal import RegionProposer
+from recognition.preprocess import wrap_reader, build_chain, load_chains
+from recognition.icon_recognizer import IconRecognizer
+from recognition.frame_dedup import FrameDeduplicator
+from recognition.image_loader import PrefetchLoader, ResultStream
+from recognition.unknown_items import UnknownItemTracker
+from recognition.text_classifier import is_item_text
+from recognition.screen_classifier import ScreenClassifier, SCREEN_NAMES
+from recognition.profiler import profiled, enable_profiling
+from recognition.file_manifest import ProcessedManifest, list_screenshots, parse_since
 
 class ScreenshotAnalyzer:
     """
     游戏截图分析器（支持未知物品记录）
     """
     
-    def __init__(self, database_path="data/items/items_database.json"):
+    # 界面分类为这些类型时不做识别
+    SKIP_SCREENS = ('lobby', 'raid_hud')
+    
+    def __init__(self, database_path="data/items/items_database.json", use_cache=True,
+                 region_mode=None, preprocess=None, use_icons=False):
+        """
+        region_mode: 文字区域预选模式（None = 整张图OCR，见 RegionProposer.MODES）
+        preprocess: OCR前预处理方案（None = 原图，见 recognition.preprocess）
+        use_icons: 先用图标模板识别格子里的物品，识别到就不再OCR
+        """
         print("🔧 初始化识别引擎...")
         
-        print("   加载OCR引擎...")
-        self.ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=False)
+        # 共享OCR引擎（与价格追踪共用一份模型，首次识别时才加载）
+        self.ocr_reader = get_ocr_engine()
+        
+        # OCR结果缓存（同一张截图不重复识别，只对这个分析器生效）
+        self.cached_reader = cached_reader(self.ocr_reader, use_cache)
+        
+        # OCR前预处理（缩小、灰度、二值化等）
+        self.preprocess = preprocess
+        self.preprocess_chain = build_chain(preprocess)
+        self.text_reader = wrap_reader(self.cached_reader, self.preprocess_chain)
+        
+        # 文字区域预选（只OCR物品面板）
+        self.region_mode = region_mode
+        self.region_proposer = RegionProposer(region_mode) if region_mode else None
+        
+        # 图标识别（开箱/背包格子）
+        self.use_icons = use_icons
+        self.icon_recognizer = None
+        if use_icons:
+            self.icon_recognizer = IconRecognizer()
+            print(f"   ✅ 已加载 {len(self.icon_recognizer)} 个物品图标")
+        
+        # 界面分类（有样例时跳过大厅、战局内等没有物品的截图）
+        self.screen_classifier = ScreenClassifier()
         
         print("   加载物品数据库...")
+        self.database_path = database_path
+        self.item_index = ItemNameIndex()
+        self.fuzzy_matcher = FuzzyMatcher(max_distance=2, min_similarity=0.7)
         self.load_database(database_path)
         
         # 【新增】未知物品记录
-        self.unknown_items = []
         self.unknown_items_file = "data/unknown_items.json"
+        self.unknown_tracker = UnknownItemTracker(self.unknown_items_file)
+        
+        # 已处理截图清单（增量分析）
+        self.manifest_file = "data/manifests/screenshot_analyzer.jsonl"
         
         print("✅ 初始化完成！\n")
     
@@ -40,6 +99,10 @@ class ScreenshotAnalyzer:
         else:
             print(f"   ⚠️  数据库文件不存在，使用默认数据")
             self.items_db = self.create_default_database()
+        
+        # 同步物品名称索引（只增删变化的部分）
+        self.item_index.sync(self.items_db)
+        self.fuzzy_matcher.sync(self.items_db)
     
     def create_default_database(self):
         """创建默认物品数据库"""
@@ -84,6 +147,7 @@ class ScreenshotAnalyzer:
         print(f"   ✅ 已加载 {len(default_items)} 个默认物品")
         return default_items
     
+    @profiled('read_image_chinese_path')
     def read_image_chinese_path(self, image_path):
         """读取中文路径图片"""
         try:
@@ -95,18 +159,76 @@ class ScreenshotAnalyzer:
     
     def analyze_screenshot(self, image_path):
         """分析截图"""
-        print(f"\n📸 分析截图：{Path(image_path).name}")
+        return self.analyze_image(image_path, self.read_image_chinese_path(image_path))
+    
+    def analyze_iter(self, screenshots, prefetch=4, workers=2, reduced_decode=False):
+        """
+        流式分析：每分析完一张就返回一张
+
+        线程池提前读取解码后面的截图（最多 prefetch 张），
+        返回 ResultStream，可遍历得到 (路径, 结果)，支持 cancel()、remaining 和 get_stats()
+
+        reduced_decode: 预处理第一步是缩小时，在解码时直接缩小（见 decode_reduction）
+        """
+        if not isinstance(screenshots, (list, tuple)):
+            screenshots = list_screenshots(screenshots)
         
-        img = self.read_image_chinese_path(image_path)
+        reduction = self.decode_reduction() if reduced_decode else 1
+        
+        if reduction == 1:
+            loader = PrefetchLoader(screenshots, prefetch=prefetch, workers=workers,
+                                    read=self.read_image_chinese_path)
+            return ResultStream(loader, self.analyze_image)
+        
+        # 解码时已经缩小，OCR前只做剩下的预处理
+        text_reader = wrap_reader(self.cached_reader, self.preprocess_chain.after_reduction(reduction))
+        loader = PrefetchLoader(screenshots, prefetch=prefetch, workers=workers,
+                                reduction=reduction)
+        return ResultStream(loader, lambda path, img: self.analyze_image(path, img, text_reader))
+    
+    def decode_reduction(self):
+        """
+        解码时可以缩小的倍数（1 = 需要原分辨率）
+
+        图标网格和布局配置按截图分辨率查找，用到它们时不能缩小
+        """
+        if not self.preprocess_chain or self.icon_recognizer is not None:
+            return 1
+        if self.region_mode in ('auto', 'layout'):
+            return 1
+        return self.preprocess_chain.decode_reduction()
+    
+    def analyze_image(self, image_path, img, text_reader=None):
+        """
+        分析已读取的截图
+
+        text_reader: OCR使用的 reader（None = self.text_reader）
+        """
+        print(f"\n📸 分析截图：{Path(image_path).name}")
         
         if img is None:
             print(f"   ❌ 无法读取图片")
             return None
         
         print(f"   ✅ 图片尺寸：{img.shape[1]}x{img.shape[0]}")
+        
+        # 没有物品的界面不做识别
+        if self.screen_classifier.is_ready:
+            screen_type, _ = self.screen_classifier.classify(img)
+            if screen_type in self.SKIP_SCREENS:
+                print(f"   ℹ️  {SCREEN_NAMES[screen_type]}界面，跳过")
+                return None
+        
+        # 图标识别成功就跳过OCR
+        if self.icon_recognizer is not None:
+            result = self.analyze_icons(img)
+            if result:
+                self.display_results(result)
+                return result
+        
         print(f"   🔍 OCR识别中...")
         
-        result = self.analyze_all_text(img)
+        result = self.analyze_all_text(img, text_reader)
         
         if result and result['item_count'] > 0:
             self.display_results(result)
@@ -115,10 +237,15 @@ class ScreenshotAnalyzer:
             print(f"   ℹ️  未识别到已知物品")
             return None
     
-    def analyze_all_text(self, img):
+    def analyze_all_text(self, img, text_reader=None):
         """分析图片中的所有文字"""
+        text_reader = text_reader or self.text_reader
+        
         try:
-            ocr_results = self.ocr_reader.readtext(img)
+            if self.region_proposer is not None:
+                ocr_results = self.region_proposer.readtext(text_reader, img)
+            else:
+                ocr_results = text_reader.readtext(img)
         except Exception as e:
             print(f"   ❌ OCR失败：{e}")
             return None
@@ -160,16 +287,61 @@ class ScreenshotAnalyzer:
             'item_count': len(unique_items)
         }
     
+    def analyze_icons(self, img):
+        """用图标模板识别格子里的物品（没有网格配置或没识别到返回 None）"""
+        matches = self.icon_recognizer.recognize(img)
+        if not matches:
+            return None
+        
+        items = []
+        
+        for match in matches:
+            matched_item = self.match_item(match['name'])
+            if not matched_item:
+                continue
+            
+            print(f"   🖼️  图标识别：{matched_item['name']} (相似度: {match['score']:.2%})")
+            
+            items.append({
+                'name': matched_item['name'],
+                'value': matched_item['value'],
+                'rarity': matched_item['rarity'],
+                'confidence': match['score']
+            })
+        
+        if not items:
+            return None
+        
+        unique_items = self.deduplicate_items(items)
+        total_value = sum(item['value'] for item in unique_items)
+        
+        return {
+            'items': unique_items,
+            'total_value': total_value,
+            'item_count': len(unique_items)
+        }
+    
+    @profiled('match_item')
     def match_item(self, text):
         """匹配物品"""
         # 精确匹配
         if text in self.items_db:
             return {'name': text, **self.items_db[text]}
         
-        # 包含匹配
-        for item_name in self.items_db.keys():
-            if item_name in text or text in item_name:
-                return {'name': item_name, **self.items_db[item_name]}
+        # 包含匹配（索引查询，结果与逐个比较相同）
+        if len(self.item_index) != len(self.items_db):
+            self.item_index.sync(self.items_db)
+            self.fuzzy_matcher.sync(self.items_db)
+        
+        item_name = self.item_index.match(text)
+        if item_name is not None:
+            return {'name': item_name, **self.items_db[item_name]}
+        
+        # 模糊匹配（OCR错一两个字，如 M7战斗步抢 → M7战斗步枪）
+        fuzzy = self.fuzzy_matcher.match(text)
+        if fuzzy is not None:
+            item_name, similarity = fuzzy
+            return {'name': item_name, **self.items_db[item_name], 'match_score': similarity}
         
         return None
     
@@ -177,38 +349,19 @@ class ScreenshotAnalyzer:
         """
         【新增】判断是否可能是物品
         """
-        weapon_keywords = ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋', 
-                          '机枪', '榴弹', '火箭', '匕首', '刀', '剑']
-        
-        equipment_keywords = ['头盔', '护甲', '背包', '护目镜', '战术', '装备', 
-                            '背心', '腰带', '手套']
-        
-        material_keywords = ['砖', '板', '金属', '芯片', '零件', '电路', '材料',
-                           '合金', '晶体', '药剂']
-        
-        all_keywords = weapon_keywords + equipment_keywords + material_keywords
-        
-        # 包含关键词
-        if any(kw in text for kw in all_keywords):
-            return True
-        
-        # 武器型号格式（如AK-47、M4A1）
-        if re.match(r'^[A-Z0-9\-]+$', text) and 2 <= len(text) <= 10:
-            return True
-        
-        return False
+        return is_item_text(text)
+    
+    @property
+    def unknown_items(self):
+        """本次发现的未知物品"""
+        return list(self.unknown_tracker.session.values())
     
     def record_unknown_item(self, text, confidence):
         """
         【新增】记录未知物品
         """
-        # 去重
-        if text not in [item['name'] for item in self.unknown_items]:
-            self.unknown_items.append({
-                'name': text,
-                'confidence': confidence,
-                'count': 1
-            })
+        # 按名称计数，本次第一次发现时提示
+        if self.unknown_tracker.record(text, confidence):
             print(f"   🆕 发现未知物品：{text} (置信度: {confidence:.2%})")
     
     def deduplicate_items(self, items):
@@ -240,26 +393,73 @@ class ScreenshotAnalyzer:
         print(f"📦 物品数：{result['item_count']}")
         print("="*60)
     
-    def batch_analyze(self, screenshots_folder):
-        """批量分析"""
-        folder = Path(screenshots_folder)
-        screenshots = list(folder.glob("*.png")) + list(folder.glob("*.jpg"))
+    def batch_analyze(self, screenshots_folder, workers=1, incremental=True, since=None,
+                      dedup_threshold=None, reduced_decode=False):
+        """
+        批量分析
+
+        workers: 并行进程数（1 = 单进程顺序处理）
+        incremental: 只分析新增或修改过的截图（False = 全部重新分析）
+        since: 只分析该时间戳之后修改的截图
+        dedup_threshold: 近似重复帧的汉明距离阈值（None = 不去重）
+        reduced_decode: 预处理允许时在解码时直接缩小（只对单进程有效）
+        """
+        screenshots = list_screenshots(screenshots_folder)
         
         if not screenshots:
             print(f"❌ 文件夹中没有找到截图：{screenshots_folder}")
             return
         
-        print(f"📁 找到 {len(screenshots)} 张截图")
+        manifest = ProcessedManifest(self.manifest_file)
+        pending = manifest.select(screenshots, since=since, incremental=incremental)
+        
+        print(f"📁 找到 {len(screenshots)} 张截图，需要分析 {len(pending)} 张")
+        
+        if not pending:
+            print("✅ 没有新的截图需要分析")
+            return
+        
+        screenshots = pending
+        manifest.begin_batch(len(screenshots))
+        self.unknown_tracker.reset_session()
+        
+        # 近似重复帧只分析代表帧
+        duplicates = {}
+        if dedup_threshold is not None:
+            deduplicator = FrameDeduplicator(threshold=dedup_threshold)
+            representatives, duplicates = deduplicator.group(screenshots)
+            print(f"🔁 去重：跳过 {len(duplicates)} 张近似重复截图，"
+                  f"实际分析 {len(representatives)} 张")
+        else:
+            representatives = screenshots
+        
+        stream = None
+        if workers > 1:
+            results = self.parallel_analyze(representatives, workers)
+        else:
+            stream = self.analyze_iter(representatives, reduced_decode=reduced_decode)
+            results = (result for _, result in stream)
         
         all_results = []
         failed_screenshots = []
+        results_by_screenshot = {}
         
-        for screenshot in screenshots:
-            result = self.analyze_screenshot(screenshot)
+        for screenshot, result in zip(representatives, results):
+            results_by_screenshot[screenshot] = result
+            
             if result:
                 all_results.append(result)
+                manifest.record(screenshot, 'recognized', item_count=result['item_count'])
             else:
                 failed_screenshots.append(screenshot.name)
+                manifest.record(screenshot, 'no_items')
+        
+        # 重复帧沿用代表帧的结果
+        for screenshot, representative in duplicates.items():
+            results_by_screenshot[screenshot] = results_by_screenshot[representative]
+            manifest.record(screenshot, 'duplicate', representative=str(representative))
+        
+        manifest.end_batch()
         
         # 处理统计
         print(f"\n" + "="*60)
@@ -268,6 +468,21 @@ class ScreenshotAnalyzer:
         print(f"总截图数：{len(screenshots)}")
         print(f"成功识别：{len(all_results)} ({len(all_results)/len(screenshots)*100:.1f}%)")
         print(f"未识别到：{len(failed_screenshots)} ({len(failed_screenshots)/len(screenshots)*100:.1f}%)")
+        if duplicates:
+            print(f"重复跳过：{len(duplicates)} ({len(duplicates)/len(screenshots)*100:.1f}%)")
+        
+        cache = self.cached_reader
+        if cache is not self.ocr_reader and cache.hits + cache.misses:
+            print(f"OCR缓存：命中 {cache.hits} 次，未命中 {cache.misses} 次")
+        
+        if stream is not None:
+            stats = stream.get_stats()
+            print(f"预读取：平均 {stats['avg_depth']}/{stats['prefetch']} 张已就绪，"
+                  f"等待读取 {stats['empty_waits']} 次（{stats['wait_time']:.2f} 秒）"
+                  + (f"，解码缩小 1/{stats['reduction']}" if stats['reduction'] > 1 else ""))
+        
+        if self.region_proposer is not None and self.region_proposer.image_count:
+            print(f"区域预选：OCR面积减少 {self.region_proposer.get_stats()['area_saved']:.0%}")
         
         if all_results:
             self.display_summary(all_results)
@@ -277,6 +492,28 @@ class ScreenshotAnalyzer:
             self.save_unknown_items()
             self.display_unknown_items()
             self.generate_pending_config()
+        
+        return results_by_screenshot
+    
+    def parallel_analyze(self, screenshots, workers):
+        """
+        多进程并行分析
+
+        - 每个工作进程各自加载并预热一份OCR模型
+        - 结果按原始文件顺序逐个返回（生成器）
+        - 各进程发现的未知物品（计数增量）汇总到本进程，最后统一保存
+        """
+        workers = min(workers, len(screenshots))
+        print(f"⚡ 使用 {workers} 个进程并行分析")
+        
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.database_path, self.region_mode,
+                                           self.preprocess, self.use_icons)) as executor:
+            for result, unknown_items in executor.map(_analyze_in_worker, screenshots):
+                self.unknown_tracker.merge(unknown_items)
+                
+                yield result
     
     def display_summary(self, results):
         """汇总统计"""
@@ -294,33 +531,11 @@ class ScreenshotAnalyzer:
     
     def save_unknown_items(self):
         """
-        【新增】保存未知物品
+        【新增】保存未知物品（追加写入日志，不重写整个文件）
         """
-        Path(self.unknown_items_file).parent.mkdir(parents=True, exist_ok=True)
-        
-        # 读取已有记录
-        existing = []
-        if Path(self.unknown_items_file).exists():
-            with open(self.unknown_items_file, 'r', encoding='utf-8') as f:
-                existing = json.load(f)
-        
-        # 合并
-        for new_item in self.unknown_items:
-            found = False
-            for ex in existing:
-                if ex['name'] == new_item['name']:
-                    ex['count'] = ex.get('count', 0) + 1
-                    ex['confidence'] = max(ex.get('confidence', 0), new_item['confidence'])
-                    found = True
-                    break
-            if not found:
-                existing.append(new_item)
-        
-        # 保存
-        with open(self.unknown_items_file, 'w', encoding='utf-8') as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
-        
-        print(f"\n💾 已保存 {len(self.unknown_items)} 个未知物品到：{self.unknown_items_file}")
+        self.unknown_tracker.flush()
+        
+        print(f"\n💾 已保存 {len(self.unknown_tracker.session)} 个未知物品到：{self.unknown_items_file}")
     
     def display_unknown_items(self):
         """
@@ -358,22 +573,102 @@ class ScreenshotAnalyzer:
         print(f"📝 已生成待确认配置：{config_file}")
 
 
+def default_worker_count():
+    """默认并行进程数：物理核心数"""
+    try:
+        import psutil
+        count = psutil.cpu_count(logical=False)
+    except ImportError:
+        count = None
+    
+    return count or os.cpu_count() or 1
+
+
+# ============ 多进程工作函数 ============
+
+_worker_analyzer = None
+
+
+def _init_worker(database_path, region_mode, preprocess, use_icons):
+    """工作进程初始化：加载并预热本进程的OCR模型"""
+    global _worker_analyzer
+    
+    # 每个进程只用一个线程推理，避免多进程之间抢占CPU
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    cv2.setNumThreads(1)
+    
+    _worker_analyzer = ScreenshotAnalyzer(database_path, region_mode=region_mode,
+                                          preprocess=preprocess, use_icons=use_icons)
+    # 未知物品交给主进程统一写入
+    _worker_analyzer.unknown_tracker.flush_every = None
+    _worker_analyzer.ocr_reader.warm_up()
+
+
+def _analyze_in_worker(image_path):
+    """在工作进程中分析一张截图，返回（结果，本张截图发现的未知物品）"""
+    result = _worker_analyzer.analyze_screenshot(image_path)
+    return result, _worker_analyzer.unknown_tracker.take_pending()
+
+
 def main():
     """主函数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="三角洲行动 - 截图物品识别工具")
+    parser.add_argument('folder', nargs='?', default="D:/游戏截图/物品识别/",
+                        help="截图文件夹")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"并行进程数（0 = 物理核心数 {default_worker_count()}）")
+    parser.add_argument('--since', default=None,
+                        help="只分析该时间之后修改的截图（如 2025-11-20 或 2025-11-20T18:00）")
+    parser.add_argument('--full', action='store_true',
+                        help="忽略已处理清单，全部重新分析")
+    parser.add_argument('--roi', choices=RegionProposer.MODES, default=None,
+                        help="只OCR预选的文字区域（默认整张图）")
+    parser.add_argument('--preprocess', choices=list(load_chains()), default=None,
+                        help="OCR前预处理方案（默认原图）")
+    parser.add_argument('--icons', action='store_true',
+                        help="先用图标模板识别格子里的物品")
+    parser.add_argument('--dedup', type=int, nargs='?', const=5, default=None,
+                        metavar='THRESHOLD',
+                        help="跳过近似重复的连续截图（汉明距离阈值，默认5）")
+    parser.add_argument('--reduced-decode', action='store_true',
+                        help="预处理第一步是缩小时，解码时直接缩小（更快，需配合 --preprocess）")
+    parser.add_argument('--profile', action='store_true',
+                        help="统计各阶段耗时，保存到 data/profiles/（多进程时只统计主进程）")
+    args = parser.parse_args()
+    
+    profiler = enable_profiling() if args.profile else None
+    
     print("="*60)
     print("🎮 三角洲行动 - 截图物品识别工具（自动学习版）")
     print("="*60)
     print()
     
-    analyzer = ScreenshotAnalyzer()
+    analyzer = ScreenshotAnalyzer(region_mode=args.roi, preprocess=args.preprocess,
+                                  use_icons=args.icons)
     
-    screenshots_folder = "D:/游戏截图/物品识别/"
+    screenshots_folder = args.folder
     
     if not Path(screenshots_folder).exists():
         print(f"❌ 截图文件夹不存在")
         return
     
-    analyzer.batch_analyze(screenshots_folder)
+    workers = args.workers or default_worker_count()
+    analyzer.batch_analyze(screenshots_folder, workers=workers,
+                           incremental=not args.full, since=parse_since(args.since),
+                           dedup_threshold=args.dedup, reduced_decode=args.reduced_decode)
+    
+    if profiler is not None:
+        profiler.display()
+        summary_file, trace_file = profiler.save(
+            f"data/profiles/screenshot_analyzer_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        print(f"💾 耗时汇总：{summary_file}")
+        print(f"💾 Chrome trace：{trace_file}（chrome://tracing 中打开）")
     
     print("\n✅ 分析完成！")
 
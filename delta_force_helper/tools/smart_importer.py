@@ -3,9 +3,18 @@
 """
 
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# 允许直接运行 python tools/xxx.py 时导入项目内模块
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from recognition.text_classifier import detect_category
+from storage.price_store import PriceStore, LEGACY_FILE
+
 class SmartImporter:
     """
     智能导入器
@@ -17,7 +26,7 @@ class SmartImporter:
     """
     
     def __init__(self):
-        self.price_history_file = "data/price_history.json"
+        self.price_db_file = "data/prices.db"
         self.items_db_file = "data/items/items_database.json"
         self.current_prices_file = "data/current_prices.json"
     
@@ -26,15 +35,15 @@ class SmartImporter:
         从价格数据自动生成物品数据库
         """
         
-        # 检查价格数据
-        if not Path(self.price_history_file).exists():
+        # 检查价格数据（没有数据库但有旧的 price_history.json 时会自动导入）
+        if not Path(self.price_db_file).exists() and not Path(LEGACY_FILE).exists():
             print("❌ 未找到价格数据，请先运行价格采集")
             print("   python tools\\price_tracker.py")
             return
         
         # 加载价格数据
-        with open(self.price_history_file, 'r', encoding='utf-8') as f:
-            price_history = json.load(f)
+        with PriceStore(self.price_db_file) as store:
+            price_history = store.export_history()
         
         if not price_history:
             print("❌ 价格数据为空")
@@ -111,18 +120,7 @@ class SmartImporter:
     
     def auto_detect_category(self, name):
         """自动检测物品类别"""
-        categories = {
-            'weapon': ['步枪', '突击', '战斗', '狙击', '手枪', '霰弹', '冲锋', '机枪'],
-            'armor': ['头盔', '护甲', '背心', '防弹'],
-            'equipment': ['背包', '腰带', '手套', '靴子', '护目镜', '战术'],
-            'material': ['砖', '板', '金属', '芯片', '零件', '电路', '材料']
-        }
-        
-        for category, keywords in categories.items():
-            if any(kw in name for kw in keywords):
-                return category
-        
-        return 'unknown'
+        return detect_category(name)
     
     def save_database(self, items):
         """保存数据库"""